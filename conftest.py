@@ -1,17 +1,28 @@
 import pytest
-from datetime import date, time, timedelta
-from django.contrib.auth.models import User
-from theatre.models import TheatreHall, Play, Performance
+from datetime import timedelta
+from django.core.cache import cache
+from django.utils import timezone
+from theatre.models import Actor, Genre, TheatreHall, Play, Performance
+from theatre.services.booking import create_reservation
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
 
 
 @pytest.fixture
-def user(db):
-    return User.objects.create_user(username="lev", password="pass")
+def user(db, django_user_model):
+    return django_user_model.objects.create_user(
+        email="lev@example.com", password="pass"
+    )
 
 
 @pytest.fixture
 def hall(db):
-    return TheatreHall.objects.create(name="Big scena", rows=3, seats_in_row=4)
+    return TheatreHall.objects.create(name="Big scena", rows=2, seats_in_row=5)
 
 
 @pytest.fixture
@@ -22,11 +33,44 @@ def play(db):
 @pytest.fixture
 def performance(db, hall, play):
     return Performance.objects.create(
-        play=play,
-        show_time=time(19, 0),
-        show_date=date.today() + timedelta(days=1),
-        hall=hall,
+        play=play, theatre_hall=hall, show_time=timezone.now()
+    )
+
+
+def _make_play(i, user=None):
+    play = Play.objects.create(title=f"Play {i}")
+    play.actors.add(
+        *(Actor.objects.create(first_name=f"A{i}", last_name=str(j)) for j in (1, 2))
+    )
+    play.genres.add(*(Genre.objects.create(name=f"G{i}-{j}") for j in (1, 2)))
+    return play
+
+
+def _make_performance(i, user):
+    hall = TheatreHall.objects.create(name=f"Hall {i}", rows=2, seats_in_row=2)
+    performance = Performance.objects.create(
+        play=_make_play(i),
+        theatre_hall=hall,
+        show_time=timezone.now() + timedelta(hours=i),
+    )
+    create_reservation(
+        user=user,
+        performance=performance,
+        seats=[{"row": 1, "seat": 1}, {"row": 2, "seat": 2}],
     )
+    return performance
+
+
+# make_play(i) / make_performance(i, user): the i-th of a series of distinct
+# plays (two actors, two genres) and performances (2x2 hall, 2 seats sold)
+@pytest.fixture
+def make_play(db):
+    return _make_play
+
+
+@pytest.fixture
+def make_performance(db):
+    return _make_performance
 
 
 # DRF клієнт, якщо потрібен у тестах API
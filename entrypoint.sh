@@ -1,6 +1,9 @@
 #!/bin/sh
 set -e
 
+# Exported so the system checks run by migrate see the real worker count
+export GUNICORN_WORKERS="${GUNICORN_WORKERS:-3}"
+
 python - <<'PY'
 import os, time, psycopg2
 while True:
@@ -27,5 +30,5 @@ if [ "$DJANGO_RUNSERVER" = "1" ]; then
   python manage.py runserver 0.0.0.0:8000
 else
   echo "Starting Gunicorn..."
-  exec gunicorn theatrebox.wsgi:application --bind 0.0.0.0:8000 --workers ${GUNICORN_WORKERS:-3}
+  exec gunicorn theatrebox.wsgi:application --bind 0.0.0.0:8000 --workers $GUNICORN_WORKERS
 fi
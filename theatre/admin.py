@@ -1,5 +1,83 @@
 from django.contrib import admin
-from .models import Actor, Genre, Play, TheatreHall, Performance, Reservation, Ticket
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+from .models import (
+    Actor,
+    Genre,
+    Play,
+    TheatreHall,
+    Performance,
+    Reservation,
+    SeatHold,
+    Ticket,
+)
+from .services.booking import cancel_reservation, delete_tickets
+
+# Unfiltered changelists of tables estimated above this many rows show the
+# planner's estimate instead of an exact COUNT(*)
+ESTIMATED_COUNT_THRESHOLD = 100_000
+
+# What each model's __str__ reads, for list rows and widget labels
+LABEL_RELATED = {
+    Performance: ("play", "theatre_hall"),
+    Reservation: ("user",),
+}
+
+
+def estimated_count(queryset: QuerySet) -> int | None:
+    """PostgreSQL's row estimate for the table, None if there is none."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # reltuples is -1 until the table is first vacuumed or analyzed
+    if row is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimate = estimated_count(queryset)
+            if estimate is not None and estimate >= ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # No second, unfiltered COUNT(*) next to filtered results
+    show_full_result_count = False
+
+
+class RelatedLabelsMixin:
+    # Select and autocomplete labels are __str__ of each choice or match
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        related = LABEL_RELATED.get(db_field.related_model)
+        if related and "queryset" not in kwargs:
+            manager = db_field.related_model._default_manager
+            kwargs["queryset"] = manager.select_related(*related)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_search_results(self, request, queryset, search_term):
+        queryset, may_have_duplicates = super().get_search_results(
+            request, queryset, search_term
+        )
+        related = LABEL_RELATED.get(self.model)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset, may_have_duplicates
 
 
 @admin.register(Actor)
@@ -14,16 +92,35 @@ class GenreAdmin(admin.ModelAdmin):
     search_fields = ("name",)
 
 
-class TicketInline(admin.TabularInline):
+class TicketInline(RelatedLabelsMixin, admin.TabularInline):
     model = Ticket
     extra = 0
+    autocomplete_fields = ("performance",)
+
+    def get_queryset(self, request):
+        # Each row shows Ticket.__str__
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("performance__play", "performance__theatre_hall")
+        )
 
 
 @admin.register(Reservation)
-class ReservationAdmin(admin.ModelAdmin):
+class ReservationAdmin(RelatedLabelsMixin, LargeTableAdmin):
     list_display = ("id", "user", "created_at")
+    list_select_related = ("user",)
+    search_fields = ("=id", "user__email")
+    autocomplete_fields = ("user",)
     inlines = [TicketInline]
 
+    def delete_model(self, request, obj):
+        cancel_reservation(obj)
+
+    def delete_queryset(self, request, queryset):
+        delete_tickets(Ticket.objects.filter(reservation__in=queryset))
+        queryset.delete()
+
 
 @admin.register(Play)
 class PlayAdmin(admin.ModelAdmin):
@@ -35,16 +132,53 @@ class PlayAdmin(admin.ModelAdmin):
 @admin.register(TheatreHall)
 class TheatreHallAdmin(admin.ModelAdmin):
     list_display = ("name", "rows", "seats_in_row", "capacity")
+    search_fields = ("name",)
 
 
 @admin.register(Performance)
-class PerformanceAdmin(admin.ModelAdmin):
-    list_display = ("play", "theatre_hall", "show_time")
-    list_filter = ("theatre_hall", "show_time")
+class PerformanceAdmin(RelatedLabelsMixin, LargeTableAdmin):
+    list_display = (
+        "play",
+        "theatre_hall",
+        "show_time",
+        "on_sale",
+        "seats_taken",
+        "seats_free",
+    )
+    list_filter = ("theatre_hall", "show_time", "on_sale")
+    list_select_related = LABEL_RELATED[Performance]
+    date_hierarchy = "show_time"
+    search_fields = ("play__title", "theatre_hall__name")
+    autocomplete_fields = ("play", "theatre_hall")
 
 
 @admin.register(Ticket)
-class TicketAdmin(admin.ModelAdmin):
+class TicketAdmin(RelatedLabelsMixin, LargeTableAdmin):
     list_display = ("performance", "row", "seat", "reservation")
-    list_filter = ("performance",)
+    # Not a list of every performance: ?performance__id__exact= still works
+    list_filter = (
+        ("performance__show_time", admin.DateFieldListFilter),
+        "performance__play",
+    )
+    # Performance.__str__ and Reservation.__str__ read these relations
+    list_select_related = (
+        "performance__play",
+        "performance__theatre_hall",
+        "reservation__user",
+    )
     search_fields = ("performance__play__title",)
+    autocomplete_fields = ("performance", "reservation")
+
+    def delete_model(self, request, obj):
+        delete_tickets(Ticket.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        delete_tickets(queryset)
+
+
+@admin.register(SeatHold)
+class SeatHoldAdmin(admin.ModelAdmin):
+    list_display = ("performance", "row", "seat", "user", "expires_at")
+    list_select_related = ("performance__play", "performance__theatre_hall", "user")
+    list_filter = ("expires_at",)
+    search_fields = ("token",)
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends whose entries live in (or never leave) one process
+PER_PROCESS_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    # Seat map versions, catalog generations and the waiting room all live in
+    # the default cache; every worker has to see the same one
+    workers = getattr(settings, "GUNICORN_WORKERS", 1)
+    backend = settings.CACHES["default"]["BACKEND"]
+    if workers > 1 and backend in PER_PROCESS_CACHES:
+        return [
+            Error(
+                f"{backend} is private to each process, but "
+                f"GUNICORN_WORKERS={workers}.",
+                hint=(
+                    "Point DJANGO_CACHE_BACKEND/DJANGO_CACHE_LOCATION at a shared "
+                    "cache (the docker-compose redis service) or run one worker."
+                ),
+                id="theatre.E001",
+            )
+        ]
+    return []
@@ -0,0 +1,139 @@
+"""Per-worker tables of pre-serialized actors, genres and halls.
+
+The tables are tiny and nearly static, so nested output for them becomes a
+dict lookup. Each table is tagged with its catalog generation (see
+``theatre.services.catalog``); one cache round trip per request tells every
+worker whether its copy is still current. Tables older than
+``DIMENSION_TABLE_MAX_AGE`` seconds are reloaded regardless, as writes made
+with ``QuerySet.update()`` start no new generation.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable
+
+from django.conf import settings
+
+from .models import Actor, Genre, Play, TheatreHall
+from .serializers import ActorSerializer, GenreSerializer, TheatreHallSerializer
+from .services.catalog import catalog_generations
+
+DIMENSIONS = {
+    "actor": (Actor, ActorSerializer),
+    "genre": (Genre, GenreSerializer),
+    "theatrehall": (TheatreHall, TheatreHallSerializer),
+}
+
+# Play relation -> (through column, dimension)
+PLAY_MEMBERS = {"actors": ("actor_id", "actor"), "genres": ("genre_id", "genre")}
+
+
+def _max_age() -> int:
+    return getattr(settings, "DIMENSION_TABLE_MAX_AGE", 5 * 60)
+
+
+def _load(dimension: str) -> Dict[int, dict]:
+    model, serializer_class = DIMENSIONS[dimension]
+    # Rows keep the model's ordering, which is also the order of a relation
+    rows = serializer_class(model.objects.all(), many=True).data
+    return {row["id"]: dict(row) for row in rows}
+
+
+class DimensionCache:
+    def __init__(self):
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def tables(self, dimensions: Iterable[str]) -> "DimensionTables":
+        dimensions = list(dimensions)
+        generations = catalog_generations(dimensions)
+        loaded_after = time.monotonic() - _max_age()
+        tables = {}
+        for dimension in dimensions:
+            cached = self._tables.get(dimension)
+            if (
+                cached is None
+                or cached[0] != generations[dimension]
+                or cached[2] < loaded_after
+            ):
+                cached = self._store(dimension, generations[dimension])
+            tables[dimension] = cached[1]
+        return DimensionTables(self, tables, generations)
+
+    def reload(self, dimension: str, generation: int) -> Dict[int, dict]:
+        return self._store(dimension, generation)[1]
+
+    def _store(self, dimension, generation):
+        entry = (generation, _load(dimension), time.monotonic())
+        with self._lock:
+            self._tables[dimension] = entry
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tables.clear()
+
+
+class DimensionTables:
+    """One request's view of the tables.
+
+    A row committed before its generation bump is visible yet can be
+    missing from the table; such a miss reloads the table once.
+    """
+
+    def __init__(self, cache: DimensionCache, tables: dict, generations: dict):
+        self._cache = cache
+        self._tables = tables
+        self._generations = generations
+        self._reloaded = set()
+        self._positions = {}
+
+    def __contains__(self, dimension: str) -> bool:
+        return dimension in self._tables
+
+    def get(self, dimension: str, pk: int) -> dict:
+        table = self._tables[dimension]
+        if pk not in table and dimension not in self._reloaded:
+            self._reloaded.add(dimension)
+            self._positions.pop(dimension, None)
+            table = self._tables[dimension] = self._cache.reload(
+                dimension, self._generations[dimension]
+            )
+        return table[pk]
+
+    def order(self, dimension: str, pks: Iterable[int]) -> list:
+        """``pks`` in the model's ordering, as the relation would list them."""
+        pks = list(pks)
+        for pk in pks:
+            self.get(dimension, pk)
+        if dimension not in self._positions:
+            table = self._tables[dimension]
+            self._positions[dimension] = {pk: i for i, pk in enumerate(table)}
+        return sorted(pks, key=self._positions[dimension].__getitem__)
+
+
+dimension_cache = DimensionCache()
+
+
+def load_play_members(
+    tables: DimensionTables, play_ids: Iterable[int], relations: Iterable[str]
+) -> Dict[str, Dict[int, list]]:
+    """Actor and genre ids of each play, straight from the through tables."""
+    play_ids = set(play_ids)
+    members = {}
+    for relation in relations:
+        column, dimension = PLAY_MEMBERS[relation]
+        ids = defaultdict(list)
+        rows = getattr(Play, relation).through.objects.filter(play_id__in=play_ids)
+        for play_id, pk in rows.values_list("play_id", column):
+            ids[play_id].append(pk)
+        if dimension in tables:
+            ids = {
+                play_id: tables.order(dimension, pks) for play_id, pks in ids.items()
+            }
+        else:
+            # Rendered as bare ids, which a relation lists by model ordering too
+            ids = {play_id: sorted(pks) for play_id, pks in ids.items()}
+        members[relation] = ids
+    return members
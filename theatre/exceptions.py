@@ -0,0 +1,34 @@
+from contextlib import contextmanager
+
+from rest_framework import status
+from rest_framework.exceptions import APIException, Throttled, ValidationError
+
+from .services.admission import AdmissionError
+from .services.booking import BookingError, SeatsTakenError
+
+
+class SeatsConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some seats are already taken."
+    default_code = "seats_taken"
+
+    def __init__(self, seats, detail=None):
+        super().__init__(detail)
+        # Kept as plain ints so clients can match them against the seat map
+        self.detail = {
+            "detail": self.detail,
+            "taken": [{"performance": p, "row": r, "seat": s} for p, r, s in seats],
+        }
+
+
+@contextmanager
+def booking_errors():
+    """Translate booking service errors into API responses."""
+    try:
+        yield
+    except SeatsTakenError as exc:
+        raise SeatsConflict(exc.seats, exc.message)
+    except BookingError as exc:
+        raise ValidationError({"seats": exc.messages})
+    except AdmissionError as exc:
+        raise Throttled(wait=exc.retry_after, detail=str(exc))
@@ -1,13 +1,81 @@
+from datetime import datetime, time, timedelta
+
 import django_filters as filters
-from .models import Performance
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from rest_framework.filters import SearchFilter
+from .models import Performance, Play, TheatreHall
+from .services.search import search_plays
 
 
 class PerformanceFilter(filters.FilterSet):
     date_from = filters.IsoDateTimeFilter(field_name="show_time", lookup_expr="gte")
     date_to = filters.IsoDateTimeFilter(field_name="show_time", lookup_expr="lte")
+    date = filters.DateFilter(method="filter_date")
+    # Substring matches use the trigram indexes, exact matches the UPPER(...)
+    # pattern ones (migration 0008); prefixes and ids follow the cursor order
     play = filters.CharFilter(field_name="play__title", lookup_expr="icontains")
+    play_prefix = filters.CharFilter(method="filter_play_prefix")
+    play_exact = filters.CharFilter(field_name="play__title", lookup_expr="iexact")
+    play_id = filters.NumberFilter(field_name="play_id")
     hall = filters.CharFilter(field_name="theatre_hall__name", lookup_expr="icontains")
+    hall_prefix = filters.CharFilter(method="filter_hall_prefix")
+    hall_exact = filters.CharFilter(
+        field_name="theatre_hall__name", lookup_expr="iexact"
+    )
+    hall_id = filters.NumberFilter(field_name="theatre_hall_id")
+    available = filters.BooleanFilter(method="filter_available")
+    min_free = filters.NumberFilter(field_name="seats_free", lookup_expr="gte")
 
     class Meta:
         model = Performance
-        fields = ("date_from", "date_to", "play", "hall")
+        fields = (
+            "date_from",
+            "date_to",
+            "date",
+            "play",
+            "play_prefix",
+            "play_exact",
+            "play_id",
+            "hall",
+            "hall_prefix",
+            "hall_exact",
+            "hall_id",
+            "available",
+            "min_free",
+        )
+
+    def filter_date(self, queryset, name, value):
+        # A half-open range on show_time instead of a __date cast, so the
+        # show_time index is used; days follow the current time zone
+        start = timezone.make_aware(datetime.combine(value, time.min))
+        end = timezone.make_aware(datetime.combine(value + timedelta(days=1), time.min))
+        return queryset.filter(show_time__gte=start, show_time__lt=end)
+
+    def filter_play_prefix(self, queryset, name, value):
+        # A correlated EXISTS rather than a join: the page is read off the
+        # (show_time, id) index and each row's play probed by primary key, so
+        # there is no sort over every show of the matching plays
+        plays = Play.objects.filter(pk=OuterRef("play_id"), title__istartswith=value)
+        return queryset.filter(Exists(plays))
+
+    def filter_hall_prefix(self, queryset, name, value):
+        halls = TheatreHall.objects.filter(
+            pk=OuterRef("theatre_hall_id"), name__istartswith=value
+        )
+        return queryset.filter(Exists(halls))
+
+    def filter_available(self, queryset, name, value):
+        if value:
+            return queryset.filter(seats_free__gt=0)
+        return queryset.filter(seats_free__lte=0)
+
+
+class PlaySearchFilter(SearchFilter):
+    """?search= over the full-text index of titles, actors and genres, ranked."""
+
+    search_description = "Words to look up in titles, actor names and genres."
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "")
+        return search_plays(queryset, query)
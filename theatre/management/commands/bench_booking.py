@@ -0,0 +1,193 @@
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import timedelta
+from queue import Empty, Queue
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.utils import timezone
+
+from theatre.models import Play, TheatreHall, Performance, Reservation
+from theatre.services.booking import SeatsTakenError, create_reservation
+
+from ._bench import latency_summary, write_report
+
+DEADLOCK_CODES = {"40P01"}
+SERIALIZATION_CODES = {"40001"}
+
+
+def classify_operational_error(exc: OperationalError) -> str:
+    code = getattr(exc.__cause__, "pgcode", None)
+    if code in DEADLOCK_CODES:
+        return "deadlocks"
+    if code in SERIALIZATION_CODES:
+        return "serialization_failures"
+    if "locked" in str(exc).lower():
+        return "lock_errors"
+    return "errors"
+
+
+class Command(BaseCommand):
+    help = "Measure create_reservation under concurrent load and print JSON stats"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--bookings", type=int, default=200)
+        parser.add_argument("--seats-per-booking", type=int, default=2)
+        parser.add_argument(
+            "--overlap",
+            type=float,
+            default=0.5,
+            help="Share of bookings that compete for the same front-row seats.",
+        )
+        parser.add_argument("--rows", type=int, default=40)
+        parser.add_argument("--seats-in-row", type=int, default=50)
+        parser.add_argument("--retries", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--output", help="Also write the JSON report here.")
+        parser.add_argument(
+            "--keep", action="store_true", help="Keep the seeded data afterwards."
+        )
+
+    def handle(self, *args, **options):
+        if not 0 <= options["overlap"] <= 1:
+            raise CommandError("--overlap must be between 0 and 1.")
+        k = options["seats_per_booking"]
+        if k < 1 or k > options["seats_in_row"]:
+            raise CommandError("--seats-per-booking must fit in one row.")
+
+        rng = random.Random(options["seed"])
+        performance, users = self._seed(options)
+        try:
+            jobs = self._plan(rng, performance.theatre_hall, options)
+            report = self._run(performance, users, jobs, options)
+        finally:
+            if not options["keep"]:
+                self._cleanup(performance, users)
+        write_report(self, report, options["output"])
+
+    def _seed(self, options):
+        tag = uuid.uuid4().hex[:8]
+        hall = TheatreHall.objects.create(
+            name=f"bench-{tag}",
+            rows=options["rows"],
+            seats_in_row=options["seats_in_row"],
+        )
+        play = Play.objects.create(title=f"bench-{tag}")
+        performance = Performance.objects.create(
+            play=play,
+            theatre_hall=hall,
+            show_time=timezone.now() + timedelta(days=365),
+        )
+        User = get_user_model()
+        users = [
+            User.objects.create_user(email=f"bench-{tag}-{i}@example.com")
+            for i in range(options["threads"])
+        ]
+        return performance, users
+
+    def _plan(self, rng, hall, options):
+        k = options["seats_per_booking"]
+        # Disjoint blocks for the non-overlapping share, from row 2 onwards
+        blocks = [
+            [(r, s + i) for i in range(k)]
+            for r in range(2, hall.rows + 1)
+            for s in range(1, hall.seats_in_row - k + 2, k)
+        ]
+        rng.shuffle(blocks)
+        jobs = []
+        for _ in range(options["bookings"]):
+            if rng.random() < options["overlap"] or not blocks:
+                start = rng.randint(1, hall.seats_in_row - k + 1)
+                jobs.append([(1, start + i) for i in range(k)])
+            else:
+                jobs.append(blocks.pop())
+        return jobs
+
+    def _run(self, performance, users, jobs, options):
+        queue = Queue()
+        for job in jobs:
+            queue.put(job)
+        latencies = []
+        outcomes = Counter()
+        lock = threading.Lock()
+
+        def worker(user):
+            try:
+                while True:
+                    try:
+                        pairs = queue.get_nowait()
+                    except Empty:
+                        return
+                    seats = [{"row": r, "seat": s} for r, s in pairs]
+                    started = time.perf_counter()
+                    result = self._book(
+                        user, performance, seats, options, outcomes, lock
+                    )
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        latencies.append(elapsed)
+                        outcomes[result] += 1
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(u,)) for u in users]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - started
+
+        total = len(jobs)
+        return {
+            "backend": connection.vendor,
+            "threads": options["threads"],
+            "bookings": total,
+            "seats_per_booking": options["seats_per_booking"],
+            "overlap": options["overlap"],
+            "duration_s": round(duration, 4),
+            "throughput_per_s": round(total / duration, 2) if duration else 0.0,
+            "latency_ms": latency_summary(latencies),
+            "succeeded": outcomes["succeeded"],
+            "conflicts": outcomes["conflicts"],
+            "conflict_rate": round(outcomes["conflicts"] / total, 4) if total else 0.0,
+            "failed": outcomes["failed"],
+            "retries": outcomes["retries"],
+            "deadlocks": outcomes["deadlocks"],
+            "serialization_failures": outcomes["serialization_failures"],
+            "lock_errors": outcomes["lock_errors"],
+            "errors": outcomes["errors"],
+        }
+
+    def _book(self, user, performance, seats, options, outcomes, lock):
+        for attempt in range(options["retries"] + 1):
+            try:
+                create_reservation(user=user, performance=performance, seats=seats)
+                return "succeeded"
+            except SeatsTakenError:
+                return "conflicts"
+            except OperationalError as exc:
+                kind = classify_operational_error(exc)
+                with lock:
+                    outcomes[kind] += 1
+                    if attempt < options["retries"]:
+                        outcomes["retries"] += 1
+                time.sleep(0.005 * 2**attempt)
+            except Exception:
+                with lock:
+                    outcomes["errors"] += 1
+                return "failed"
+        return "failed"
+
+    def _cleanup(self, performance, users):
+        hall, play = performance.theatre_hall, performance.play
+        Reservation.objects.filter(user__in=users).delete()
+        performance.delete()
+        hall.delete()
+        play.delete()
+        get_user_model().objects.filter(pk__in=[u.pk for u in users]).delete()
@@ -0,0 +1,135 @@
+import io
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from theatre import renderers
+from theatre.models import Play, TheatreHall, Performance, Reservation, Ticket
+from theatre.views import PerformanceViewSet
+
+from ._bench import latency_summary, write_report
+
+
+def _timed(fn, arg, repeat):
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(arg)
+        latencies.append(time.perf_counter() - started)
+    total = sum(latencies)
+    return result, {
+        "ops_per_s": round(repeat / total, 2) if total else 0.0,
+        "latency_ms": latency_summary(latencies),
+    }
+
+
+def _compare(baseline, fast):
+    return round(fast["ops_per_s"] / (baseline["ops_per_s"] or 1), 2)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF's JSONRenderer/JSONParser with the fast pair on the "
+        "performance detail of a sold-half full hall and print JSON stats"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=40)
+        parser.add_argument("--seats-in-row", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=200)
+        parser.add_argument("--output", help="Also write the JSON report here.")
+
+    def handle(self, *args, **options):
+        if min(options["rows"], options["seats_in_row"], options["repeat"]) < 1:
+            raise CommandError("--rows, --seats-in-row and --repeat must be positive.")
+        tag = uuid.uuid4().hex[:8]
+        performance = self._seed(tag, options["rows"], options["seats_in_row"])
+        try:
+            payloads = {
+                seat_map: self._payload(performance, seat_map)
+                for seat_map in ("full", "compact")
+            }
+        finally:
+            self._cleanup(tag)
+        report = {
+            "backend": renderers.backend(),
+            "seats": options["rows"] * options["seats_in_row"],
+            "repeat": options["repeat"],
+            "payloads": {
+                name: self._bench(data, options["repeat"])
+                for name, data in payloads.items()
+            },
+        }
+        write_report(self, report, options["output"])
+
+    def _bench(self, data, repeat):
+        drf, fast = JSONRenderer(), renderers.FastJSONRenderer()
+        body, render_drf = _timed(drf.render, data, repeat)
+        fast_body, render_fast = _timed(fast.render, data, repeat)
+
+        def parse(parser):
+            return lambda raw: parser.parse(io.BytesIO(raw))
+
+        parsed, parse_drf = _timed(parse(JSONParser()), body, repeat)
+        fast_parsed, parse_fast = _timed(
+            parse(renderers.FastJSONParser()), body, repeat
+        )
+        return {
+            "bytes": len(body),
+            "render": {
+                "drf": render_drf,
+                "fast": render_fast,
+                "speedup": _compare(render_drf, render_fast),
+                "identical": fast_body == body,
+            },
+            "parse": {
+                "drf": parse_drf,
+                "fast": parse_fast,
+                "speedup": _compare(parse_drf, parse_fast),
+                "identical": fast_parsed == parsed,
+            },
+        }
+
+    def _payload(self, performance, seat_map):
+        view = PerformanceViewSet.as_view({"get": "retrieve"})
+        request = APIRequestFactory().get("/", {"seat_map": seat_map})
+        response = view(request, pk=performance.pk)
+        if response.status_code != 200:
+            raise CommandError(f"Performance detail returned {response.status_code}.")
+        return response.data
+
+    def _seed(self, tag, rows, seats_in_row):
+        hall = TheatreHall.objects.create(
+            name=f"bench-{tag}", rows=rows, seats_in_row=seats_in_row
+        )
+        play = Play.objects.create(title=f"bench-{tag}", description="A play.")
+        performance = Performance.objects.create(
+            play=play,
+            theatre_hall=hall,
+            show_time=timezone.now() + timedelta(days=3650),
+            seats_free=hall.capacity,
+        )
+        user = get_user_model().objects.create_user(email=f"bench-{tag}@example.com")
+        reservation = Reservation.objects.create(user=user)
+        # Every other seat sold, so the map is neither empty nor uniform
+        Ticket.objects.bulk_create(
+            Ticket(performance=performance, reservation=reservation, row=r, seat=s)
+            for r in range(1, rows + 1)
+            for s in range(1 + r % 2, seats_in_row + 1, 2)
+        )
+        return performance
+
+    def _cleanup(self, tag):
+        user = get_user_model().objects.get(email=f"bench-{tag}@example.com")
+        Reservation.objects.filter(user=user).delete()
+        Performance.objects.filter(play__title=f"bench-{tag}").delete()
+        Play.objects.filter(title=f"bench-{tag}").delete()
+        TheatreHall.objects.filter(name=f"bench-{tag}").delete()
+        user.delete()
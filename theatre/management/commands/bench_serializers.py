@@ -0,0 +1,159 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from theatre.models import (
+    Actor,
+    Genre,
+    Play,
+    TheatreHall,
+    Performance,
+    Reservation,
+    Ticket,
+)
+from theatre.pagination import PerformancePagination, TicketPagination
+from theatre.views import PerformanceViewSet, TicketViewSet
+
+from ._bench import latency_summary, write_report
+
+
+def _allowing(pagination_class, limit):
+    # The endpoints cap page_size at 100; the benchmark goes beyond
+    return type(
+        f"Bench{pagination_class.__name__}",
+        (pagination_class,),
+        {"max_page_size": limit},
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests/sec of the regular and THEATRE_FAST_LISTS list paths "
+        "for performances and tickets and print JSON stats"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-sizes", type=int, nargs="+", default=[20, 100, 500])
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument("--output", help="Also write the JSON report here.")
+        parser.add_argument(
+            "--keep", action="store_true", help="Keep the seeded data afterwards."
+        )
+
+    def handle(self, *args, **options):
+        sizes = options["page_sizes"]
+        if min(sizes) < 1 or options["requests"] < 1:
+            raise CommandError("Page sizes and --requests must be positive.")
+        rows = max(sizes)
+        tag = uuid.uuid4().hex[:8]
+        user = self._seed(tag, rows)
+        try:
+            report = {
+                "backend": connection.vendor,
+                "requests": options["requests"],
+                "endpoints": {
+                    name: self._bench(view, user, sizes, options["requests"])
+                    for name, view in self._views(rows).items()
+                },
+            }
+        finally:
+            if not options["keep"]:
+                self._cleanup(tag, user)
+        write_report(self, report, options["output"])
+
+    def _views(self, rows):
+        return {
+            "performances": PerformanceViewSet.as_view(
+                {"get": "list"},
+                pagination_class=_allowing(PerformancePagination, rows),
+            ),
+            "tickets": TicketViewSet.as_view(
+                {"get": "list"}, pagination_class=_allowing(TicketPagination, rows)
+            ),
+        }
+
+    def _bench(self, view, user, sizes, requests):
+        factory = APIRequestFactory()
+        results = {}
+        for size in sizes:
+            runs = {}
+            bodies = {}
+            for mode, fast in (("regular", False), ("fast", True)):
+                with override_settings(THEATRE_FAST_LISTS=fast):
+                    latencies = []
+                    for _ in range(requests):
+                        request = factory.get("/", {"page_size": size})
+                        force_authenticate(request, user=user)
+                        started = time.perf_counter()
+                        response = view(request)
+                        response.render()
+                        latencies.append(time.perf_counter() - started)
+                    bodies[mode] = response.content
+                total = sum(latencies)
+                runs[mode] = {
+                    "requests_per_s": round(requests / total, 2) if total else 0.0,
+                    "latency_ms": latency_summary(latencies),
+                }
+            results[str(size)] = {
+                **runs,
+                "speedup": round(
+                    runs["fast"]["requests_per_s"]
+                    / (runs["regular"]["requests_per_s"] or 1),
+                    2,
+                ),
+                "identical": bodies["fast"] == bodies["regular"],
+            }
+        return results
+
+    def _seed(self, tag, rows):
+        actors = Actor.objects.bulk_create(
+            Actor(first_name=f"bench-{tag}", last_name=str(i)) for i in range(40)
+        )
+        genres = Genre.objects.bulk_create(
+            Genre(name=f"bench-{tag}-{i}") for i in range(8)
+        )
+        halls = TheatreHall.objects.bulk_create(
+            TheatreHall(name=f"bench-{tag}-{i}", rows=20, seats_in_row=30)
+            for i in range(5)
+        )
+        plays = Play.objects.bulk_create(
+            Play(title=f"bench-{tag}-{i}", description="A play. " * 20)
+            for i in range(50)
+        )
+        for i, play in enumerate(plays):
+            play.actors.add(*actors[i % 35 : i % 35 + 5])
+            play.genres.add(*genres[i % 7 : i % 7 + 2])
+
+        start = timezone.now() + timedelta(days=3650)
+        performances = Performance.objects.bulk_create(
+            Performance(
+                play=plays[i % len(plays)],
+                theatre_hall=halls[i % len(halls)],
+                show_time=start + timedelta(hours=i),
+                seats_free=halls[i % len(halls)].capacity,
+            )
+            for i in range(rows)
+        )
+        user = get_user_model().objects.create_user(email=f"bench-{tag}@example.com")
+        reservation = Reservation.objects.create(user=user)
+        Ticket.objects.bulk_create(
+            Ticket(performance=performance, reservation=reservation, row=1, seat=1)
+            for performance in performances
+        )
+        return user
+
+    def _cleanup(self, tag, user):
+        Reservation.objects.filter(user=user).delete()
+        Performance.objects.filter(play__title__startswith=f"bench-{tag}").delete()
+        Play.objects.filter(title__startswith=f"bench-{tag}").delete()
+        TheatreHall.objects.filter(name__startswith=f"bench-{tag}").delete()
+        Genre.objects.filter(name__startswith=f"bench-{tag}").delete()
+        Actor.objects.filter(first_name=f"bench-{tag}").delete()
+        user.delete()
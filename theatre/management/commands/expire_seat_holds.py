@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from theatre.services.holds import expire_holds
+
+
+class Command(BaseCommand):
+    help = "Reclaim expired seat holds in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep sweeping until interrupted.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to sleep between sweeps in --loop mode.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            reclaimed = expire_holds(batch_size=options["batch_size"])
+            if reclaimed:
+                self.stdout.write(f"Reclaimed {reclaimed} expired hold(s)")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS("Seat hold sweep finished"))
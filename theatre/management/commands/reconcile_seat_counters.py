@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from theatre.services.availability import find_counter_drift, reconcile_seat_counters
+from theatre.services.inventory import (
+    find_inventory_drift,
+    inventory_enabled,
+    reconcile_inventory,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Repair drift in Performance.seats_taken / seats_free counters and, "
+        "with the materialized inventory, in PerformanceSeat.is_taken"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--performance",
+            type=int,
+            action="append",
+            dest="performances",
+            help="Only check this performance id (repeatable).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drifted performances without fixing them.",
+        )
+
+    def handle(self, *args, **options):
+        drifted = find_counter_drift(options["performances"])
+        stale = (
+            find_inventory_drift(options["performances"]) if inventory_enabled() else []
+        )
+        if not drifted and not stale:
+            self.stdout.write(self.style.SUCCESS("Seat counters are consistent"))
+            return
+        if options["dry_run"]:
+            self.stdout.write(f"Drifted performances: {drifted}")
+            if stale:
+                self.stdout.write(f"Drifted inventory: {stale}")
+            return
+        reconcile_seat_counters(drifted)
+        reconcile_inventory(stale)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Reconciled {len(drifted)} performance(s) "
+                f"and the inventory of {len(stale)}"
+            )
+        )
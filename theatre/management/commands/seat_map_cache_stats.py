@@ -0,0 +1,21 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from theatre.services.seats import seat_map_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Print the seat map cache hit/miss counters of all workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Zero the counters after printing them.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(json.dumps(seat_map_cache_stats.snapshot()))
+        if options["reset"]:
+            seat_map_cache_stats.reset()
@@ -0,0 +1,43 @@
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger("theatre.queries")
+
+
+class DuplicateQueryMiddleware:
+    """Development aid: flag SQL that runs repeatedly within one request.
+
+    Enabled with THEATRE_DETECT_DUPLICATE_QUERIES. Statements are compared
+    without their parameters, so an N+1 loop shows up as one statement
+    repeated N times. Offenders are logged to "theatre.queries" and counted
+    in the X-Duplicate-Queries response header.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "THEATRE_DETECT_DUPLICATE_QUERIES", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = getattr(settings, "THEATRE_DUPLICATE_QUERY_THRESHOLD", 3)
+
+    def __call__(self, request):
+        statements = Counter()
+
+        def record(execute, sql, params, many, context):
+            statements[sql] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            response = self.get_response(request)
+
+        repeated = {sql: n for sql, n in statements.items() if n >= self.threshold}
+        if repeated:
+            for sql, n in sorted(repeated.items(), key=lambda item: -item[1]):
+                logger.warning(
+                    "%s %s ran %d times: %s", request.method, request.path, n, sql
+                )
+            response["X-Duplicate-Queries"] = str(sum(repeated.values()))
+        return response
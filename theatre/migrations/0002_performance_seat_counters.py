@@ -0,0 +1,60 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:03
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_seat_counters(apps, schema_editor):
+    Performance = apps.get_model("theatre", "Performance")
+    Ticket = apps.get_model("theatre", "Ticket")
+    TheatreHall = apps.get_model("theatre", "TheatreHall")
+    taken = (
+        Ticket.objects.filter(performance_id=OuterRef("pk"))
+        .order_by()
+        .values("performance_id")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    capacity = (
+        TheatreHall.objects.filter(pk=OuterRef("theatre_hall_id"))
+        .annotate(capacity=F("rows") * F("seats_in_row"))
+        .values("capacity")
+    )
+    Performance.objects.update(seats_taken=Coalesce(Subquery(taken), 0))
+    Performance.objects.update(seats_free=Subquery(capacity) - F("seats_taken"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="performance",
+            name="seats_free",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="performance",
+            name="seats_taken",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_seat_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="performance",
+            index=models.Index(
+                condition=models.Q(("seats_free__gt", 0)),
+                fields=["show_time"],
+                name="performance_available_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="performance",
+            index=models.Index(
+                fields=["show_time", "seats_free"], name="performance_free_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0004_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="performance",
+            name="on_sale",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0005_performance_on_sale"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PerformanceSeat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("row", models.PositiveIntegerField()),
+                ("seat", models.PositiveIntegerField()),
+                ("is_taken", models.BooleanField(default=False)),
+                (
+                    "performance",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="inventory",
+                        to="theatre.performance",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("performance", "row", "seat"),
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("is_taken", False)),
+                        fields=["performance", "row", "seat"],
+                        name="inventory_free_seat_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("performance", "row", "seat"),
+                        name="unique_inventory_seat",
+                    )
+                ],
+            },
+        ),
+    ]
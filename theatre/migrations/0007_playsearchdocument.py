@@ -0,0 +1,111 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+DOCUMENT_TABLE = "theatre_playsearchdocument"
+FTS_TABLE = "theatre_playsearch_fts"
+
+POSTGRES_FORWARD = [
+    f"""
+    ALTER TABLE {DOCUMENT_TABLE} ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', title), 'A')
+        || setweight(to_tsvector('simple', body), 'B')
+    ) STORED
+    """,
+    f"CREATE INDEX playsearch_vector_gin ON {DOCUMENT_TABLE} USING GIN (search_vector)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS playsearch_vector_gin",
+    f"ALTER TABLE {DOCUMENT_TABLE} DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, body, content='{DOCUMENT_TABLE}', content_rowid='play_id'
+    )
+    """,
+    f"""
+    CREATE TRIGGER playsearch_ai AFTER INSERT ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, body)
+        VALUES (new.play_id, new.title, new.body);
+    END
+    """,
+    f"""
+    CREATE TRIGGER playsearch_ad AFTER DELETE ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body)
+        VALUES ('delete', old.play_id, old.title, old.body);
+    END
+    """,
+    f"""
+    CREATE TRIGGER playsearch_au AFTER UPDATE ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body)
+        VALUES ('delete', old.play_id, old.title, old.body);
+        INSERT INTO {FTS_TABLE}(rowid, title, body)
+        VALUES (new.play_id, new.title, new.body);
+    END
+    """,
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS playsearch_au",
+    "DROP TRIGGER IF EXISTS playsearch_ad",
+    "DROP TRIGGER IF EXISTS playsearch_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def _run(schema_editor, statements):
+    for sql in statements.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    _run(schema_editor, {"postgresql": POSTGRES_FORWARD, "sqlite": SQLITE_FORWARD})
+
+    Play = apps.get_model("theatre", "Play")
+    PlaySearchDocument = apps.get_model("theatre", "PlaySearchDocument")
+    PlaySearchDocument.objects.bulk_create(
+        PlaySearchDocument(
+            play=play,
+            title=play.title,
+            body=" ".join(
+                [f"{a.first_name} {a.last_name}" for a in play.actors.all()]
+                + [g.name for g in play.genres.all()]
+            ),
+        )
+        for play in Play.objects.prefetch_related("actors", "genres")
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    _run(schema_editor, {"postgresql": POSTGRES_BACKWARD, "sqlite": SQLITE_BACKWARD})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0006_performanceseat"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlaySearchDocument",
+            fields=[
+                (
+                    "play",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_document",
+                        serialize=False,
+                        to="theatre.play",
+                    ),
+                ),
+                ("title", models.TextField()),
+                ("body", models.TextField(blank=True)),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:31
+
+from django.db import DatabaseError, migrations, transaction
+
+# Expression indexes matching what Django emits for iexact / istartswith
+# (UPPER(col::text) LIKE ...) and icontains on PostgreSQL, and NOCASE
+# indexes that let SQLite's LIKE prefix optimisation kick in.
+LOOKUP_COLUMNS = (("theatre_play", "title"), ("theatre_theatrehall", "name"))
+
+POSTGRES_FORWARD = [
+    f"CREATE INDEX {table}_{column}_upper_prefix "
+    f"ON {table} (UPPER({column}::text) text_pattern_ops)"
+    for table, column in LOOKUP_COLUMNS
+]
+# Only where pg_trgm is installed or the migrating role may install it
+POSTGRES_TRIGRAM = [
+    f"CREATE INDEX {table}_{column}_upper_trgm "
+    f"ON {table} USING GIN (UPPER({column}::text) gin_trgm_ops)"
+    for table, column in LOOKUP_COLUMNS
+]
+POSTGRES_BACKWARD = [
+    f"DROP INDEX IF EXISTS {table}_{column}_{suffix}"
+    for table, column in LOOKUP_COLUMNS
+    for suffix in ("upper_prefix", "upper_trgm")
+]
+
+SQLITE_FORWARD = [
+    f"CREATE INDEX {table}_{column}_nocase ON {table} ({column} COLLATE NOCASE)"
+    for table, column in LOOKUP_COLUMNS
+]
+SQLITE_BACKWARD = [
+    f"DROP INDEX IF EXISTS {table}_{column}_nocase" for table, column in LOOKUP_COLUMNS
+]
+
+
+def _run(schema_editor, statements):
+    for sql in statements.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql)
+
+
+def _has_trigram(schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        if cursor.fetchone():
+            return True
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if not cursor.fetchone():
+            return False
+    try:
+        # A savepoint, so a role without CREATE on the database carries on
+        with transaction.atomic(using=connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except DatabaseError:
+        return False
+    return True
+
+
+def create_lookup_indexes(apps, schema_editor):
+    postgres = POSTGRES_FORWARD
+    if schema_editor.connection.vendor == "postgresql" and _has_trigram(schema_editor):
+        postgres = POSTGRES_FORWARD + POSTGRES_TRIGRAM
+    _run(schema_editor, {"postgresql": postgres, "sqlite": SQLITE_FORWARD})
+
+
+def drop_lookup_indexes(apps, schema_editor):
+    _run(schema_editor, {"postgresql": POSTGRES_BACKWARD, "sqlite": SQLITE_BACKWARD})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0007_playsearchdocument"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_lookup_indexes, drop_lookup_indexes),
+    ]
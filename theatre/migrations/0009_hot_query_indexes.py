@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0008_lookup_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="ticket",
+            options={"ordering": ("performance_id", "row", "seat")},
+        ),
+        migrations.RemoveIndex(
+            model_name="performance",
+            name="theatre_per_show_ti_6fef99_idx",
+        ),
+        migrations.AddIndex(
+            model_name="performance",
+            index=models.Index(
+                fields=["show_time", "id"], name="performance_show_time_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(fields=["user", "-id"], name="reservation_user_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(fields=["-created_at"], name="reservation_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["reservation", "performance", "row", "seat"],
+                name="ticket_reservation_seat_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0010_idempotencykey_pending"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="performance",
+            index=models.Index(
+                fields=["play", "show_time", "id"], name="performance_play_time_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0011_performance_play_time_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="performance",
+            index=models.Index(
+                fields=["theatre_hall", "show_time", "id"],
+                name="performance_hall_time_idx",
+            ),
+        ),
+    ]
@@ -37,6 +37,27 @@ class Play(models.Model):
         return self.title
 
 
+class PlaySearchDocument(models.Model):
+    """Denormalized text of a play, indexed by the database's full-text engine.
+
+    The index itself lives outside the ORM: a generated tsvector column with
+    a GIN index on PostgreSQL, an FTS5 table kept in step by triggers on
+    SQLite (see migration 0007).
+    """
+
+    play = models.OneToOneField(
+        Play,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_document",
+    )
+    title = models.TextField()
+    body = models.TextField(blank=True)
+
+    def __str__(self) -> str:
+        return self.title
+
+
 class TheatreHall(models.Model):
     name = models.CharField(max_length=64, unique=True)
     rows = models.PositiveIntegerField(validators=[MinValueValidator(1)])
@@ -61,10 +82,36 @@ class Performance(models.Model):
         TheatreHall, on_delete=models.PROTECT, related_name="performances"
     )
     show_time = models.DateTimeField()
+    # Bookings for on-sale shows go through the admission queue
+    on_sale = models.BooleanField(default=False)
+    # Maintained by theatre.services.availability, never by save()
+    seats_taken = models.IntegerField(default=0, editable=False)
+    seats_free = models.IntegerField(default=0, editable=False)
+
+    COUNTER_FIELDS = ("seats_taken", "seats_free")
 
     class Meta:
         ordering = ("show_time",)
-        indexes = [models.Index(fields=["show_time"])]
+        indexes = [
+            # Also the cursor pagination order
+            models.Index(fields=["show_time", "id"], name="performance_show_time_idx"),
+            models.Index(
+                fields=["show_time"],
+                condition=models.Q(seats_free__gt=0),
+                name="performance_available_idx",
+            ),
+            models.Index(
+                fields=["show_time", "seats_free"], name="performance_free_idx"
+            ),
+            # A play's / a hall's shows, already in cursor order
+            models.Index(
+                fields=["play", "show_time", "id"], name="performance_play_time_idx"
+            ),
+            models.Index(
+                fields=["theatre_hall", "show_time", "id"],
+                name="performance_hall_time_idx",
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=["theatre_hall", "show_time"], name="unique_hall_timeslot"
@@ -74,6 +121,18 @@ class Performance(models.Model):
     def __str__(self) -> str:
         return f"{self.play.title} @ {self.theatre_hall.name} {self.show_time:%Y-%m-%d %H:%M}"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.seats_free = self.theatre_hall.capacity - self.seats_taken
+        elif kwargs.get("update_fields") is None:
+            # A stale instance must not overwrite counters updated by bookings
+            kwargs["update_fields"] = [
+                f.name
+                for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
 
 class Reservation(models.Model):
     user = models.ForeignKey(
@@ -83,6 +142,10 @@ class Reservation(models.Model):
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["user", "-id"], name="reservation_user_id_idx"),
+            models.Index(fields=["-created_at"], name="reservation_created_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"Reservation #{self.pk} by {self.user}"
@@ -99,7 +162,16 @@ class Ticket(models.Model):
     seat = models.PositiveIntegerField()
 
     class Meta:
-        ordering = ("performance", "row", "seat")
+        # By column, not through Performance.Meta.ordering, so the unique
+        # constraint's index serves it without a join
+        ordering = ("performance_id", "row", "seat")
+        indexes = [
+            # A reservation's tickets in seat order
+            models.Index(
+                fields=["reservation", "performance", "row", "seat"],
+                name="ticket_reservation_seat_idx",
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=["performance", "row", "seat"],
@@ -113,3 +185,89 @@ class Ticket(models.Model):
 
     def __str__(self) -> str:
         return f"{self.performance} — r{self.row}s{self.seat}"
+
+
+class PerformanceSeat(models.Model):
+    """One row per seat of a performance when the inventory is materialized."""
+
+    performance = models.ForeignKey(
+        Performance, on_delete=models.CASCADE, related_name="inventory"
+    )
+    row = models.PositiveIntegerField()
+    seat = models.PositiveIntegerField()
+    is_taken = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ("performance", "row", "seat")
+        indexes = [
+            models.Index(
+                fields=["performance", "row", "seat"],
+                condition=models.Q(is_taken=False),
+                name="inventory_free_seat_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["performance", "row", "seat"], name="unique_inventory_seat"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.performance} — r{self.row}s{self.seat}"
+
+
+class SeatHold(models.Model):
+    performance = models.ForeignKey(
+        Performance, on_delete=models.CASCADE, related_name="holds"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="seat_holds"
+    )
+    token = models.UUIDField(db_index=True)
+    row = models.PositiveIntegerField()
+    seat = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ("performance", "row", "seat")
+        indexes = [models.Index(fields=["expires_at"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["performance", "row", "seat"], name="unique_hold_per_seat"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Hold {self.token} — r{self.row}s{self.seat}"
+
+
+class IdempotencyKey(models.Model):
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+    )
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    reservation = models.ForeignKey(
+        Reservation, on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+    # Both empty while the first request is still in flight
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"], name="unique_idempotency_key_per_user"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.key} by {self.user}"
+
+    @property
+    def pending(self) -> bool:
+        return self.status_code is None
@@ -0,0 +1,59 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class LegacyPagePagination(PageNumberPagination):
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination, so deep pages do not scan the rows before them.
+
+    The cursor holds the value of the first ``ordering`` field plus an offset
+    among the rows that share it; later fields only break ties in the sort.
+    Rows with equal first keys are therefore still skipped by OFFSET, which
+    stays cheap while such ties are small (e.g. shows starting together).
+
+    Requests that pass ``?page=`` (or a custom ``?ordering=``, which a cursor
+    cannot follow) keep the old page-number responses.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    legacy_class = LegacyPagePagination
+    legacy_params = ("page", "ordering")
+
+    def __init__(self):
+        self.legacy = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if any(param in request.query_params for param in self.legacy_params):
+            self.legacy = self.legacy_class()
+            return self.legacy.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        # The cursor key is fixed per endpoint; ?ordering= goes the legacy way
+        return self.ordering
+
+    def get_paginated_response(self, data):
+        if self.legacy is not None:
+            return self.legacy.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        page = self.legacy_class().get_schema_operation_parameters(view)[0]
+        return super().get_schema_operation_parameters(view) + [page]
+
+
+class PerformancePagination(KeysetPagination):
+    # The cursor is keyed on show_time; id keeps tied shows in a fixed order
+    ordering = ("show_time", "id")
+
+
+class ReservationPagination(KeysetPagination):
+    ordering = ("-id",)
+
+
+class TicketPagination(KeysetPagination):
+    ordering = ("id",)
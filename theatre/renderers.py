@@ -0,0 +1,92 @@
+"""JSON renderer and parser backed by orjson when it is installed.
+
+Output is byte-identical to DRF's ``JSONRenderer``: types orjson would
+format differently (datetimes, decimals, lazy strings, ...) go through DRF's
+own encoder, and anything orjson refuses, or floats it writes in exponent
+form (``1e16`` where ``json.dumps`` writes ``1e+16``), falls back to the
+stdlib path. The one difference: NaN and infinities come out as ``null``
+rather than raising.
+Without orjson both classes behave exactly like DRF's.
+"""
+
+import re
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised by monkeypatching
+    orjson = None
+
+# orjson writes datetimes with microseconds and "+00:00"; DRF truncates to
+# milliseconds and uses "Z", so they are handed to the default hook instead
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+)
+
+# A number in orjson's exponent notation; a match inside a string only costs
+# the slower path
+EXPONENT_FLOAT = re.compile(rb"[:,\[]-?[0-9]+(?:\.[0-9]+)?e-?[0-9]")
+
+
+def backend() -> str:
+    return "orjson" if orjson is not None else "stdlib"
+
+
+class FastJSONRenderer(JSONRenderer):
+    _encoder = JSONEncoder()
+
+    def _orjson_ready(self, indent) -> bool:
+        # orjson only writes compact, UTF-8, strict output
+        return (
+            orjson is not None
+            and indent is None
+            and self.compact
+            and self.strict
+            and not self.ensure_ascii
+            and self.encoder_class is JSONEncoder
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if not self._orjson_ready(indent):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=self._encoder.default, option=ORJSON_OPTIONS
+            )
+        except orjson.JSONEncodeError:
+            # Integers over 64 bits, circular data, ...; let json.dumps decide
+            return super().render(data, accepted_media_type, renderer_context)
+        if EXPONENT_FLOAT.search(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            # Same strict-JavaScript escaping as JSONRenderer
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        # orjson rejects NaN and Infinity, so it only stands in for strict mode
+        if orjson is None or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        body = stream.read()
+        try:
+            if encoding.lower().replace("_", "-") not in ("utf-8", "utf8"):
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        except ValueError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
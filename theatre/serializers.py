@@ -1,29 +1,209 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from .exceptions import booking_errors
 from .models import Actor, Genre, Play, TheatreHall, Performance, Reservation, Ticket
-from .services.seats import build_seat_map
-from .services.booking import create_reservation
+from .services.seats import (
+    SEAT_MAP_COMPACT,
+    SEAT_MAP_FULL,
+    SEAT_MAP_NONE,
+    build_seat_map,
+    get_seat_map,
+)
+from .services.booking import create_bundle_reservation, create_reservation
+from .services.manifest import MANIFEST_CSV, MANIFEST_NDJSON
 
 
 User = get_user_model()
 
+# A relation picked by ?expand= (or left alone when ?fields= is absent)
+# renders in full; one only named in ?fields= renders as its id
+FULL = "*"
+
+
+def _paths(value: str) -> list:
+    return [
+        tuple(name.strip() for name in path.split("."))
+        for path in value.split(",")
+        if path.strip()
+    ]
+
+
+def parse_field_selection(fields: str, expand: str = "") -> dict:
+    """``"id,play.title"`` -> ``{"id": None, "play": {"title": None}}``."""
+    selection = {}
+    for *parents, leaf in _paths(fields):
+        node = selection
+        for name in parents:
+            if node.get(name) is FULL:
+                break
+            if not isinstance(node.get(name), dict):
+                node[name] = {}
+            node = node[name]
+        else:
+            node.setdefault(leaf, None)
+    for path in _paths(expand):
+        node = selection
+        for name in path:
+            if not isinstance(node.get(name), dict):
+                node[name] = FULL
+                break
+            node = node[name]
+    return selection
+
+
+def field_selection(request):
+    """The request's ?fields= / ?expand= selection, or None for every field."""
+    if request is None or "fields" not in request.query_params:
+        return None
+    return parse_field_selection(
+        request.query_params["fields"], request.query_params.get("expand", "")
+    )
+
 
-class ActorSerializer(serializers.ModelSerializer):
+def selects(selection, *path, expanded: bool = False) -> bool:
+    """Whether ``path`` is rendered; with ``expanded``, as a nested object."""
+    node = FULL if selection is None else selection
+    for name in path:
+        if node is FULL:
+            return True
+        if node is None or name not in node:
+            return False
+        node = node[name]
+    return node is not None or not expanded
+
+
+class SparseFieldsMixin:
+    # (Comments, not docstrings, on these mixins: component schemas inherit them)
+    # Render only the fields picked by ?fields= (dotted for nested ones).
+    # Unpicked fields are dropped before serialization, so their attributes
+    # are never read; views use selects() to skip their joins too.
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selection = self._field_selection()
+        if selection is None:
+            return fields
+        for name, field in list(fields.items()):
+            if field.write_only:
+                continue
+            if name not in selection:
+                del fields[name]
+                continue
+            many = isinstance(field, serializers.ListSerializer)
+            nested = field.child if many else field
+            if not isinstance(nested, serializers.BaseSerializer):
+                continue
+            if selection[name] is None:
+                fields[name] = serializers.PrimaryKeyRelatedField(
+                    source=field.source, many=many, read_only=True
+                )
+            else:
+                nested.field_selection = (
+                    None if selection[name] is FULL else selection[name]
+                )
+        return fields
+
+    def _field_selection(self):
+        if hasattr(self, "field_selection"):
+            return self.field_selection
+        root = self.parent
+        if isinstance(root, serializers.ListSerializer):
+            root = root.parent
+        if root is not None:
+            return None
+        return field_selection(self.context.get("request"))
+
+
+class DimensionField(serializers.Field):
+    """A nested actor, genre or hall looked up in ``context["dimensions"]``.
+
+    To-many relations read their ids from ``context["dimension_members"]``,
+    so neither the related rows nor a join are ever fetched.
+    """
+
+    def __init__(self, dimension, *, many=False, pk_only=False, subset=None, **kw):
+        kw["read_only"] = True
+        super().__init__(**kw)
+        self.dimension = dimension
+        self.many = many
+        self.pk_only = pk_only
+        self.subset = subset
+
+    def get_attribute(self, instance):
+        if self.many:
+            return self.context["dimension_members"][self.source].get(instance.pk, [])
+        return getattr(instance, instance._meta.get_field(self.source).attname)
+
+    def to_representation(self, value):
+        if self.many:
+            return [self._row(pk) for pk in value]
+        return self._row(value)
+
+    def _row(self, pk):
+        if self.pk_only:
+            return pk
+        row = self.context["dimensions"].get(self.dimension, pk)
+        if self.subset is None:
+            return row
+        return {name: value for name, value in row.items() if name in self.subset}
+
+
+class DimensionFieldsMixin:
+    # Render nested actors, genres and halls from the dimension tables when
+    # the view put them in the context; otherwise nested serializers run.
+
+    dimension_fields = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        tables = self.context.get("dimensions")
+        if tables is None:
+            return fields
+        members = self.context.get("dimension_members", {})
+        for name, dimension in self.dimension_fields.items():
+            field = fields.get(name)
+            if isinstance(field, serializers.ManyRelatedField) and name in members:
+                fields[name] = DimensionField(
+                    dimension, many=True, pk_only=True, source=field.source
+                )
+            elif dimension not in tables:
+                continue
+            elif isinstance(field, serializers.ListSerializer) and name in members:
+                fields[name] = DimensionField(
+                    dimension,
+                    many=True,
+                    subset=getattr(field.child, "field_selection", None),
+                    source=field.source,
+                )
+            elif isinstance(field, serializers.Serializer):
+                fields[name] = DimensionField(
+                    dimension,
+                    subset=getattr(field, "field_selection", None),
+                    source=field.source,
+                )
+        return fields
+
+
+class ActorSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Actor
         fields = ("id", "first_name", "last_name")
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Genre
         fields = ("id", "name")
 
 
-class PlaySerializer(serializers.ModelSerializer):
+class PlaySerializer(
+    DimensionFieldsMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
     actors = ActorSerializer(many=True, read_only=True)
     genres = GenreSerializer(many=True, read_only=True)
 
+    dimension_fields = {"actors": "actor", "genres": "genre"}
+
     class Meta:
         model = Play
         fields = ("id", "title", "description", "actors", "genres")
@@ -64,7 +244,7 @@ class PlayWriteSerializer(serializers.ModelSerializer):
         return instance
 
 
-class TheatreHallSerializer(serializers.ModelSerializer):
+class TheatreHallSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     capacity = serializers.IntegerField(read_only=True)
 
     class Meta:
@@ -72,7 +252,9 @@ class TheatreHallSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "rows", "seats_in_row", "capacity")
 
 
-class PerformanceSerializer(serializers.ModelSerializer):
+class PerformanceSerializer(
+    DimensionFieldsMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
     play = PlaySerializer(read_only=True)
     theatre_hall = TheatreHallSerializer(read_only=True)
     play_id = serializers.PrimaryKeyRelatedField(
@@ -83,6 +265,8 @@ class PerformanceSerializer(serializers.ModelSerializer):
     )
     seat_map = serializers.SerializerMethodField()
 
+    dimension_fields = {"theatre_hall": "theatrehall"}
+
     class Meta:
         model = Performance
         fields = (
@@ -90,23 +274,51 @@ class PerformanceSerializer(serializers.ModelSerializer):
             "play",
             "theatre_hall",
             "show_time",
+            "on_sale",
             "play_id",
             "theatre_hall_id",
+            "seats_taken",
+            "seats_free",
             "seat_map",
         )
+        read_only_fields = ("seats_taken", "seats_free")
+
+    def _seat_map_format(self) -> str:
+        default = self.context.get("seat_map_default", SEAT_MAP_FULL)
+        request = self.context.get("request")
+        if request is None:
+            return default
+        return request.query_params.get("seat_map", default)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self._seat_map_format() == SEAT_MAP_NONE:
+            fields.pop("seat_map", None)
+        return fields
+
+    def _seat_map(self, obj):
+        # List views batch-load the page's seat maps into the context
+        seat_map = self.context.get("seat_maps", {}).get(obj.pk)
+        if seat_map is None:
+            seat_map = get_seat_map(obj)
+        return seat_map
 
     def get_seat_map(self, obj):
+        if self._seat_map_format() == SEAT_MAP_COMPACT:
+            return self._seat_map(obj).to_compact()
+        if "seat_maps" in self.context:
+            return self._seat_map(obj).to_grid()
         return build_seat_map(obj)
 
 
-class TicketSerializer(serializers.ModelSerializer):
+class TicketSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Ticket
         fields = ("id", "performance", "row", "seat", "reservation")
         read_only_fields = ("reservation",)
 
 
-class ReservationSerializer(serializers.ModelSerializer):
+class ReservationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     tickets = TicketSerializer(many=True, read_only=True)
 
     class Meta:
@@ -114,27 +326,111 @@ class ReservationSerializer(serializers.ModelSerializer):
         fields = ("id", "created_at", "tickets")
 
 
+class BundleTicketSerializer(serializers.Serializer):
+    performance = serializers.IntegerField()
+    row = serializers.IntegerField()
+    seat = serializers.IntegerField()
+
+
 class ReservationCreateSerializer(serializers.Serializer):
     performance_id = serializers.PrimaryKeyRelatedField(
-        queryset=Performance.objects.all(), source="performance"
+        queryset=Performance.objects.select_related("theatre_hall"),
+        source="performance",
+        required=False,
     )
     seats = serializers.ListField(
-        child=serializers.DictField(child=serializers.IntegerField()), allow_empty=False
+        child=serializers.DictField(child=serializers.IntegerField()),
+        allow_empty=False,
+        required=False,
     )
+    # Bundle form: seats of several performances booked in one transaction
+    tickets = BundleTicketSerializer(many=True, allow_empty=False, required=False)
+
+    def validate(self, attrs):
+        single = "performance" in attrs or "seats" in attrs
+        if single == ("tickets" in attrs):
+            raise serializers.ValidationError(
+                "Pass either performance_id with seats or a tickets list."
+            )
+        if single and not ("performance" in attrs and "seats" in attrs):
+            raise serializers.ValidationError(
+                "performance_id and seats must be passed together."
+            )
+        return attrs
 
     def create(self, validated_data):
         user = self.context["request"].user
-        performance = validated_data["performance"]
-        seats = validated_data["seats"]
-        reservation = create_reservation(
-            user=user, performance=performance, seats=seats
-        )
+        with booking_errors():
+            if "tickets" in validated_data:
+                return create_bundle_reservation(
+                    user=user, tickets=validated_data["tickets"]
+                )
+            reservation = create_reservation(
+                user=user,
+                performance=validated_data["performance"],
+                seats=validated_data["seats"],
+            )
         return reservation
 
     def to_representation(self, instance):
         return ReservationSerializer(instance).data
 
 
+class SeatHoldCreateSerializer(serializers.Serializer):
+    seats = serializers.ListField(
+        child=serializers.DictField(child=serializers.IntegerField()), allow_empty=False
+    )
+
+
+class SeatAllocationSerializer(serializers.Serializer):
+    quantity = serializers.IntegerField(min_value=1)
+    row_from = serializers.IntegerField(min_value=1, default=1)
+    row_to = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, attrs):
+        if attrs.get("row_to", attrs["row_from"]) < attrs["row_from"]:
+            raise serializers.ValidationError("row_to must not be before row_from.")
+        return attrs
+
+
+class TicketManifestParamsSerializer(serializers.Serializer):
+    performance = serializers.IntegerField(min_value=1, required=False)
+    date_from = serializers.DateTimeField(required=False)
+    date_to = serializers.DateTimeField(required=False)
+    output = serializers.ChoiceField(
+        choices=(MANIFEST_CSV, MANIFEST_NDJSON), default=MANIFEST_CSV
+    )
+
+    def validate(self, attrs):
+        has_range = "date_from" in attrs and "date_to" in attrs
+        if "performance" not in attrs and not has_range:
+            raise serializers.ValidationError(
+                "Pass performance, or both date_from and date_to."
+            )
+        if has_range and attrs["date_to"] < attrs["date_from"]:
+            raise serializers.ValidationError("date_to must not be before date_from.")
+        return attrs
+
+
+class SeatHoldTokenSerializer(serializers.Serializer):
+    token = serializers.UUIDField()
+
+
+class SeatHoldSerializer(serializers.Serializer):
+    token = serializers.UUIDField()
+    expires_at = serializers.DateTimeField()
+    seats = serializers.ListField(child=serializers.DictField())
+
+    def to_representation(self, holds):
+        return super().to_representation(
+            {
+                "token": holds[0].token,
+                "expires_at": holds[0].expires_at,
+                "seats": [{"row": h.row, "seat": h.seat} for h in holds],
+            }
+        )
+
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -0,0 +1,178 @@
+"""Waiting room for on-sale performances; all state lives in the cache."""
+
+import uuid
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Iterable, Iterator
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+from theatre.models import Performance
+
+QUEUE_TOKEN_SALT = "theatre.admission"
+
+
+class AdmissionError(Exception):
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _slots() -> int:
+    return getattr(settings, "BOOKING_SLOTS_PER_PERFORMANCE", 4)
+
+
+def _lease_seconds() -> int:
+    return getattr(settings, "BOOKING_SLOT_LEASE_SECONDS", 30)
+
+
+def _token_ttl() -> int:
+    return getattr(settings, "BOOKING_QUEUE_TOKEN_TTL", 30 * 60)
+
+
+def poll_interval() -> int:
+    return getattr(settings, "BOOKING_QUEUE_POLL_SECONDS", 2)
+
+
+def _key(performance_id: int, name: str) -> str:
+    return f"theatre:queue:{performance_id}:{name}"
+
+
+def _counter(performance_id: int, name: str) -> str:
+    key = _key(performance_id, name)
+    cache.add(key, 0, timeout=None)
+    return key
+
+
+def _slot_keys(performance_id: int) -> list[str]:
+    return [_key(performance_id, f"slot:{i}") for i in range(_slots())]
+
+
+def free_slots(performance_id: int) -> list[str]:
+    keys = _slot_keys(performance_id)
+    leased = cache.get_many(keys)
+    return [key for key in keys if key not in leased]
+
+
+def _advance(performance_id: int) -> int:
+    head_key = _counter(performance_id, "head")
+    head = cache.get(head_key, 0)
+    tail = cache.get(_key(performance_id, "tail"), 0)
+    free = len(free_slots(performance_id))
+    # At most one step per poll interval, however many clients are polling,
+    # so admissions follow the rate at which slots actually free up
+    if (
+        free
+        and head < tail
+        and cache.add(_key(performance_id, "tick"), 1, timeout=poll_interval())
+    ):
+        head = cache.incr(head_key, min(free, tail - head))
+    return head
+
+
+def queue_position(performance_id: int, number: int) -> dict:
+    ahead = max(number - _advance(performance_id), 0)
+    return {
+        "position": ahead,
+        "admitted": ahead == 0,
+        "retry_after": poll_interval() if ahead else 0,
+    }
+
+
+def join_queue(performance_id: int, user_id: int) -> dict:
+    number = cache.incr(_counter(performance_id, "tail"))
+    token = signing.dumps(
+        {"p": performance_id, "n": number, "u": user_id}, salt=QUEUE_TOKEN_SALT
+    )
+    return {"token": token, **queue_position(performance_id, number)}
+
+
+def read_tokens(header: str, user_id: int) -> Dict[int, int]:
+    """Map performance id to queue number for the user's valid tokens in a header."""
+    numbers = {}
+    for token in filter(None, (t.strip() for t in header.split(","))):
+        try:
+            data = signing.loads(token, salt=QUEUE_TOKEN_SALT, max_age=_token_ttl())
+        except signing.BadSignature:
+            continue
+        # A token handed to someone else does not admit them
+        if data.get("u") != user_id:
+            continue
+        numbers[data["p"]] = data["n"]
+    return numbers
+
+
+def on_sale_among(performance_ids: Iterable[int]) -> list[int]:
+    return sorted(
+        Performance.objects.filter(pk__in=set(performance_ids), on_sale=True)
+        .order_by()
+        .values_list("pk", flat=True)
+    )
+
+
+@contextmanager
+def booking_slot(
+    performance_id: int, number: int | None, consume: bool = False
+) -> Iterator[None]:
+    """Lease a slot for an admitted number; ``consume`` uses the number up.
+
+    A consumed number is claimed before the block runs, so two requests with
+    the same token cannot both book, and given back if the block fails.
+    """
+    if number is None:
+        raise AdmissionError(
+            "This performance is on sale: join its queue first.",
+            retry_after=poll_interval(),
+        )
+    used_key = _key(performance_id, f"used:{number}")
+    if cache.get(used_key) is not None:
+        raise AdmissionError(
+            "This queue token has already been used: join the queue again.",
+            retry_after=poll_interval(),
+        )
+    status = queue_position(performance_id, number)
+    if not status["admitted"]:
+        raise AdmissionError(
+            f"Still waiting in the queue: {status['position']} ahead.",
+            retry_after=status["retry_after"],
+        )
+
+    lease = uuid.uuid4().hex
+    for key in free_slots(performance_id):
+        if cache.add(key, lease, timeout=_lease_seconds()):
+            break
+    else:
+        raise AdmissionError("All booking slots are busy.", retry_after=poll_interval())
+    try:
+        if consume and not cache.add(used_key, lease, timeout=_token_ttl()):
+            raise AdmissionError(
+                "This queue token has already been used: join the queue again.",
+                retry_after=poll_interval(),
+            )
+        try:
+            yield
+        except BaseException:
+            if consume and cache.get(used_key) == lease:
+                cache.delete(used_key)
+            raise
+    finally:
+        # A lease that ran out may already belong to someone else
+        if cache.get(key) == lease:
+            cache.delete(key)
+
+
+@contextmanager
+def admitted(
+    performance_ids: Iterable[int], tokens: Dict[int, int], consume: bool = False
+) -> Iterator[None]:
+    """Hold a booking slot of every given performance for the block's duration.
+
+    With ``consume`` a successful block uses up the queue numbers.
+    """
+    with ExitStack() as stack:
+        for performance_id in sorted(set(performance_ids)):
+            stack.enter_context(
+                booking_slot(performance_id, tokens.get(performance_id), consume)
+            )
+        yield
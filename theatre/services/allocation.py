@@ -0,0 +1,117 @@
+from itertools import chain
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from theatre.models import Performance, PerformanceSeat, Reservation
+from theatre.services.booking import (
+    BookingError,
+    SeatsTakenError,
+    book_claimed_seats,
+    create_reservation,
+)
+from theatre.services.inventory import inventory_enabled
+from theatre.services.seats import SeatMap, get_seat_map
+
+
+class _Contended(Exception):
+    pass
+
+
+def _as_seats(row: int, run: list) -> list:
+    return [{"row": row, "seat": s} for s in run]
+
+
+def _inventory_seat_map(performance: Performance) -> SeatMap | None:
+    # Performances from before the inventory have no rows to lock
+    if not performance.inventory.exists():
+        return None
+    # Only the taken rows and the live holds are read, not every seat
+    taken = performance.inventory.filter(is_taken=True).values_list("row", "seat")
+    held = performance.holds.filter(expires_at__gt=timezone.now()).values_list(
+        "row", "seat"
+    )
+    hall = performance.theatre_hall
+    return SeatMap.from_taken(hall.rows, hall.seats_in_row, chain(taken, held))
+
+
+def _allocate_locked(*, user, performance: Performance, quantity: int, rows: dict):
+    seat_map = _inventory_seat_map(performance)
+    if seat_map is None:
+        return None
+    # No performance lock: SKIP LOCKED lets concurrent requests claim
+    # disjoint blocks side by side, and only the counter UPDATE at the end
+    # of the booking queues them up
+    for row, run in seat_map.blocks(quantity, **rows):
+        try:
+            # Rolling back the transaction drops the locks of a partial run
+            with transaction.atomic():
+                locked = (
+                    PerformanceSeat.objects.select_for_update(skip_locked=True)
+                    .filter(
+                        performance=performance,
+                        row=row,
+                        seat__in=run,
+                        is_taken=False,
+                    )
+                    .values_list("pk", flat=True)
+                )
+                if len(locked) < quantity:
+                    raise _Contended
+                return book_claimed_seats(
+                    user=user, performance=performance, seats=_as_seats(row, run)
+                )
+        except (_Contended, SeatsTakenError):
+            continue
+    return None
+
+
+def _allocate_optimistic(
+    *, user, performance: Performance, quantity: int, rows: dict, attempts: int
+):
+    for row, run in get_seat_map(performance).blocks(quantity, **rows):
+        try:
+            return create_reservation(
+                user=user, performance=performance, seats=_as_seats(row, run)
+            )
+        except SeatsTakenError:
+            attempts -= 1
+            if not attempts:
+                break
+    return None
+
+
+def allocate_best_seats(
+    *,
+    user,
+    performance: Performance,
+    quantity: int,
+    row_from: int = 1,
+    row_to: int | None = None,
+    attempts: int = 5,
+) -> Reservation:
+    """Book the best block of ``quantity`` adjacent seats.
+
+    With a materialized inventory on a database that supports SKIP LOCKED,
+    concurrent requests lock disjoint blocks and never wait on each other;
+    otherwise candidates are tried against the ticket unique constraint.
+    """
+    if quantity < 1:
+        raise BookingError("Ask for at least one seat.")
+    rows = {"row_from": row_from, "row_to": row_to}
+    reservation = None
+    if inventory_enabled() and connection.features.has_select_for_update_skip_locked:
+        reservation = _allocate_locked(
+            user=user, performance=performance, quantity=quantity, rows=rows
+        )
+    if reservation is None:
+        reservation = _allocate_optimistic(
+            user=user,
+            performance=performance,
+            quantity=quantity,
+            rows=rows,
+            attempts=attempts,
+        )
+    if reservation is None:
+        raise BookingError(f"No {quantity} adjacent seats are available.")
+    return reservation
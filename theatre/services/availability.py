@@ -0,0 +1,89 @@
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    IntegerField,
+    OuterRef,
+    QuerySet,
+    Subquery,
+    Value,
+    When,
+)
+
+from theatre.models import Performance, TheatreHall, Ticket
+
+
+def adjust_seat_counters(deltas: Dict[int, int]) -> None:
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    # One UPDATE however many performances a reservation spans
+    delta = Case(
+        *(When(pk=pk, then=Value(d)) for pk, d in sorted(deltas.items())),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    Performance.objects.filter(pk__in=deltas).update(
+        seats_taken=F("seats_taken") + delta,
+        seats_free=F("seats_free") - delta,
+    )
+
+
+def refresh_seats_free(queryset: QuerySet) -> int:
+    capacity = (
+        TheatreHall.objects.filter(pk=OuterRef("theatre_hall_id"))
+        .annotate(capacity=F("rows") * F("seats_in_row"))
+        .values("capacity")[:1]
+    )
+    return queryset.update(seats_free=Subquery(capacity) - F("seats_taken"))
+
+
+def _ticket_counts(performance_ids: Optional[Iterable[int]] = None) -> Dict[int, int]:
+    tickets = Ticket.objects.order_by()
+    if performance_ids is not None:
+        tickets = tickets.filter(performance_id__in=performance_ids)
+    return dict(
+        tickets.values_list("performance_id")
+        .annotate(n=Count("id"))
+        .values_list("performance_id", "n")
+    )
+
+
+def find_counter_drift(performance_ids: Optional[Iterable[int]] = None) -> List[int]:
+    performances = Performance.objects.order_by()
+    if performance_ids is not None:
+        performance_ids = list(performance_ids)
+        performances = performances.filter(pk__in=performance_ids)
+    counts = _ticket_counts(performance_ids)
+    rows = performances.values_list(
+        "pk",
+        "seats_taken",
+        "seats_free",
+        "theatre_hall__rows",
+        "theatre_hall__seats_in_row",
+    )
+    drifted = []
+    for pk, taken, free, hall_rows, seats_in_row in rows.iterator(chunk_size=2000):
+        actual = counts.get(pk, 0)
+        if taken != actual or free != hall_rows * seats_in_row - actual:
+            drifted.append(pk)
+    return drifted
+
+
+def reconcile_seat_counters(performance_ids: Iterable[int]) -> None:
+    for performance_id in sorted(performance_ids):
+        with transaction.atomic():
+            # Lock the row so bookings cannot move the counter mid-repair
+            performance = (
+                Performance.objects.select_for_update(of=("self",))
+                .select_related("theatre_hall")
+                .get(pk=performance_id)
+            )
+            taken = performance.tickets.count()
+            Performance.objects.filter(pk=performance_id).update(
+                seats_taken=taken,
+                seats_free=performance.theatre_hall.capacity - taken,
+            )
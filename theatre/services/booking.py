@@ -1,23 +1,207 @@
-from typing import List
-from django.db import transaction, IntegrityError
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from functools import reduce
+from operator import or_
+from typing import Dict, Iterable, List, Tuple
+from django.db import connection, transaction, IntegrityError
+from django.db.models import Count, Q, QuerySet
 from django.core.exceptions import ValidationError
-from theatre.models import Reservation, Ticket, Performance
+from django.utils import timezone
+from theatre.models import (
+    Performance,
+    PerformanceSeat,
+    Reservation,
+    SeatHold,
+    Ticket,
+)
+from theatre.services.availability import adjust_seat_counters
+from theatre.services.inventory import (
+    inventory_enabled,
+    mark_seats,
+    release_ticket_seats,
+)
+from theatre.services.seats import invalidate_seat_map
+
+# (performance_id, row, seat); the natural sort order is also the insert order
+SeatKey = Tuple[int, int, int]
+
+# Set while delete_tickets deletes: it settles counters and inventory in bulk,
+# so the per-ticket delete signals stand aside
+BULK_TICKET_DELETE = ContextVar("theatre_bulk_ticket_delete", default=False)
 
 
 class BookingError(ValidationError):
     pass
 
 
-def _validate_seats(performance: Performance, seats: List[dict]) -> None:
+class SeatsTakenError(BookingError):
+    def __init__(self, seats: Iterable[SeatKey]):
+        self.seats = sorted(seats)
+        if self.seats:
+            listed = ", ".join(
+                f"performance={p}, row={r}, seat={s}" for p, r, s in self.seats
+            )
+            message = f"These seats are already taken: {listed}"
+        else:
+            message = "Some seats are already taken. Please try again."
+        super().__init__(message, code="seats_taken")
+
+
+def validate_seats(
+    performance: Performance, seats: List[dict]
+) -> List[Tuple[int, int]]:
     hall = performance.theatre_hall
     seen = set()
+    pairs = []
     for item in seats:
+        if "row" not in item or "seat" not in item:
+            raise BookingError("Each place needs a row and a seat.")
         r, s = int(item["row"]), int(item["seat"])
         if not (1 <= r <= hall.rows and 1 <= s <= hall.seats_in_row):
             raise BookingError(f"Places outside the hall range: row={r}, seat={s}")
         if (r, s) in seen:
             raise BookingError(f"Repeating a place in a query: row={r}, seat={s}")
         seen.add((r, s))
+        pairs.append((r, s))
+    return pairs
+
+
+def seat_keys(
+    performance: Performance, pairs: Iterable[Tuple[int, int]]
+) -> List[SeatKey]:
+    return sorted((performance.pk, r, s) for r, s in pairs)
+
+
+def _narrowed(queryset: QuerySet, keys: Iterable[SeatKey]) -> List[SeatKey]:
+    # One lookup on the (performance, row, seat) unique index; the cross
+    # product of the IN lists is narrowed to the exact seats in Python.
+    wanted = set(keys)
+    if not wanted:
+        return []
+    found = queryset.filter(
+        performance_id__in={p for p, _, _ in wanted},
+        row__in={r for _, r, _ in wanted},
+        seat__in={s for _, _, s in wanted},
+    ).values_list("performance_id", "row", "seat")
+    return sorted(key for key in found if key in wanted)
+
+
+def taken_among(keys: Iterable[SeatKey]) -> List[SeatKey]:
+    return _narrowed(Ticket.objects.order_by(), keys)
+
+
+def held_among(keys: Iterable[SeatKey], exclude_user=None) -> List[SeatKey]:
+    holds = SeatHold.objects.order_by().filter(expires_at__gt=timezone.now())
+    if exclude_user is not None:
+        holds = holds.exclude(user=exclude_user)
+    return _narrowed(holds, keys)
+
+
+def seats_q(keys: Iterable[SeatKey]) -> Q:
+    return reduce(
+        or_,
+        (Q(performance_id=p, row=r, seat=s) for p, r, s in keys),
+        Q(pk__in=[]),
+    )
+
+
+def lock_performances(performance_ids: Iterable[int]) -> None:
+    # Every write to tickets, holds or inventory locks its performance rows
+    # in id order before touching them, so concurrent bookings, bundles and
+    # cancellations sharing shows queue up instead of deadlocking. The one
+    # exception is best-available allocation, which claims inventory rows
+    # with SKIP LOCKED instead (see claim_seats) and never waits on them.
+    list(
+        Performance.objects.select_for_update()
+        .filter(pk__in=set(performance_ids))
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def claim_seats(keys: List[SeatKey]) -> None:
+    """Lock the inventory rows of ``keys``; fail on rows another writer holds.
+
+    SKIP LOCKED rather than waiting: best-available allocation claims rows
+    without the performance lock, so waiting on it here could deadlock.
+    """
+    if not connection.features.has_select_for_update_skip_locked:
+        return
+    claimed = set(
+        PerformanceSeat.objects.select_for_update(skip_locked=True)
+        .filter(seats_q(keys))
+        .values_list("performance_id", "row", "seat")
+    )
+    missing = [key for key in keys if key not in claimed]
+    if missing:
+        # Performances from before the inventory have no rows to claim
+        contended = PerformanceSeat.objects.filter(seats_q(missing)).values_list(
+            "performance_id", "row", "seat"
+        )
+        if contended:
+            raise SeatsTakenError(contended)
+
+
+def _write_tickets(user, keys: List[SeatKey]) -> Reservation:
+    # Runs once no other writer can take these seats; rechecks holds, which
+    # nothing ties to tickets, so one committed since the caller's first
+    # check is not sold over
+    taken = held_among(keys, exclude_user=user)
+    if taken:
+        raise SeatsTakenError(taken)
+    reservation = Reservation.objects.create(user=user)
+    try:
+        with transaction.atomic():
+            Ticket.objects.bulk_create(
+                Ticket(performance_id=p, reservation=reservation, row=r, seat=s)
+                for p, r, s in keys
+            )
+    except IntegrityError:
+        raise SeatsTakenError(taken_among(keys))
+    if inventory_enabled():
+        mark_seats(seats_q(keys), is_taken=True)
+    # The buyer's own holds on these seats are now redundant
+    SeatHold.objects.filter(seats_q(keys), user=user).delete()
+    # One short UPDATE of the counters, last
+    adjust_seat_counters(Counter(p for p, _, _ in keys))
+    taken_by_performance = defaultdict(list)
+    for p, r, s in keys:
+        taken_by_performance[p].append((r, s))
+    for performance_id, taken in taken_by_performance.items():
+        invalidate_seat_map(performance_id, taken=taken)
+    return reservation
+
+
+def book_seats(*, user, bookings: Dict[Performance, List[dict]]) -> Reservation:
+    keys = sorted(
+        key
+        for performance, seats in bookings.items()
+        for key in seat_keys(performance, validate_seats(performance, seats))
+    )
+
+    # Checked before opening the transaction to keep lock hold time short
+    taken = taken_among(keys) + held_among(keys, exclude_user=user)
+    if taken:
+        raise SeatsTakenError(taken)
+
+    with transaction.atomic():
+        lock_performances({p for p, _, _ in keys})
+        if inventory_enabled():
+            claim_seats(keys)
+        return _write_tickets(user, keys)
+
+
+def book_claimed_seats(
+    *, user, performance: Performance, seats: List[dict]
+) -> Reservation:
+    """Book seats whose inventory rows the caller holds locked.
+
+    Takes no performance lock, so allocations of disjoint seats run side by
+    side; the claimed rows keep every other writer off these seats.
+    """
+    keys = seat_keys(performance, validate_seats(performance, seats))
+    with transaction.atomic():
+        return _write_tickets(user, keys)
 
 
 def create_reservation(
@@ -25,20 +209,51 @@ def create_reservation(
 ) -> Reservation:
     if not seats:
         raise BookingError("The list of places is empty.")
-    _validate_seats(performance, seats)
+    return book_seats(user=user, bookings={performance: seats})
+
+
+def create_bundle_reservation(*, user, tickets: List[dict]) -> Reservation:
+    """Book seats of several performances as one all-or-nothing reservation."""
+    if not tickets:
+        raise BookingError("The list of places is empty.")
+    seats = defaultdict(list)
+    for item in tickets:
+        if "performance" not in item:
+            raise BookingError("Each place needs a performance.")
+        seats[int(item["performance"])].append(item)
+
+    performances = Performance.objects.select_related("theatre_hall").in_bulk(
+        list(seats)
+    )
+    unknown = sorted(set(seats) - set(performances))
+    if unknown:
+        raise BookingError(f"Unknown performances: {unknown}")
+    return book_seats(
+        user=user,
+        bookings={performances[pk]: items for pk, items in seats.items()},
+    )
+
 
+def delete_tickets(tickets: QuerySet) -> None:
     with transaction.atomic():
-        reservation = Reservation.objects.create(user=user)
+        lock_performances(
+            tickets.order_by().values_list("performance_id", flat=True).distinct()
+        )
+        # Counted under the locks, so a concurrent delete cannot skew them
+        counts = dict(
+            tickets.order_by().values_list("performance_id").annotate(n=Count("id"))
+        )
+        if inventory_enabled():
+            release_ticket_seats(tickets, counts)
+        bulk = BULK_TICKET_DELETE.set(True)
         try:
-            for item in seats:
-                Ticket.objects.create(
-                    performance=performance,
-                    reservation=reservation,
-                    row=item["row"],
-                    seat=item["seat"],
-                )
-        except IntegrityError:
-            raise BookingError(
-                "Some seats are already taken. Please refresh the layout and try again."
-            )
-    return reservation
+            tickets.delete()
+        finally:
+            BULK_TICKET_DELETE.reset(bulk)
+        adjust_seat_counters({pk: -n for pk, n in counts.items()})
+
+
+def cancel_reservation(reservation: Reservation) -> None:
+    with transaction.atomic():
+        delete_tickets(reservation.tickets.all())
+        reservation.delete()
@@ -0,0 +1,74 @@
+import hashlib
+import time
+from typing import Dict, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# Models whose rows make up the public catalog, by model_name
+CATALOG_MODELS = ("actor", "genre", "play", "theatrehall")
+
+
+def _cache_timeout() -> int:
+    return getattr(settings, "CATALOG_CACHE_TIMEOUT", 60 * 60)
+
+
+def _generation_key(model_name: str) -> str:
+    return f"theatre:catalog:generation:{model_name}"
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def last_modified(generation: int) -> int:
+    """Last-Modified of a generation, in whole seconds, rounded up."""
+    return -(-generation // 1000)
+
+
+def catalog_generations(model_names: Iterable[str]) -> Dict[str, int]:
+    """Generation of each model: the time in ms of its last change."""
+    keys = {name: _generation_key(name) for name in model_names}
+    found = cache.get_many(keys.values())
+    generations = {}
+    for name, key in keys.items():
+        if key not in found:
+            # An unknown generation is "now", so nothing cached before an
+            # eviction can be served again
+            cache.add(key, _now_ms(), timeout=None)
+            found[key] = cache.get(key)
+        generations[name] = found[key]
+    return generations
+
+
+def bump_catalog_generation(model_name: str) -> None:
+    """Invalidate cached responses built from ``model_name`` rows.
+
+    Runs after commit, so a reader can never cache rows of the old state
+    under the new generation.
+    """
+
+    def bump():
+        key = _generation_key(model_name)
+        # Stays a timestamp, yet always moves Last-Modified a second forward:
+        # If-Modified-Since has no finer precision, so a second change within
+        # the same second would otherwise still answer 304
+        seconds = last_modified(cache.get(key) or 0)
+        cache.set(key, max(_now_ms(), seconds * 1000 + 1), timeout=None)
+
+    transaction.on_commit(bump)
+
+
+def response_cache_key(uri: str, media_type: str, generations: Dict[str, int]) -> str:
+    parts = [uri, media_type] + [f"{k}={v}" for k, v in sorted(generations.items())]
+    digest = hashlib.blake2b("\n".join(parts).encode(), digest_size=16)
+    return f"theatre:catalog:response:{digest.hexdigest()}"
+
+
+def get_cached_response(key: str):
+    return cache.get(key)
+
+
+def cache_response(key: str, data) -> None:
+    cache.set(key, data, timeout=_cache_timeout())
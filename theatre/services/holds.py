@@ -0,0 +1,119 @@
+import uuid
+from datetime import timedelta
+from typing import List
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from theatre.models import Performance, Reservation, SeatHold
+from theatre.services.booking import (
+    BookingError,
+    SeatsTakenError,
+    claim_seats,
+    create_reservation,
+    held_among,
+    lock_performances,
+    seats_q,
+    taken_among,
+    seat_keys,
+    validate_seats,
+)
+from theatre.services.inventory import inventory_enabled
+from theatre.services.seats import invalidate_seat_map
+
+
+def hold_ttl() -> timedelta:
+    return timedelta(seconds=getattr(settings, "SEAT_HOLD_TTL", 10 * 60))
+
+
+def create_hold(*, user, performance: Performance, seats: List[dict]) -> List[SeatHold]:
+    if not seats:
+        raise BookingError("The list of places is empty.")
+    keys = seat_keys(performance, validate_seats(performance, seats))
+
+    taken = taken_among(keys) + held_among(keys)
+    if taken:
+        raise SeatsTakenError(taken)
+
+    token = uuid.uuid4()
+    expires_at = timezone.now() + hold_ttl()
+    with transaction.atomic():
+        lock_performances([performance.pk])
+        # Expired holds that the sweeper has not reclaimed yet still own
+        # the unique (performance, row, seat) slot
+        SeatHold.objects.filter(seats_q(keys), expires_at__lte=timezone.now()).delete()
+        # Every ticket writer holds the lock taken above, so this sees any
+        # sale made since the check outside the transaction
+        taken = taken_among(keys)
+        if taken:
+            raise SeatsTakenError(taken)
+        if inventory_enabled():
+            # Seats a best-available allocation is booking right now
+            claim_seats(keys)
+        try:
+            with transaction.atomic():
+                holds = SeatHold.objects.bulk_create(
+                    SeatHold(
+                        performance=performance,
+                        user=user,
+                        token=token,
+                        row=r,
+                        seat=s,
+                        expires_at=expires_at,
+                    )
+                    for _, r, s in keys
+                )
+        except IntegrityError:
+            raise SeatsTakenError(held_among(keys))
+        invalidate_seat_map(performance.pk, taken=[(r, s) for _, r, s in keys])
+    return holds
+
+
+def release_hold(*, user, performance: Performance, token: uuid.UUID) -> int:
+    with transaction.atomic():
+        deleted, _ = SeatHold.objects.filter(
+            performance=performance, user=user, token=token
+        ).delete()
+        if deleted:
+            invalidate_seat_map(performance.pk)
+    return deleted
+
+
+def confirm_hold(*, user, performance: Performance, token: uuid.UUID) -> Reservation:
+    with transaction.atomic():
+        # Same lock order as book_seats: the performance, then its rows
+        lock_performances([performance.pk])
+        holds = list(
+            SeatHold.objects.select_for_update()
+            .filter(performance=performance, user=user, token=token)
+            .values_list("row", "seat", "expires_at")
+        )
+        if not holds or any(expires_at <= timezone.now() for *_, expires_at in holds):
+            raise BookingError("The hold has expired or does not exist.")
+        SeatHold.objects.filter(performance=performance, token=token).delete()
+        return create_reservation(
+            user=user,
+            performance=performance,
+            seats=[{"row": r, "seat": s} for r, s, _ in holds],
+        )
+
+
+def expire_holds(batch_size: int = 1000) -> int:
+    """Delete expired holds in batches; returns how many were reclaimed."""
+    reclaimed = 0
+    while True:
+        batch = list(
+            SeatHold.objects.filter(expires_at__lte=timezone.now())
+            .order_by("expires_at")
+            .values_list("id", "performance_id")[:batch_size]
+        )
+        if not batch:
+            return reclaimed
+        with transaction.atomic():
+            SeatHold.objects.filter(pk__in=[pk for pk, _ in batch]).delete()
+            for performance_id in {performance_id for _, performance_id in batch}:
+                invalidate_seat_map(performance_id)
+        reclaimed += len(batch)
+        if len(batch) < batch_size:
+            return reclaimed
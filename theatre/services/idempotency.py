@@ -0,0 +1,104 @@
+import hashlib
+import json
+import time
+from datetime import timedelta
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from theatre.models import IdempotencyKey
+
+
+def idempotency_ttl() -> timedelta:
+    return timedelta(seconds=getattr(settings, "IDEMPOTENCY_KEY_TTL", 24 * 60 * 60))
+
+
+def request_fingerprint(data) -> str:
+    payload = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def pending_timeout() -> timedelta:
+    # A claim older than this belongs to a request that died mid-booking
+    return timedelta(seconds=getattr(settings, "IDEMPOTENCY_PENDING_TIMEOUT", 60))
+
+
+def find_idempotent_response(user, key: str) -> Optional[IdempotencyKey]:
+    stored = IdempotencyKey.objects.filter(user=user, key=key).first()
+    if stored is None:
+        return None
+    now = timezone.now()
+    abandoned = stored.pending and stored.created_at <= now - pending_timeout()
+    if stored.expires_at <= now or abandoned:
+        # Free the (user, key) slot so the key can be used again
+        stored.delete()
+        return None
+    return stored
+
+
+def claim_idempotency_key(
+    *, user, key: str, fingerprint: str
+) -> Tuple[Optional[IdempotencyKey], Optional[IdempotencyKey]]:
+    """``(claim, None)`` for the first request with ``key``, ``(None, stored)``
+    for a retry.
+
+    The claim is committed on its own before the booking starts, so a retry
+    arriving mid-booking finds it instead of racing for the same seats.
+    """
+    for _ in range(2):
+        stored = find_idempotent_response(user, key)
+        if stored is not None:
+            return None, stored
+        try:
+            with transaction.atomic():
+                claim = IdempotencyKey.objects.create(
+                    user=user,
+                    key=key,
+                    request_hash=fingerprint,
+                    expires_at=timezone.now() + idempotency_ttl(),
+                )
+            return claim, None
+        except IntegrityError:
+            # A concurrent request claimed it first
+            continue
+    return None, find_idempotent_response(user, key)
+
+
+def remember_response(
+    claim: IdempotencyKey, *, reservation_id: int, status_code: int, body
+) -> None:
+    IdempotencyKey.objects.filter(pk=claim.pk).update(
+        reservation_id=reservation_id,
+        status_code=status_code,
+        response_body=body,
+    )
+
+
+def await_response(stored: IdempotencyKey) -> IdempotencyKey:
+    """Poll a pending key for a short while; the result may still be pending."""
+    deadline = time.monotonic() + getattr(settings, "IDEMPOTENCY_PENDING_WAIT", 2)
+    while stored.pending and time.monotonic() < deadline:
+        time.sleep(0.05)
+        current = IdempotencyKey.objects.filter(pk=stored.pk).first()
+        if current is None:
+            # The first request failed and gave the key up
+            break
+        stored = current
+    return stored
+
+
+def purge_expired_keys(batch_size: int = 1000) -> int:
+    purged = 0
+    while True:
+        ids = list(
+            IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).values_list(
+                "id", flat=True
+            )[:batch_size]
+        )
+        if not ids:
+            return purged
+        with transaction.atomic():
+            IdempotencyKey.objects.filter(pk__in=ids).delete()
+        purged += len(ids)
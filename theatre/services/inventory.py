@@ -0,0 +1,97 @@
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q, QuerySet
+
+from theatre.models import Performance, PerformanceSeat, Ticket
+
+INVENTORY_IMPLICIT = "implicit"
+INVENTORY_MATERIALIZED = "materialized"
+
+
+def inventory_enabled() -> bool:
+    mode = getattr(settings, "THEATRE_SEAT_INVENTORY", INVENTORY_IMPLICIT)
+    return mode == INVENTORY_MATERIALIZED
+
+
+def materialize_seats(performance: Performance) -> None:
+    hall = performance.theatre_hall
+    PerformanceSeat.objects.bulk_create(
+        (
+            PerformanceSeat(performance=performance, row=r, seat=s)
+            for r in range(1, hall.rows + 1)
+            for s in range(1, hall.seats_in_row + 1)
+        ),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+def mark_seats(seats: Q, is_taken: bool) -> None:
+    PerformanceSeat.objects.filter(seats).update(is_taken=is_taken)
+
+
+def release_ticket_seats(tickets: QuerySet, performance_ids: Iterable[int]) -> None:
+    # Runs before the tickets are deleted, as one UPDATE ... WHERE EXISTS
+    sold = tickets.filter(
+        performance_id=OuterRef("performance_id"),
+        row=OuterRef("row"),
+        seat=OuterRef("seat"),
+    )
+    PerformanceSeat.objects.filter(
+        Exists(sold), performance_id__in=list(performance_ids)
+    ).update(is_taken=False)
+
+
+def sync_inventory(performance_ids: Iterable[int]) -> None:
+    """Rebuild inventory rows after a hall resize or a ticket edit made by hand."""
+    performance_ids = list(performance_ids)
+    performances = Performance.objects.filter(pk__in=performance_ids).select_related(
+        "theatre_hall"
+    )
+    for performance in performances:
+        hall = performance.theatre_hall
+        performance.inventory.filter(
+            Q(row__gt=hall.rows) | Q(seat__gt=hall.seats_in_row)
+        ).delete()
+        materialize_seats(performance)
+    sold = Ticket.objects.filter(
+        performance_id=OuterRef("performance_id"),
+        row=OuterRef("row"),
+        seat=OuterRef("seat"),
+    )
+    PerformanceSeat.objects.filter(performance_id__in=performance_ids).update(
+        is_taken=Exists(sold)
+    )
+
+
+def find_inventory_drift(
+    performance_ids: Optional[Iterable[int]] = None,
+) -> List[int]:
+    """Performances with inventory rows that disagree with their tickets."""
+    sold = Exists(
+        Ticket.objects.filter(
+            performance_id=OuterRef("performance_id"),
+            row=OuterRef("row"),
+            seat=OuterRef("seat"),
+        )
+    )
+    seats = PerformanceSeat.objects.filter(
+        Q(sold, is_taken=False) | Q(~sold, is_taken=True)
+    )
+    if performance_ids is not None:
+        seats = seats.filter(performance_id__in=list(performance_ids))
+    return sorted(seats.order_by().values_list("performance_id", flat=True).distinct())
+
+
+def reconcile_inventory(performance_ids: Iterable[int]) -> None:
+    for performance_id in sorted(performance_ids):
+        with transaction.atomic():
+            # Lock the row so bookings cannot mark seats mid-repair
+            list(
+                Performance.objects.select_for_update()
+                .filter(pk=performance_id)
+                .values_list("pk", flat=True)
+            )
+            sync_inventory([performance_id])
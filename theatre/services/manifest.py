@@ -0,0 +1,108 @@
+"""Ticket manifests for the box office and door staff.
+
+Rows come from a server-side cursor and are written out one by one, so an
+export of any size holds only ``MANIFEST_CHUNK_SIZE`` rows in memory.
+"""
+
+import csv
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+
+from theatre.models import Ticket
+from theatre.renderers import FastJSONRenderer
+
+# Header -> values_list() path
+MANIFEST_COLUMNS = {
+    "ticket_id": "id",
+    "performance_id": "performance_id",
+    "show_time": "performance__show_time",
+    "play": "performance__play__title",
+    "hall": "performance__theatre_hall__name",
+    "row": "row",
+    "seat": "seat",
+    "reservation_id": "reservation_id",
+    "booked_at": "reservation__created_at",
+    "email": "reservation__user__email",
+}
+MANIFEST_DATETIMES = ("show_time", "booked_at")
+
+# Spreadsheets run cells starting with these as formulas; such text (a play
+# title or an email, say) is written with a leading ' instead
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+MANIFEST_CSV = "csv"
+MANIFEST_NDJSON = "ndjson"
+MANIFEST_CONTENT_TYPES = {
+    MANIFEST_CSV: "text/csv; charset=utf-8",
+    MANIFEST_NDJSON: "application/x-ndjson",
+}
+
+
+def manifest_chunk_size() -> int:
+    return getattr(settings, "MANIFEST_CHUNK_SIZE", 2000)
+
+
+def manifest_tickets(
+    *,
+    performance_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+) -> Iterator[dict]:
+    """Tickets of one performance, or of every performance in the range."""
+    tickets = Ticket.objects.all()
+    if performance_id is not None:
+        tickets = tickets.filter(performance_id=performance_id)
+    if date_from is not None:
+        tickets = tickets.filter(performance__show_time__gte=date_from)
+    if date_to is not None:
+        tickets = tickets.filter(performance__show_time__lte=date_to)
+    rows = tickets.order_by(
+        "performance__show_time", "performance_id", "row", "seat"
+    ).values_list(*MANIFEST_COLUMNS.values())
+
+    # Datetimes as the API writes them; the time zone is resolved now, while
+    # the request is active, and once rather than per value
+    to_text = serializers.DateTimeField(
+        default_timezone=timezone.get_current_timezone()
+    ).to_representation
+
+    def stream():
+        for values in rows.iterator(chunk_size=manifest_chunk_size()):
+            row = dict(zip(MANIFEST_COLUMNS, values))
+            for column in MANIFEST_DATETIMES:
+                row[column] = to_text(row[column])
+            yield row
+
+    return stream()
+
+
+class _Echo:
+    # csv.writer target that hands each line back instead of buffering it
+    def write(self, value: str) -> str:
+        return value
+
+
+def _csv_cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_lines(rows: Iterable[dict]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(MANIFEST_COLUMNS)
+    for row in rows:
+        yield writer.writerow([_csv_cell(value) for value in row.values()])
+
+
+def ndjson_lines(rows: Iterable[dict]) -> Iterator[bytes]:
+    renderer = FastJSONRenderer()
+    for row in rows:
+        yield renderer.render(row) + b"\n"
+
+
+MANIFEST_WRITERS = {MANIFEST_CSV: csv_lines, MANIFEST_NDJSON: ndjson_lines}
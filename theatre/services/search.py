@@ -0,0 +1,100 @@
+import re
+from collections import defaultdict
+from typing import Iterable, List
+
+from django.db import connection
+from django.db.models import Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+from theatre.models import Play, PlaySearchDocument
+
+DOCUMENT_TABLE = PlaySearchDocument._meta.db_table
+FTS_TABLE = "theatre_playsearch_fts"
+MAX_TERMS = 16
+
+
+def search_terms(query: str) -> List[str]:
+    # Only word characters reach the engines, so user input can never be
+    # read as tsquery or FTS5 operators
+    return re.findall(r"\w+", query.lower())[:MAX_TERMS]
+
+
+def refresh_search_documents(play_ids: Iterable[int]) -> None:
+    plays = Play.objects.filter(pk__in=set(play_ids))
+    titles = dict(plays.values_list("pk", "title"))
+    if not titles:
+        return
+    words = defaultdict(list)
+    actors = Play.actors.through.objects.filter(play_id__in=titles).values_list(
+        "play_id", "actor__first_name", "actor__last_name"
+    )
+    for play_id, first_name, last_name in actors:
+        words[play_id] += [first_name, last_name]
+    genres = Play.genres.through.objects.filter(play_id__in=titles).values_list(
+        "play_id", "genre__name"
+    )
+    for play_id, name in genres:
+        words[play_id].append(name)
+
+    PlaySearchDocument.objects.bulk_create(
+        [
+            PlaySearchDocument(play_id=pk, title=title, body=" ".join(words[pk]))
+            for pk, title in titles.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["play"],
+        update_fields=["title", "body"],
+    )
+
+
+def _ranked(queryset: QuerySet, matches: RawSQL, rank: RawSQL) -> QuerySet:
+    return (
+        queryset.filter(pk__in=matches)
+        .annotate(search_rank=rank)
+        .order_by("-search_rank", "title")
+    )
+
+
+def search_plays(queryset: QuerySet, query: str) -> QuerySet:
+    """Plays matching every word of ``query`` as a prefix, best match first."""
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+    play_id = f"{Play._meta.db_table}.id"
+
+    if connection.vendor == "postgresql":
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+        return _ranked(
+            queryset,
+            RawSQL(
+                f"SELECT play_id FROM {DOCUMENT_TABLE} "
+                "WHERE search_vector @@ to_tsquery('simple', %s)",
+                (tsquery,),
+            ),
+            RawSQL(
+                "SELECT ts_rank(search_vector, to_tsquery('simple', %s)) "
+                f"FROM {DOCUMENT_TABLE} WHERE play_id = {play_id}",
+                (tsquery,),
+            ),
+        )
+
+    if connection.vendor == "sqlite":
+        match = " ".join(f'"{term}"*' for term in terms)
+        return _ranked(
+            queryset,
+            RawSQL(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,)
+            ),
+            # bm25() is lower for better matches; title hits weigh 10x
+            RawSQL(
+                f"SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid = {play_id}",
+                (match,),
+            ),
+        )
+
+    # Other engines: one indexed table instead of joins, still no duplicates
+    documents = PlaySearchDocument.objects.all()
+    for term in terms:
+        documents = documents.filter(Q(title__icontains=term) | Q(body__icontains=term))
+    return queryset.filter(pk__in=documents.values("play_id"))
@@ -1,29 +1,424 @@
-from typing import List, Dict, Tuple
-from theatre.models import Performance
+import hashlib
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Iterable, Iterator, List, Dict, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from theatre.models import Performance, SeatHold, Ticket
 
 
 Seat = Dict[str, int]  # {"row": 1, "seat": 5}
 
+SEAT_MAP_FULL = "full"
+SEAT_MAP_COMPACT = "compact"
+SEAT_MAP_NONE = "none"
+SEAT_MAP_FORMATS = (SEAT_MAP_FULL, SEAT_MAP_COMPACT, SEAT_MAP_NONE)
+
+
+Run = Tuple[int, int]  # (first seat, length) of adjacent free seats
+
+
+def _row_runs(free: int) -> List[Run]:
+    runs = []
+    while free:
+        low = (free & -free).bit_length() - 1
+        shifted = free >> low
+        length = (~shifted & (shifted + 1)).bit_length() - 1
+        runs.append((low + 1, length))
+        free &= ~(((1 << length) - 1) << low)
+    return runs
+
+
+def _take_from_runs(runs: List[Run], seat: int) -> None:
+    i = bisect_right(runs, (seat, float("inf"))) - 1
+    start, length = runs[i]
+    pieces = [(start, seat - start), (seat + 1, start + length - seat - 1)]
+    runs[i : i + 1] = [run for run in pieces if run[1]]
+
+
+def _free_in_runs(runs: List[Run], seat: int) -> None:
+    i = bisect_right(runs, (seat, float("inf")))
+    start, length = seat, 1
+    if i and sum(runs[i - 1]) == seat:
+        i -= 1
+        start, length = runs[i][0], runs[i][1] + 1
+        del runs[i]
+    if i < len(runs) and runs[i][0] == seat + 1:
+        length += runs[i][1]
+        del runs[i]
+    runs.insert(i, (start, length))
+
+
+class SeatMap:
+    """One bit per seat, row-major: seat (r, s) is bit (r-1)*seats_in_row + s-1.
+
+    Alongside the bits it keeps, once built, an index of the free runs of
+    every row; mark_taken/mark_free update both, so block searches never
+    rescan the hall.
+    """
+
+    __slots__ = ("rows", "seats_in_row", "_bits", "_runs")
+
+    def __init__(
+        self,
+        rows: int,
+        seats_in_row: int,
+        bits: bytes | None = None,
+        runs: Sequence[Sequence[Run]] | None = None,
+    ):
+        self.rows = rows
+        self.seats_in_row = seats_in_row
+        size = (rows * seats_in_row + 7) // 8
+        self._bits = bytearray(bits) if bits is not None else bytearray(size)
+        if len(self._bits) != size:
+            raise ValueError("Bitset size does not match the hall dimensions.")
+        self._runs = [list(row) for row in runs] if runs is not None else None
+
+    @classmethod
+    def from_taken(
+        cls, rows: int, seats_in_row: int, taken: Iterable[Tuple[int, int]]
+    ) -> "SeatMap":
+        seat_map = cls(rows, seats_in_row)
+        for r, s in taken:
+            if seat_map.contains(r, s):
+                seat_map.mark_taken(r, s)
+        return seat_map
+
+    def contains(self, row: int, seat: int) -> bool:
+        return 1 <= row <= self.rows and 1 <= seat <= self.seats_in_row
+
+    def _index(self, row: int, seat: int) -> int:
+        if not self.contains(row, seat):
+            raise IndexError(f"Seat outside the hall: row={row}, seat={seat}")
+        return (row - 1) * self.seats_in_row + (seat - 1)
+
+    def is_taken(self, row: int, seat: int) -> bool:
+        i = self._index(row, seat)
+        return bool(self._bits[i >> 3] & (1 << (i & 7)))
+
+    def mark_taken(self, row: int, seat: int) -> None:
+        if self.is_taken(row, seat):
+            return
+        i = self._index(row, seat)
+        self._bits[i >> 3] |= 1 << (i & 7)
+        if self._runs is not None:
+            _take_from_runs(self._runs[row - 1], seat)
+
+    def mark_free(self, row: int, seat: int) -> None:
+        if not self.is_taken(row, seat):
+            return
+        i = self._index(row, seat)
+        self._bits[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+        if self._runs is not None:
+            _free_in_runs(self._runs[row - 1], seat)
+
+    @property
+    def capacity(self) -> int:
+        return self.rows * self.seats_in_row
+
+    def taken_count(self) -> int:
+        return int.from_bytes(self._bits, "little").bit_count()
+
+    def free_count(self) -> int:
+        return self.capacity - self.taken_count()
+
+    def _row_value(self, value: int, row: int) -> int:
+        mask = (1 << self.seats_in_row) - 1
+        return (value >> ((row - 1) * self.seats_in_row)) & mask
+
+    def iter_rows(self) -> Iterator[List[bool]]:
+        value = int.from_bytes(self._bits, "little")
+        for r in range(1, self.rows + 1):
+            bits = self._row_value(value, r)
+            yield [bool(bits >> i & 1) for i in range(self.seats_in_row)]
+
+    def row_bitstrings(self) -> List[str]:
+        # format() puts the highest bit first, so reverse to get seat 1 first
+        value = int.from_bytes(self._bits, "little")
+        width = self.seats_in_row
+        return [
+            format(self._row_value(value, r), f"0{width}b")[::-1]
+            for r in range(1, self.rows + 1)
+        ]
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._bits)
+
+    def free_runs(self) -> List[List[Run]]:
+        if self._runs is None:
+            value = int.from_bytes(self._bits, "little")
+            mask = (1 << self.seats_in_row) - 1
+            self._runs = [
+                _row_runs(~self._row_value(value, r) & mask)
+                for r in range(1, self.rows + 1)
+            ]
+        return self._runs
+
+    def blocks(
+        self, quantity: int, row_from: int = 1, row_to: int | None = None
+    ) -> Iterator[Tuple[int, List[int]]]:
+        """Blocks of adjacent free seats: front rows first, then nearest the centre."""
+        runs = self.free_runs()
+        centre = (self.seats_in_row + 1) / 2
+        last = min(row_to or self.rows, self.rows)
+        for row in range(max(row_from, 1), last + 1):
+            starts = [
+                s
+                for start, length in runs[row - 1]
+                if length >= quantity
+                for s in range(start, start + length - quantity + 1)
+            ]
+            starts.sort(key=lambda s: (abs(s + (quantity - 1) / 2 - centre), s))
+            for s in starts:
+                yield row, list(range(s, s + quantity))
+
+    def best_block(
+        self, quantity: int, row_from: int = 1, row_to: int | None = None
+    ) -> Tuple[int, List[int]] | None:
+        return next(self.blocks(quantity, row_from, row_to), None)
+
+    def to_cache(self) -> tuple:
+        return (self.rows, self.seats_in_row, self.to_bytes(), self.free_runs())
+
+    def to_grid(self) -> List[List[dict]]:
+        return [
+            [
+                {"row": r, "seat": s, "is_taken": is_taken}
+                for s, is_taken in enumerate(row, start=1)
+            ]
+            for r, row in enumerate(self.iter_rows(), start=1)
+        ]
+
+    def to_compact(self) -> dict:
+        return {
+            "encoding": "bitstring",
+            "rows": self.rows,
+            "seats_in_row": self.seats_in_row,
+            "free": self.free_count(),
+            "data": self.row_bitstrings(),
+        }
+
 
 def performance_taken_seats(performance: Performance) -> set[Tuple[int, int]]:
-    # Generate a map of places and mark occupied ones
-    pairs = performance.tickets.values_list("row", "seat")
-    return set(pairs)
+    # Sold seats plus seats under an active hold, in one UNION query
+    sold = performance.tickets.order_by().values_list("row", "seat")
+    held = (
+        performance.holds.filter(expires_at__gt=timezone.now())
+        .order_by()
+        .values_list("row", "seat")
+    )
+    return set(sold.union(held))
 
 
-def build_seat_map(performance: Performance) -> List[List[dict]]:
+def load_seat_map(performance: Performance) -> SeatMap:
+    hall = performance.theatre_hall
+    return SeatMap.from_taken(
+        hall.rows, hall.seats_in_row, performance_taken_seats(performance)
+    )
+
+
+class SeatMapCacheStats:
+    """Hit/miss counters of the seat map cache, shared by all workers."""
+
+    HITS_KEY = "theatre:seatmap:stats:hits"
+    MISSES_KEY = "theatre:seatmap:stats:misses"
+
+    def record(self, hit: bool, count: int = 1) -> None:
+        if not count:
+            return
+        key = self.HITS_KEY if hit else self.MISSES_KEY
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key, count)
+        except ValueError:
+            # Evicted between add() and incr(); one lost sample is fine
+            pass
+
+    def reset(self) -> None:
+        cache.delete_many([self.HITS_KEY, self.MISSES_KEY])
+
+    def snapshot(self) -> dict:
+        found = cache.get_many([self.HITS_KEY, self.MISSES_KEY])
+        hits = found.get(self.HITS_KEY, 0)
+        misses = found.get(self.MISSES_KEY, 0)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+        }
+
+
+seat_map_cache_stats = SeatMapCacheStats()
+
+
+def _cache_timeout() -> int:
+    return getattr(settings, "SEAT_MAP_CACHE_TIMEOUT", 60 * 60 * 24)
+
+
+def _version_key(performance_id: int) -> str:
+    return f"theatre:seatmap:version:{performance_id}"
+
+
+def _data_key(performance_id: int, version: int) -> str:
+    return f"theatre:seatmap:{performance_id}:{version}"
+
+
+def seat_map_version(performance_id: int) -> int:
+    key = _version_key(performance_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from a clock value so an evicted counter never reuses an old
+        # version whose data key is still cached.
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_seat_map_version(
+    performance_id: int, taken: Iterable[Tuple[int, int]] = ()
+) -> None:
+    key = _version_key(performance_id)
+    try:
+        version = cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        return
+    taken = list(taken)
+    if not taken:
+        return
+    # Seats only ever become taken here, which is safe to replay on a map
+    # that already has them; frees always go through a reload instead.
+    cached = cache.get(_data_key(performance_id, version - 1))
+    if cached is None:
+        return
+    seat_map = SeatMap(*cached)
+    for r, s in taken:
+        if seat_map.contains(r, s):
+            seat_map.mark_taken(r, s)
+    cache.add(
+        _data_key(performance_id, version),
+        seat_map.to_cache(),
+        timeout=_cache_timeout(),
+    )
+
+
+def invalidate_seat_map(
+    performance_id: int, taken: Iterable[Tuple[int, int]] = ()
+) -> None:
+    """Move the seat map to a new version once the transaction commits.
+
+    Pass the seats a write has just taken to carry the cached map and its
+    free-run index over to the new version instead of reloading it.
+    """
+    taken = list(taken)
+    transaction.on_commit(lambda: bump_seat_map_version(performance_id, taken))
+
+
+def _cached_seat_map(performance_id: int) -> SeatMap | None:
+    cached = cache.get(_data_key(performance_id, seat_map_version(performance_id)))
+    if cached is None:
+        return None
+    return SeatMap(*cached)
+
+
+def peek_seat_map(performance_id: int) -> SeatMap | None:
+    # Cache-only lookup: lets conditional requests skip the database entirely.
+    # A miss is recorded by the get_seat_map() the caller falls back to.
+    seat_map = _cached_seat_map(performance_id)
+    if seat_map is not None:
+        seat_map_cache_stats.record(hit=True)
+    return seat_map
+
+
+def get_seat_map(performance: Performance) -> SeatMap:
     hall = performance.theatre_hall
-    taken = performance_taken_seats(performance)
-    grid: List[List[dict]] = []
-    for r in range(1, hall.rows + 1):
-        row_items = []
-        for s in range(1, hall.seats_in_row + 1):
-            row_items.append(
-                {
-                    "row": r,
-                    "seat": s,
-                    "is_taken": (r, s) in taken,
-                }
+    seat_map = _cached_seat_map(performance.pk)
+    if seat_map is not None and (seat_map.rows, seat_map.seats_in_row) == (
+        hall.rows,
+        hall.seats_in_row,
+    ):
+        seat_map_cache_stats.record(hit=True)
+        return seat_map
+
+    seat_map_cache_stats.record(hit=False)
+    version = seat_map_version(performance.pk)
+    seat_map = load_seat_map(performance)
+    cache.set(
+        _data_key(performance.pk, version),
+        seat_map.to_cache(),
+        timeout=_cache_timeout(),
+    )
+    return seat_map
+
+
+def load_seat_maps(performances: Sequence[Performance]) -> Dict[int, SeatMap]:
+    """Seat maps for a page of performances: cache first, one query for the rest."""
+    if not performances:
+        return {}
+    version_keys = {p.pk: _version_key(p.pk) for p in performances}
+    versions = cache.get_many(version_keys.values())
+    data_keys = {
+        p.pk: _data_key(
+            p.pk, versions.get(version_keys[p.pk]) or seat_map_version(p.pk)
+        )
+        for p in performances
+    }
+    cached = cache.get_many(data_keys.values())
+
+    seat_maps: Dict[int, SeatMap] = {}
+    misses = []
+    for performance in performances:
+        hall = performance.theatre_hall
+        entry = cached.get(data_keys[performance.pk])
+        if entry is not None and entry[:2] == (hall.rows, hall.seats_in_row):
+            seat_maps[performance.pk] = SeatMap(*entry)
+        else:
+            misses.append(performance)
+    seat_map_cache_stats.record(hit=True, count=len(seat_maps))
+    seat_map_cache_stats.record(hit=False, count=len(misses))
+
+    if misses:
+        taken = defaultdict(list)
+        miss_ids = [p.pk for p in misses]
+        sold = (
+            Ticket.objects.filter(performance_id__in=miss_ids)
+            .order_by()
+            .values_list("performance_id", "row", "seat")
+        )
+        held = (
+            SeatHold.objects.filter(
+                performance_id__in=miss_ids, expires_at__gt=timezone.now()
             )
-        grid.append(row_items)
-    return grid
+            .order_by()
+            .values_list("performance_id", "row", "seat")
+        )
+        pairs = sold.union(held)
+        for performance_id, r, s in pairs:
+            taken[performance_id].append((r, s))
+
+        to_cache = {}
+        for performance in misses:
+            hall = performance.theatre_hall
+            seat_map = SeatMap.from_taken(
+                hall.rows, hall.seats_in_row, taken[performance.pk]
+            )
+            seat_maps[performance.pk] = seat_map
+            to_cache[data_keys[performance.pk]] = seat_map.to_cache()
+        cache.set_many(to_cache, timeout=_cache_timeout())
+    return seat_maps
+
+
+def seat_map_etag(seat_map: SeatMap, seat_map_format: str) -> str:
+    digest = hashlib.blake2b(seat_map.to_bytes(), digest_size=16)
+    digest.update(f"{seat_map_format}:{seat_map.rows}x{seat_map.seats_in_row}".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def build_seat_map(performance: Performance) -> List[List[dict]]:
+    return get_seat_map(performance).to_grid()
@@ -0,0 +1,168 @@
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from .models import Actor, Genre, Play, Performance, TheatreHall, Ticket
+from .services.availability import adjust_seat_counters, refresh_seats_free
+from .services.booking import BULK_TICKET_DELETE, lock_performances
+from .services.catalog import bump_catalog_generation
+from .services.inventory import (
+    inventory_enabled,
+    mark_seats,
+    materialize_seats,
+    sync_inventory,
+)
+from .services.search import refresh_search_documents
+from .services.seats import invalidate_seat_map
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def ticket_changed(sender, instance, **kwargs):
+    invalidate_seat_map(instance.performance_id)
+
+
+@receiver(pre_save, sender=Ticket)
+def ticket_saving(sender, instance, **kwargs):
+    # An edit may move the ticket to another seat or performance; remember
+    # where it was, and lock both performances as the booking services do
+    previous = None
+    if not instance._state.adding:
+        previous = (
+            Ticket.objects.filter(pk=instance.pk)
+            .values_list("performance_id", "row", "seat")
+            .first()
+        )
+    instance._previous_seat = previous
+    performance_ids = {instance.performance_id}
+    if previous is not None:
+        performance_ids.add(previous[0])
+    lock_performances(performance_ids)
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, created, **kwargs):
+    # Booking services bulk insert and keep the inventory in step themselves;
+    # this only catches tickets written one by one, e.g. from the admin
+    performance_ids = [instance.performance_id]
+    previous = getattr(instance, "_previous_seat", None)
+    if created:
+        adjust_seat_counters({instance.performance_id: 1})
+    elif previous is not None and previous[0] != instance.performance_id:
+        adjust_seat_counters({previous[0]: -1, instance.performance_id: 1})
+        invalidate_seat_map(previous[0])
+        performance_ids.append(previous[0])
+    if inventory_enabled():
+        sync_inventory(performance_ids)
+
+
+@receiver(pre_delete, sender=Ticket)
+def ticket_deleting(sender, instance, **kwargs):
+    # Same lock order as the booking services: performance, then tickets
+    if not BULK_TICKET_DELETE.get():
+        lock_performances([instance.performance_id])
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(sender, instance, **kwargs):
+    # delete_tickets settles these in bulk; this catches the rest, e.g. the
+    # tickets of a reservation or user deleted directly
+    if BULK_TICKET_DELETE.get():
+        return
+    adjust_seat_counters({instance.performance_id: -1})
+    if inventory_enabled():
+        mark_seats(
+            Q(
+                performance_id=instance.performance_id,
+                row=instance.row,
+                seat=instance.seat,
+            ),
+            is_taken=False,
+        )
+
+
+@receiver(post_delete, sender=Performance)
+def performance_deleted(sender, instance, **kwargs):
+    invalidate_seat_map(instance.pk)
+
+
+@receiver(post_save, sender=Performance)
+def performance_saved(sender, instance, created, **kwargs):
+    if created:
+        if inventory_enabled():
+            materialize_seats(instance)
+    else:
+        # The hall may have been reassigned
+        refresh_seats_free(Performance.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=TheatreHall)
+def hall_changed(sender, instance, created, **kwargs):
+    if created:
+        return
+    refresh_seats_free(instance.performances.all())
+    performance_ids = list(instance.performances.values_list("id", flat=True))
+    for performance_id in performance_ids:
+        invalidate_seat_map(performance_id)
+    if inventory_enabled():
+        sync_inventory(performance_ids)
+
+
+@receiver(post_save, sender=Play)
+def play_saved(sender, instance, **kwargs):
+    refresh_search_documents([instance.pk])
+
+
+@receiver(m2m_changed, sender=Play.actors.through)
+@receiver(m2m_changed, sender=Play.genres.through)
+def play_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith("post_"):
+            refresh_search_documents([instance.pk])
+    elif action == "pre_clear":
+        # pk_set is not sent on clear; remember the plays before they go
+        instance._search_play_ids = list(instance.plays.values_list("pk", flat=True))
+    elif action == "post_clear":
+        refresh_search_documents(instance._search_play_ids)
+    elif action in ("post_add", "post_remove"):
+        refresh_search_documents(pk_set)
+
+
+@receiver(post_save, sender=Actor)
+@receiver(post_save, sender=Genre)
+def play_member_saved(sender, instance, created, **kwargs):
+    if not created:
+        refresh_search_documents(instance.plays.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Actor)
+@receiver(pre_delete, sender=Genre)
+def play_member_deleted(sender, instance, **kwargs):
+    play_ids = list(instance.plays.values_list("pk", flat=True))
+    transaction.on_commit(lambda: refresh_search_documents(play_ids))
+
+
+@receiver(post_save, sender=Actor)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Play)
+@receiver(post_save, sender=TheatreHall)
+@receiver(post_delete, sender=Actor)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Play)
+@receiver(post_delete, sender=TheatreHall)
+def catalog_changed(sender, **kwargs):
+    bump_catalog_generation(sender._meta.model_name)
+
+
+@receiver(m2m_changed, sender=Play.actors.through)
+@receiver(m2m_changed, sender=Play.genres.through)
+def catalog_members_changed(sender, action, **kwargs):
+    if action.startswith("post_"):
+        bump_catalog_generation("play")
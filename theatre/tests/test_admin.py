@@ -1,7 +1,12 @@
+from datetime import timedelta
+
 import pytest
 from django.contrib import admin
+from django.db import connection
 from django.urls import reverse
 from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
 from theatre.models import (
     Actor,
@@ -13,6 +18,8 @@ from theatre.models import (
     Ticket,
 )
 from theatre.admin import (
+    ESTIMATED_COUNT_THRESHOLD,
+    EstimatedCountPaginator,
     ActorAdmin,
     GenreAdmin,
     PlayAdmin,
@@ -20,6 +27,8 @@ from theatre.admin import (
     PerformanceAdmin,
     ReservationAdmin,
     TicketAdmin,
+    TicketInline,
+    estimated_count,
 )
 
 
@@ -105,3 +114,105 @@ def test_admin_pages_accessible(admin_client: Client):
     for url in urls:
         response = admin_client.get(url)
         assert response.status_code == 200
+
+
+def seed_tickets(count, user):
+    hall = TheatreHall.objects.create(
+        name=f"Hall {count}", rows=count, seats_in_row=count
+    )
+    play = Play.objects.create(title=f"Play {count}", description="...")
+    performances = [
+        Performance.objects.create(
+            play=play,
+            theatre_hall=hall,
+            show_time=timezone.now() + timedelta(days=count, hours=i),
+        )
+        for i in range(count)
+    ]
+    reservation = Reservation.objects.create(user=user)
+    Ticket.objects.bulk_create(
+        Ticket(performance=performance, reservation=reservation, row=1, seat=seat)
+        for performance in performances
+        for seat in range(1, count + 1)
+    )
+    return reservation
+
+
+def count_queries(admin_client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        assert admin_client.get(url).status_code == 200
+    return len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "url_name", ["ticket_changelist", "performance_changelist", "reservation_change"]
+)
+def test_admin_pages_do_not_query_per_row(admin_client, admin_user, url_name):
+    def url(reservation):
+        if url_name == "reservation_change":
+            return reverse(f"admin:theatre_{url_name}", args=[reservation.pk])
+        return reverse(f"admin:theatre_{url_name}")
+
+    # More rows on the changelists; more performances to choose from on
+    # the reservation's ticket inline
+    reservation = seed_tickets(2, admin_user)
+    count_queries(admin_client, url(reservation))  # warms the content types
+    before = count_queries(admin_client, url(reservation))
+    seed_tickets(4, admin_user)
+    assert count_queries(admin_client, url(reservation)) == before
+
+
+@pytest.mark.django_db
+def test_large_tables_use_the_estimated_count_paginator():
+    for model_admin in (TicketAdmin, ReservationAdmin, PerformanceAdmin):
+        assert model_admin.paginator is EstimatedCountPaginator
+        assert model_admin.show_full_result_count is False
+    assert PerformanceAdmin.date_hierarchy == "show_time"
+    assert "performance" in TicketAdmin.autocomplete_fields
+    assert "performance" in TicketInline.autocomplete_fields
+
+
+@pytest.mark.django_db
+def test_estimated_count_only_for_big_unfiltered_tables(
+    admin_user, monkeypatch, django_assert_num_queries
+):
+    seed_tickets(2, admin_user)
+    monkeypatch.setattr(
+        "theatre.admin.estimated_count", lambda qs: ESTIMATED_COUNT_THRESHOLD
+    )
+    with django_assert_num_queries(0):
+        assert EstimatedCountPaginator(Ticket.objects.all(), 10).count == (
+            ESTIMATED_COUNT_THRESHOLD
+        )
+    assert EstimatedCountPaginator(Ticket.objects.filter(seat=1), 10).count == 2
+
+    monkeypatch.setattr("theatre.admin.estimated_count", lambda qs: 10)
+    assert EstimatedCountPaginator(Ticket.objects.all(), 10).count == 4
+
+
+@pytest.mark.django_db
+def test_estimated_count_reads_pg_class(admin_user):
+    seed_tickets(2, admin_user)
+    if connection.vendor != "postgresql":
+        assert estimated_count(Ticket.objects.all()) is None
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {Ticket._meta.db_table}")
+    assert estimated_count(Ticket.objects.all()) == 4
+
+
+@pytest.mark.django_db
+def test_performance_autocomplete(admin_client, admin_user):
+    seed_tickets(2, admin_user)
+    response = admin_client.get(
+        reverse("admin:autocomplete"),
+        {
+            "app_label": "theatre",
+            "model_name": "ticket",
+            "field_name": "performance",
+            "term": "Play 2",
+        },
+    )
+    assert response.status_code == 200
+    assert len(response.json()["results"]) == 2
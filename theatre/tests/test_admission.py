@@ -0,0 +1,122 @@
+import pytest
+from django.urls import reverse
+
+from theatre.models import Performance
+from theatre.services.admission import (
+    AdmissionError,
+    booking_slot,
+    free_slots,
+    join_queue,
+    read_tokens,
+)
+
+
+@pytest.fixture
+def performance(performance):
+    Performance.objects.filter(pk=performance.pk).update(on_sale=True)
+    performance.on_sale = True
+    return performance
+
+
+def test_queue_admits_clients_as_slots_allow(settings):
+    settings.BOOKING_SLOTS_PER_PERFORMANCE = 1
+    first, second = join_queue(1, 7), join_queue(1, 7)
+    assert first["admitted"] and first["position"] == 0
+    assert not second["admitted"] and second["position"] == 1
+    assert read_tokens(f"{first['token']}, bogus,{second['token']}", 7) == {1: 2}
+
+
+def test_tokens_only_admit_the_user_who_queued():
+    token = join_queue(1, 7)["token"]
+    assert read_tokens(token, 7) == {1: 1}
+    assert read_tokens(token, 8) == {}
+
+
+def test_a_consumed_number_cannot_book_again(settings):
+    settings.BOOKING_SLOTS_PER_PERFORMANCE = 2
+    number = read_tokens(join_queue(1, 7)["token"], 7)[1]
+    with pytest.raises(RuntimeError):
+        with booking_slot(1, number, consume=True):
+            raise RuntimeError("booking failed")
+    with booking_slot(1, number, consume=True):
+        pass
+    with pytest.raises(AdmissionError, match="already been used"):
+        with booking_slot(1, number):
+            pass
+
+
+def test_booking_slots_cap_concurrency(settings):
+    settings.BOOKING_SLOTS_PER_PERFORMANCE = 1
+    number = read_tokens(join_queue(1, 7)["token"], 7)[1]
+    with booking_slot(1, number):
+        assert free_slots(1) == []
+        with pytest.raises(AdmissionError):
+            with booking_slot(1, number):
+                pass
+    assert len(free_slots(1)) == 1
+
+    with pytest.raises(AdmissionError):
+        with booking_slot(1, None):
+            pass
+
+
+@pytest.mark.django_db
+def test_on_sale_bookings_need_an_admitted_token(api_client, user, performance):
+    api_client.force_authenticate(user)
+    payload = {"performance_id": performance.pk, "seats": [{"row": 1, "seat": 1}]}
+    response = api_client.post(reverse("reservations-list"), payload, format="json")
+    assert response.status_code == 429
+    assert "Retry-After" in response
+
+    url = reverse("performance-queue", args=[performance.pk])
+    joined = api_client.post(url).data
+    assert api_client.get(url, {"token": joined["token"]}).data["admitted"]
+
+    response = api_client.post(
+        reverse("reservations-list"),
+        payload,
+        format="json",
+        HTTP_X_QUEUE_TOKEN=joined["token"],
+    )
+    assert response.status_code == 201
+
+    payload["seats"] = [{"row": 1, "seat": 2}]
+    response = api_client.post(
+        reverse("reservations-list"),
+        payload,
+        format="json",
+        HTTP_X_QUEUE_TOKEN=joined["token"],
+    )
+    assert response.status_code == 429
+
+
+@pytest.mark.django_db
+def test_queue_tokens_are_bound_to_their_user(
+    api_client, user, performance, django_user_model
+):
+    api_client.force_authenticate(user)
+    url = reverse("performance-queue", args=[performance.pk])
+    token = api_client.post(url).data["token"]
+
+    other = django_user_model.objects.create_user(email="o@example.com", password="1")
+    api_client.force_authenticate(other)
+    assert api_client.get(url, {"token": token}).status_code == 400
+    response = api_client.post(
+        reverse("performance-hold", args=[performance.pk]),
+        {"seats": [{"row": 1, "seat": 1}]},
+        format="json",
+        HTTP_X_QUEUE_TOKEN=token,
+    )
+    assert response.status_code == 429
+
+
+@pytest.mark.django_db
+def test_regular_performances_skip_the_queue(api_client, user, performance):
+    Performance.objects.filter(pk=performance.pk).update(on_sale=False)
+    api_client.force_authenticate(user)
+    response = api_client.post(
+        reverse("performance-hold", args=[performance.pk]),
+        {"seats": [{"row": 2, "seat": 2}]},
+        format="json",
+    )
+    assert response.status_code == 201
@@ -0,0 +1,129 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from theatre.models import Actor, Play, TheatreHall, Performance, Reservation, Ticket
+from theatre.services.booking import create_reservation
+
+
+@pytest.fixture
+def performance(db, django_user_model):
+    user = django_user_model.objects.create_user(email="p@example.com", password="1")
+    play = Play.objects.create(title="Hamlet")
+    hall = TheatreHall.objects.create(name="Main", rows=2, seats_in_row=3)
+    perf = Performance.objects.create(
+        play=play, theatre_hall=hall, show_time=timezone.now()
+    )
+    create_reservation(user=user, performance=perf, seats=[{"row": 1, "seat": 1}])
+    return perf
+
+
+@pytest.mark.django_db
+def test_list_returns_availability_without_seat_map(api_client, performance):
+    response = api_client.get(reverse("performance-list"))
+    assert response.status_code == 200
+    item = response.data["results"][0]
+    assert "seat_map" not in item
+    assert item["seats_taken"] == 1
+    assert item["seats_free"] == 5
+
+
+@pytest.mark.django_db
+def test_list_can_opt_into_seat_map(api_client, performance):
+    response = api_client.get(reverse("performance-list"), {"seat_map": "compact"})
+    assert response.data["results"][0]["seat_map"]["data"] == ["100", "000"]
+
+
+@pytest.mark.django_db
+def test_retrieve_keeps_full_seat_map(api_client, performance):
+    response = api_client.get(reverse("performance-detail", args=[performance.pk]))
+    assert len(response.data["seat_map"]) == 2
+    assert response.data["seats_free"] == 5
+
+
+@pytest.mark.django_db
+def test_seat_map_endpoint_conditional_get(
+    api_client, performance, django_assert_num_queries
+):
+    url = reverse("performance-seat-map", args=[performance.pk])
+    response = api_client.get(url, {"seat_map": "compact"})
+    assert response.status_code == 200
+    assert response.data["data"] == ["100", "000"]
+    etag = response["ETag"]
+
+    with django_assert_num_queries(0):
+        response = api_client.get(url, {"seat_map": "compact"}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+
+    full = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert full.status_code == 200
+    assert full["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_seat_map_etag_changes_with_bookings(
+    api_client, performance, django_capture_on_commit_callbacks
+):
+    url = reverse("performance-seat-map", args=[performance.pk])
+    etag = api_client.get(url)["ETag"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Ticket.objects.create(
+            performance=performance,
+            reservation=Reservation.objects.first(),
+            row=2,
+            seat=3,
+        )
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.data[1][2]["is_taken"] is True
+
+
+@pytest.mark.django_db
+def test_seat_map_endpoint_unknown_performance(api_client):
+    response = api_client.get(reverse("performance-seat-map", args=[999]))
+    assert response.status_code == 404
+
+
+def _list_queries(api_client, params):
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(reverse("performance-list"), params)
+    assert response.status_code == 200
+    return len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_list_with_seat_maps_runs_constant_queries(api_client, performance):
+    actor = Actor.objects.create(first_name="A", last_name="B")
+    performance.play.actors.add(actor)
+    single = _list_queries(api_client, {"seat_map": "compact"})
+
+    cache.clear()
+    hall = performance.theatre_hall
+    for day in range(1, 6):
+        play = Play.objects.create(title=f"Play {day}")
+        play.actors.add(actor)
+        Performance.objects.create(
+            play=play,
+            theatre_hall=hall,
+            show_time=performance.show_time + timedelta(days=day),
+        )
+    assert _list_queries(api_client, {"seat_map": "compact"}) == single
+    assert _list_queries(api_client, {"seat_map": "full"}) < single
+
+
+@pytest.mark.django_db
+def test_best_available_endpoint(api_client, performance):
+    url = reverse("performance-best-available", args=[performance.pk])
+    response = api_client.get(url, {"quantity": 2, "row_from": 2})
+    assert response.status_code == 200
+    assert response.data["row"] == 2
+    assert len(response.data["seats"]) == 2
+    assert api_client.get(url, {"quantity": 999}).status_code == 404
+    assert api_client.get(url, {"quantity": 0}).status_code == 400
@@ -0,0 +1,74 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from theatre.management.commands._bench import latency_summary, percentile
+from theatre.models import Performance, Ticket
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 95) == 0.0
+    assert latency_summary([0.001, 0.002])["max"] == 2.0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bench_booking_reports_json():
+    out = StringIO()
+    call_command(
+        "bench_booking",
+        "--threads=1",
+        "--bookings=10",
+        "--overlap=0.5",
+        "--rows=5",
+        "--seats-in-row=6",
+        "--seed=7",
+        stdout=out,
+    )
+    report = json.loads(out.getvalue())
+    assert report["bookings"] == 10
+    assert report["succeeded"] + report["conflicts"] + report["failed"] == 10
+    assert set(report["latency_ms"]) == {"p50", "p95", "p99", "max"}
+    assert not Performance.objects.exists()
+    assert not Ticket.objects.exists()
+
+
+@pytest.mark.django_db
+def test_bench_serializers_reports_both_paths():
+    out = StringIO()
+    call_command(
+        "bench_serializers", "--page-sizes", "3", "5", "--requests=2", stdout=out
+    )
+    report = json.loads(out.getvalue())
+    for endpoint in ("performances", "tickets"):
+        for size in ("3", "5"):
+            run = report["endpoints"][endpoint][size]
+            assert run["identical"]
+            assert run["fast"]["requests_per_s"] > 0
+    assert not Performance.objects.exists()
+    assert not Ticket.objects.exists()
+
+
+@pytest.mark.django_db
+def test_bench_renderers_reports_both_pairs():
+    out = StringIO()
+    call_command(
+        "bench_renderers",
+        "--rows=4",
+        "--seats-in-row=5",
+        "--repeat=2",
+        stdout=out,
+    )
+    report = json.loads(out.getvalue())
+    assert report["seats"] == 20
+    for payload in ("full", "compact"):
+        for step in ("render", "parse"):
+            run = report["payloads"][payload][step]
+            assert run["identical"]
+            assert run["fast"]["ops_per_s"] > 0
+    assert not Performance.objects.exists()
+    assert not Ticket.objects.exists()
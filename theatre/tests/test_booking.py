@@ -0,0 +1,319 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from theatre.models import Performance, Reservation, Ticket
+from theatre.services import booking
+from theatre.services.booking import (
+    BookingError,
+    SeatsTakenError,
+    cancel_reservation,
+    create_bundle_reservation,
+    create_reservation,
+)
+from theatre.services.seats import get_seat_map
+
+
+@pytest.mark.django_db
+def test_new_performance_starts_with_full_capacity(performance):
+    assert performance.seats_taken == 0
+    assert performance.seats_free == 10
+
+
+@pytest.mark.django_db
+def test_booking_and_cancellation_update_counters(user, performance):
+    reservation = create_reservation(
+        user=user,
+        performance=performance,
+        seats=[{"row": 1, "seat": 1}, {"row": 1, "seat": 2}],
+    )
+    performance.refresh_from_db()
+    assert (performance.seats_taken, performance.seats_free) == (2, 8)
+
+    cancel_reservation(reservation)
+    performance.refresh_from_db()
+    assert (performance.seats_taken, performance.seats_free) == (0, 10)
+    assert not Reservation.objects.exists()
+
+
+@pytest.mark.django_db
+def test_stale_save_keeps_counters(user, performance):
+    stale = Performance.objects.get(pk=performance.pk)
+    create_reservation(
+        user=user, performance=performance, seats=[{"row": 2, "seat": 5}]
+    )
+    stale.show_time = timezone.now()
+    stale.save()
+    performance.refresh_from_db()
+    assert performance.seats_taken == 1
+
+
+@pytest.mark.django_db
+def test_hall_resize_refreshes_seats_free(performance):
+    hall = performance.theatre_hall
+    hall.rows = 4
+    hall.save()
+    performance.refresh_from_db()
+    assert performance.seats_free == 20
+
+
+@pytest.mark.django_db
+def test_reconcile_command_repairs_drift(user, performance):
+    reservation = Reservation.objects.create(user=user)
+    Ticket.objects.create(
+        performance=performance, reservation=reservation, row=1, seat=3
+    )
+    Performance.objects.filter(pk=performance.pk).update(seats_taken=0)
+
+    call_command("reconcile_seat_counters")
+    performance.refresh_from_db()
+    assert (performance.seats_taken, performance.seats_free) == (1, 9)
+
+
+@pytest.mark.django_db
+def test_tickets_deleted_outside_the_services_release_their_seats(user, performance):
+    reservation = create_reservation(
+        user=user,
+        performance=performance,
+        seats=[{"row": 1, "seat": 1}, {"row": 1, "seat": 2}, {"row": 2, "seat": 1}],
+    )
+    reservation.tickets.first().delete()
+    performance.refresh_from_db()
+    assert (performance.seats_taken, performance.seats_free) == (2, 8)
+
+    # The remaining tickets go with their reservation
+    reservation.delete()
+    performance.refresh_from_db()
+    assert (performance.seats_taken, performance.seats_free) == (0, 10)
+
+
+@pytest.mark.django_db
+def test_moving_a_ticket_moves_its_seat(
+    user, performance, django_capture_on_commit_callbacks
+):
+    other = Performance.objects.create(
+        play=performance.play,
+        theatre_hall=performance.theatre_hall,
+        show_time=performance.show_time + timedelta(days=1),
+    )
+    reservation = create_reservation(
+        user=user, performance=performance, seats=[{"row": 1, "seat": 1}]
+    )
+    assert get_seat_map(performance).is_taken(1, 1)
+    assert not get_seat_map(other).is_taken(2, 3)
+
+    ticket = reservation.tickets.get()
+    ticket.performance, ticket.row, ticket.seat = other, 2, 3
+    with django_capture_on_commit_callbacks(execute=True):
+        ticket.save()
+
+    performance.refresh_from_db()
+    other.refresh_from_db()
+    assert (performance.seats_taken, performance.seats_free) == (0, 10)
+    assert (other.seats_taken, other.seats_free) == (1, 9)
+    assert not get_seat_map(performance).is_taken(1, 1)
+    assert get_seat_map(other).is_taken(2, 3)
+
+
+@pytest.mark.django_db
+def test_conflict_reports_exact_taken_seats(user, performance):
+    create_reservation(
+        user=user,
+        performance=performance,
+        seats=[{"row": 1, "seat": 2}, {"row": 2, "seat": 1}],
+    )
+    with pytest.raises(SeatsTakenError) as exc_info:
+        create_reservation(
+            user=user,
+            performance=performance,
+            seats=[{"row": 1, "seat": 1}, {"row": 2, "seat": 1}, {"row": 1, "seat": 2}],
+        )
+    assert exc_info.value.seats == [
+        (performance.pk, 1, 2),
+        (performance.pk, 2, 1),
+    ]
+    assert Reservation.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_booking_query_count_does_not_grow_with_seats(user, performance):
+    with CaptureQueriesContext(connection) as single:
+        create_reservation(
+            user=user, performance=performance, seats=[{"row": 1, "seat": 1}]
+        )
+    seats = [{"row": r, "seat": s} for r in (1, 2) for s in range(2, 6)]
+    with CaptureQueriesContext(connection) as group:
+        create_reservation(user=user, performance=performance, seats=seats)
+    assert len(group.captured_queries) == len(single.captured_queries)
+    assert performance.tickets.count() == 9
+
+
+@pytest.mark.django_db
+def test_invalid_seats_are_rejected(user, performance):
+    with pytest.raises(BookingError):
+        create_reservation(user=user, performance=performance, seats=[])
+    with pytest.raises(BookingError):
+        create_reservation(
+            user=user, performance=performance, seats=[{"row": 3, "seat": 1}]
+        )
+    with pytest.raises(BookingError):
+        create_reservation(
+            user=user,
+            performance=performance,
+            seats=[{"row": 1, "seat": 1}, {"row": 1, "seat": 1}],
+        )
+
+
+@pytest.mark.django_db
+def test_reservation_api_returns_conflicting_seats(api_client, user, performance):
+    create_reservation(
+        user=user, performance=performance, seats=[{"row": 1, "seat": 4}]
+    )
+    api_client.force_authenticate(user)
+    response = api_client.post(
+        reverse("reservations-list"),
+        {
+            "performance_id": performance.pk,
+            "seats": [{"row": 1, "seat": 4}, {"row": 1, "seat": 5}],
+        },
+        format="json",
+    )
+    assert response.status_code == 409
+    assert response.data["taken"] == [
+        {"performance": performance.pk, "row": 1, "seat": 4}
+    ]
+
+
+@pytest.fixture
+def other_performance(performance):
+    return Performance.objects.create(
+        play=performance.play,
+        theatre_hall=performance.theatre_hall,
+        show_time=performance.show_time + timedelta(days=1),
+    )
+
+
+@pytest.mark.django_db
+def test_bundle_books_several_performances_at_once(
+    user, performance, other_performance
+):
+    reservation = create_bundle_reservation(
+        user=user,
+        tickets=[
+            {"performance": other_performance.pk, "row": 2, "seat": 2},
+            {"performance": performance.pk, "row": 1, "seat": 1},
+            {"performance": other_performance.pk, "row": 1, "seat": 3},
+        ],
+    )
+    assert list(
+        reservation.tickets.order_by("id").values_list("performance_id", "row", "seat")
+    ) == [
+        (performance.pk, 1, 1),
+        (other_performance.pk, 1, 3),
+        (other_performance.pk, 2, 2),
+    ]
+    performance.refresh_from_db()
+    other_performance.refresh_from_db()
+    assert (performance.seats_taken, other_performance.seats_taken) == (1, 2)
+    assert (performance.seats_free, other_performance.seats_free) == (9, 8)
+
+    cancel_reservation(reservation)
+    other_performance.refresh_from_db()
+    assert (other_performance.seats_taken, other_performance.seats_free) == (0, 10)
+
+
+@pytest.mark.django_db
+def test_bundle_is_all_or_nothing(user, performance, other_performance):
+    create_reservation(
+        user=user, performance=other_performance, seats=[{"row": 1, "seat": 1}]
+    )
+    with pytest.raises(SeatsTakenError) as exc_info:
+        create_bundle_reservation(
+            user=user,
+            tickets=[
+                {"performance": performance.pk, "row": 1, "seat": 1},
+                {"performance": other_performance.pk, "row": 1, "seat": 1},
+            ],
+        )
+    assert exc_info.value.seats == [(other_performance.pk, 1, 1)]
+    assert not performance.tickets.exists()
+
+    with pytest.raises(BookingError):
+        create_bundle_reservation(
+            user=user, tickets=[{"performance": 0, "row": 1, "seat": 1}]
+        )
+
+
+@pytest.mark.django_db
+def test_bundle_query_count_does_not_grow_with_performances(user, performance):
+    shows = [
+        Performance.objects.create(
+            play=performance.play,
+            theatre_hall=performance.theatre_hall,
+            show_time=performance.show_time + timedelta(days=day),
+        )
+        for day in range(1, 13)
+    ]
+    with CaptureQueriesContext(connection) as pair:
+        create_bundle_reservation(
+            user=user,
+            tickets=[{"performance": p.pk, "row": 1, "seat": 1} for p in shows[:2]],
+        )
+    with CaptureQueriesContext(connection) as dozen:
+        create_bundle_reservation(
+            user=user,
+            tickets=[{"performance": p.pk, "row": 2, "seat": 1} for p in shows],
+        )
+    assert len(dozen.captured_queries) == len(pair.captured_queries)
+
+
+@pytest.mark.django_db
+def test_reservation_api_accepts_bundles(
+    api_client, user, performance, other_performance
+):
+    api_client.force_authenticate(user)
+    response = api_client.post(
+        reverse("reservations-list"),
+        {
+            "tickets": [
+                {"performance": performance.pk, "row": 1, "seat": 5},
+                {"performance": other_performance.pk, "row": 1, "seat": 5},
+            ]
+        },
+        format="json",
+    )
+    assert response.status_code == 201
+    assert len(response.data["tickets"]) == 2
+
+    response = api_client.post(
+        reverse("reservations-list"),
+        {
+            "performance_id": performance.pk,
+            "seats": [{"row": 2, "seat": 2}],
+            "tickets": [{"performance": performance.pk, "row": 2, "seat": 3}],
+        },
+        format="json",
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_single_show_writes_lock_the_performance_first(user, performance, monkeypatch):
+    locked = []
+
+    def lock(performance_ids):
+        # Tickets present when the lock is taken; none may be written yet
+        ids = sorted(performance_ids)
+        locked.append((ids, Ticket.objects.filter(performance_id__in=ids).count()))
+
+    monkeypatch.setattr(booking, "lock_performances", lock)
+    reservation = create_reservation(
+        user=user, performance=performance, seats=[{"row": 1, "seat": 1}]
+    )
+    cancel_reservation(reservation)
+    assert locked == [([performance.pk], 0), ([performance.pk], 1)]
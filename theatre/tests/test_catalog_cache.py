@@ -0,0 +1,107 @@
+import pytest
+from django.urls import reverse
+from django.utils.http import http_date
+
+from theatre.models import Actor, Genre, Play, TheatreHall
+from theatre.services import catalog
+
+
+@pytest.fixture
+def hamlet(db, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        play = Play.objects.create(title="Hamlet")
+        play.actors.add(Actor.objects.create(first_name="Ivan", last_name="Franko"))
+    return play
+
+
+@pytest.mark.django_db
+def test_repeated_reads_skip_the_database(
+    api_client, hamlet, django_assert_num_queries
+):
+    url = reverse("play-list")
+    first = api_client.get(url)
+    assert first.status_code == 200
+    assert first["ETag"] and first["Last-Modified"]
+
+    with django_assert_num_queries(0):
+        second = api_client.get(url)
+    assert second.data == first.data
+    assert second["ETag"] == first["ETag"]
+
+    other = api_client.get(url, {"fields": "title"})
+    assert other.data["results"] == [{"title": "Hamlet"}]
+    assert other["ETag"] != first["ETag"]
+
+
+@pytest.mark.django_db
+def test_conditional_requests_get_304(api_client, hamlet):
+    url = reverse("play-detail", args=[hamlet.pk])
+    response = api_client.get(url)
+
+    assert api_client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 304
+    assert api_client.get(url, HTTP_IF_NONE_MATCH='"other"').status_code == 200
+    since = response["Last-Modified"]
+    assert api_client.get(url, HTTP_IF_MODIFIED_SINCE=since).status_code == 304
+    assert api_client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(0)).status_code == 200
+
+
+@pytest.mark.django_db
+def test_changes_within_a_second_move_last_modified(
+    api_client, hamlet, monkeypatch, django_capture_on_commit_callbacks
+):
+    monkeypatch.setattr(catalog, "_now_ms", lambda: 4_000_000_000_250)
+    with django_capture_on_commit_callbacks(execute=True):
+        hamlet.save()
+    url = reverse("play-detail", args=[hamlet.pk])
+    since = api_client.get(url)["Last-Modified"]
+    assert since == http_date(4_000_000_001)
+
+    monkeypatch.setattr(catalog, "_now_ms", lambda: 4_000_000_000_750)
+    with django_capture_on_commit_callbacks(execute=True):
+        hamlet.save()
+    response = api_client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+    assert response.status_code == 200
+    assert response["Last-Modified"] == http_date(4_000_000_002)
+
+
+@pytest.mark.django_db
+def test_changes_start_a_new_generation(
+    api_client, hamlet, django_capture_on_commit_callbacks
+):
+    url = reverse("play-list")
+    etag = api_client.get(url)["ETag"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        hamlet.actors.update(first_name="Taras")
+        hamlet.actors.get().save()
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.data["results"][0]["actors"][0]["first_name"] == "Taras"
+    etag = response["ETag"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        hamlet.genres.add(Genre.objects.create(name="Drama"))
+    response = api_client.get(url)
+    assert response["ETag"] != etag
+    assert [genre["name"] for genre in response.data["results"][0]["genres"]] == [
+        "Drama"
+    ]
+
+
+@pytest.mark.django_db
+def test_unrelated_models_keep_their_generation(
+    api_client, hamlet, django_capture_on_commit_callbacks
+):
+    url = reverse("actor-list")
+    etag = api_client.get(url)["ETag"]
+    with django_capture_on_commit_callbacks(execute=True):
+        TheatreHall.objects.create(name="Main", rows=1, seats_in_row=1)
+        hamlet.save()
+    assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+
+@pytest.mark.django_db
+def test_missing_objects_are_not_cached(api_client, hamlet):
+    url = reverse("play-detail", args=[hamlet.pk + 1])
+    assert api_client.get(url).status_code == 404
+    assert "ETag" not in api_client.get(url)
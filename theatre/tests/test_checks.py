@@ -0,0 +1,22 @@
+from theatre.checks import check_shared_cache
+
+REDIS = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": "redis://redis:6379/0",
+    }
+}
+
+
+def test_per_process_cache_is_refused_with_several_workers(settings):
+    settings.GUNICORN_WORKERS = 3
+    errors = check_shared_cache(None)
+    assert [error.id for error in errors] == ["theatre.E001"]
+
+
+def test_shared_cache_or_single_worker_pass(settings):
+    settings.GUNICORN_WORKERS = 1
+    assert check_shared_cache(None) == []
+    settings.GUNICORN_WORKERS = 3
+    settings.CACHES = REDIS
+    assert check_shared_cache(None) == []
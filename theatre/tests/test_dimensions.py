@@ -0,0 +1,91 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from theatre.models import Actor, Performance, TheatreHall
+from theatre.serializers import PerformanceSerializer, PlaySerializer
+from theatre.services.seats import SEAT_MAP_NONE
+
+
+@pytest.fixture
+def performances(db, django_user_model, make_performance):
+    user = django_user_model.objects.create_user(email="n@example.com", password="1")
+    return [make_performance(i, user) for i in range(3)]
+
+
+def get(api_client, url_name, params=None):
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(reverse(url_name), params or {})
+    assert response.status_code == 200
+    return response.data["results"], [q["sql"] for q in ctx.captured_queries]
+
+
+@pytest.mark.django_db
+def test_output_matches_the_nested_serializers(api_client, performances):
+    data, _ = get(api_client, "performance-list")
+    plain = PerformanceSerializer(
+        Performance.objects.order_by("show_time"),
+        many=True,
+        context={"seat_map_default": SEAT_MAP_NONE},
+    ).data
+    assert data == plain
+
+    data, _ = get(api_client, "play-list")
+    assert data == PlaySerializer([p.play for p in performances], many=True).data
+
+
+@pytest.mark.django_db
+def test_warm_tables_leave_only_member_lookups(api_client, performances):
+    get(api_client, "performance-list")
+    _, queries = get(api_client, "performance-list")
+    tables = ("theatre_actor", "theatre_genre", "theatre_theatrehall")
+    assert not any(f'FROM "{table}"' in sql for sql in queries for table in tables)
+    assert len(queries) == 3
+
+
+@pytest.mark.django_db
+def test_a_new_generation_reloads_the_table(
+    api_client, performances, django_capture_on_commit_callbacks
+):
+    get(api_client, "performance-list")
+    actor = Actor.objects.first()
+    with django_capture_on_commit_callbacks(execute=True):
+        actor.first_name = "Taras"
+        actor.save()
+    data, _ = get(
+        api_client,
+        "performance-list",
+        {"fields": "play.actors", "expand": "play.actors"},
+    )
+    assert {"id": actor.pk, "first_name": "Taras", "last_name": "1"} in [
+        a for item in data for a in item["play"]["actors"]
+    ]
+
+
+@pytest.mark.django_db
+def test_tables_past_their_max_age_are_reloaded(api_client, performances, settings):
+    params = {"fields": "theatre_hall.name"}
+    get(api_client, "performance-list", params)
+    # No signal, so no new generation
+    hall = performances[0].theatre_hall
+    TheatreHall.objects.filter(pk=hall.pk).update(name="Renamed")
+    data, _ = get(api_client, "performance-list", params)
+    assert {"name": "Renamed"} not in [item["theatre_hall"] for item in data]
+
+    settings.DIMENSION_TABLE_MAX_AGE = 0
+    data, _ = get(api_client, "performance-list", params)
+    assert {"name": "Renamed"} in [item["theatre_hall"] for item in data]
+
+
+@pytest.mark.django_db
+def test_rows_missing_from_the_table_reload_it(api_client, performances):
+    get(api_client, "performance-list")
+    # Not committed, so no generation bump; the miss alone triggers a reload
+    hall = TheatreHall.objects.create(name="New", rows=1, seats_in_row=1)
+    Performance.objects.filter(pk=performances[0].pk).update(theatre_hall=hall)
+    data, _ = get(api_client, "performance-list", {"fields": "id,theatre_hall"})
+    halls = {item["id"]: item["theatre_hall"] for item in data}
+    assert halls[performances[0].pk] == hall.pk
+    data, _ = get(api_client, "performance-list", {"fields": "id,theatre_hall.name"})
+    assert {"name": "New"} in [item["theatre_hall"] for item in data]
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from theatre.fast_lists import compile_row_mapper
+from theatre.serializers import PerformanceSerializer, TicketSerializer
+
+# (url name, params, rows on the page) over 4 performances and their 8 tickets
+PARAMS = [
+    ("performance-list", {}, 4),
+    ("performance-list", {"page_size": 2}, 2),
+    ("performance-list", {"fields": "id,show_time,play.title,theatre_hall"}, 4),
+    ("performance-list", {"fields": "play.actors,theatre_hall.capacity"}, 4),
+    ("performance-list", {"fields": "play", "expand": "play"}, 4),
+    ("performance-list", {"play": "play 1"}, 1),
+    ("tickets-list", {}, 8),
+    ("tickets-list", {"page_size": 3}, 3),
+    ("tickets-list", {"fields": "row,seat"}, 8),
+    # Fields that leave out the cursor's ordering columns
+    ("performance-list", {"fields": "id", "page_size": 1}, 1),
+    ("tickets-list", {"fields": "row", "page_size": 1}, 1),
+]
+
+
+@pytest.fixture
+def user(api_client, django_user_model, make_performance):
+    user = django_user_model.objects.create_user(email="n@example.com", password="1")
+    api_client.force_authenticate(user)
+    for i in range(4):
+        make_performance(i, user)
+    return user
+
+
+def fetch(api_client, url_name, params):
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(reverse(url_name), params)
+    assert response.status_code == 200
+    return response.content, len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url_name,params,rows", PARAMS)
+def test_fast_list_is_byte_compatible(
+    api_client, user, settings, url_name, params, rows
+):
+    regular, _ = fetch(api_client, url_name, params)
+    assert len(json.loads(regular)["results"]) == rows
+    settings.THEATRE_FAST_LISTS = True
+    fast, _ = fetch(api_client, url_name, params)
+    assert fast == regular
+
+
+@pytest.mark.django_db
+def test_fast_list_follows_cursors(api_client, user, settings):
+    settings.THEATRE_FAST_LISTS = True
+    url = reverse("performance-list")
+    first = api_client.get(url, {"page_size": 3}).data
+    second = api_client.get(first["next"]).data
+    ids = [item["id"] for item in first["results"] + second["results"]]
+    assert len(ids) == len(set(ids)) == 4
+
+
+@pytest.mark.django_db
+def test_seat_maps_take_the_regular_path(api_client, user, settings):
+    regular, _ = fetch(api_client, "performance-list", {"seat_map": "compact"})
+    settings.THEATRE_FAST_LISTS = True
+    fast, _ = fetch(api_client, "performance-list", {"seat_map": "compact"})
+    assert fast == regular
+
+
+def test_mapper_refuses_instance_fields():
+    assert compile_row_mapper(PerformanceSerializer()) is None
+    mapper = compile_row_mapper(TicketSerializer())
+    assert mapper.columns == ["id", "performance_id", "row", "seat", "reservation_id"]
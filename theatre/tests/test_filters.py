@@ -3,6 +3,7 @@ from datetime import datetime, timedelta, timezone
 
 from theatre.models import Play, TheatreHall, Performance
 from theatre.filters import PerformanceFilter
+from theatre.services.availability import adjust_seat_counters
 
 
 @pytest.fixture
@@ -77,3 +78,56 @@ def test_filter_by_hall_name(sample_data):
     qs = f.qs
     assert sample_data["perf1"] not in qs
     assert sample_data["perf2"] in qs
+
+
+@pytest.mark.django_db
+def test_filter_available(sample_data):
+    hall2 = sample_data["hall2"]
+    adjust_seat_counters({sample_data["perf2"].pk: hall2.capacity})
+
+    qs = PerformanceFilter({"available": "true"}, queryset=Performance.objects.all()).qs
+    assert list(qs) == [sample_data["perf1"]]
+
+    qs = PerformanceFilter(
+        {"available": "false"}, queryset=Performance.objects.all()
+    ).qs
+    assert list(qs) == [sample_data["perf2"]]
+
+
+@pytest.mark.django_db
+def test_filter_min_free(sample_data):
+    qs = PerformanceFilter({"min_free": 100}, queryset=Performance.objects.all()).qs
+    assert sample_data["perf1"] in qs
+    assert sample_data["perf2"] not in qs
+
+
+@pytest.mark.django_db
+def test_filter_play_and_hall_variants(sample_data):
+    def ids(params):
+        return set(PerformanceFilter(params, queryset=Performance.objects.all()).qs)
+
+    perf1, perf2 = sample_data["perf1"], sample_data["perf2"]
+    assert ids({"play": "beth"}) == {perf2}
+    assert ids({"play_prefix": "mac"}) == {perf2}
+    assert ids({"play_prefix": "beth"}) == set()
+    assert ids({"play_exact": "HAMLET"}) == {perf1}
+    assert ids({"play_id": sample_data["play2"].pk}) == {perf2}
+    assert ids({"hall_exact": "main hall"}) == {perf1}
+    assert ids({"hall": "hall"}) == {perf1, perf2}
+    assert ids({"hall_prefix": "hall"}) == set()
+    assert ids({"hall_id": sample_data["hall1"].pk}) == {perf1}
+
+
+@pytest.mark.django_db
+def test_filter_date_is_a_half_open_range(sample_data, settings):
+    settings.TIME_ZONE = "Asia/Tokyo"
+    perf1 = sample_data["perf1"]
+    local = perf1.show_time.astimezone(timezone(timedelta(hours=9)))
+    Performance.objects.filter(pk=perf1.pk).update(
+        show_time=local.replace(hour=0, minute=30)
+    )
+    f = PerformanceFilter(
+        {"date": local.date().isoformat()}, queryset=Performance.objects.all()
+    )
+    assert list(f.qs) == [perf1]
+    assert "django_datetime_cast_date" not in str(f.qs.query)
@@ -0,0 +1,169 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from theatre.models import SeatHold, Ticket
+from theatre.services import booking
+from theatre.services import holds as hold_service
+from theatre.services.booking import SeatsTakenError, create_reservation
+from theatre.services.holds import confirm_hold, create_hold, expire_holds
+from theatre.services.seats import load_seat_map
+
+
+@pytest.fixture
+def buyers(db, django_user_model):
+    return (
+        django_user_model.objects.create_user(email="a@example.com", password="1"),
+        django_user_model.objects.create_user(email="b@example.com", password="1"),
+    )
+
+
+@pytest.mark.django_db
+def test_held_seats_are_unavailable_to_others(buyers, performance):
+    first, second = buyers
+    create_hold(user=first, performance=performance, seats=[{"row": 1, "seat": 1}])
+
+    assert load_seat_map(performance).is_taken(1, 1)
+    with pytest.raises(SeatsTakenError) as exc_info:
+        create_hold(user=second, performance=performance, seats=[{"row": 1, "seat": 1}])
+    assert exc_info.value.seats == [(performance.pk, 1, 1)]
+    with pytest.raises(SeatsTakenError):
+        create_reservation(
+            user=second, performance=performance, seats=[{"row": 1, "seat": 1}]
+        )
+
+
+@pytest.mark.django_db
+def test_a_hold_committed_after_the_precheck_blocks_the_sale(
+    buyers, performance, monkeypatch
+):
+    first, second = buyers
+    seats = [{"row": 1, "seat": 1}]
+    precheck = booking.held_among
+    calls = []
+
+    def hold_meanwhile(keys, exclude_user=None):
+        if not calls:
+            create_hold(user=first, performance=performance, seats=seats)
+        calls.append(keys)
+        return precheck(keys, exclude_user) if len(calls) > 1 else []
+
+    monkeypatch.setattr(booking, "held_among", hold_meanwhile)
+    with pytest.raises(SeatsTakenError) as exc_info:
+        create_reservation(user=second, performance=performance, seats=seats)
+    assert exc_info.value.seats == [(performance.pk, 1, 1)]
+    assert not Ticket.objects.exists()
+
+
+@pytest.mark.django_db
+def test_a_sale_committed_after_the_precheck_blocks_the_hold(
+    buyers, performance, monkeypatch
+):
+    first, second = buyers
+    seats = [{"row": 1, "seat": 1}]
+    precheck = hold_service.taken_among
+    calls = []
+
+    def sell_meanwhile(keys):
+        if not calls:
+            create_reservation(user=first, performance=performance, seats=seats)
+        calls.append(keys)
+        return precheck(keys) if len(calls) > 1 else []
+
+    monkeypatch.setattr(hold_service, "taken_among", sell_meanwhile)
+    with pytest.raises(SeatsTakenError):
+        create_hold(user=second, performance=performance, seats=seats)
+    assert not SeatHold.objects.exists()
+
+
+@pytest.mark.django_db
+def test_confirm_hold_creates_reservation(buyers, performance):
+    first, _ = buyers
+    holds = create_hold(
+        user=first,
+        performance=performance,
+        seats=[{"row": 2, "seat": 1}, {"row": 2, "seat": 2}],
+    )
+    reservation = confirm_hold(
+        user=first, performance=performance, token=holds[0].token
+    )
+
+    assert sorted(reservation.tickets.values_list("row", "seat")) == [(2, 1), (2, 2)]
+    assert not SeatHold.objects.exists()
+    performance.refresh_from_db()
+    assert performance.seats_taken == 2
+
+
+@pytest.mark.django_db
+def test_expired_holds_are_reclaimed(buyers, performance):
+    first, second = buyers
+    create_hold(user=first, performance=performance, seats=[{"row": 1, "seat": 2}])
+    SeatHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+    assert not load_seat_map(performance).is_taken(1, 2)
+    # A new hold may take over an expired one before the sweeper runs
+    create_hold(user=second, performance=performance, seats=[{"row": 1, "seat": 2}])
+    SeatHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+    assert expire_holds(batch_size=1) == 1
+    assert not SeatHold.objects.exists()
+
+
+@pytest.mark.django_db
+def test_expire_seat_holds_command(buyers, performance):
+    create_hold(user=buyers[0], performance=performance, seats=[{"row": 1, "seat": 3}])
+    SeatHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+    call_command("expire_seat_holds", "--batch-size", "10")
+    assert not SeatHold.objects.exists()
+
+
+@pytest.mark.django_db
+def test_hold_release_and_confirm_api(api_client, buyers, performance):
+    api_client.force_authenticate(buyers[0])
+    hold_url = reverse("performance-hold", args=[performance.pk])
+
+    response = api_client.post(
+        hold_url, {"seats": [{"row": 1, "seat": 4}]}, format="json"
+    )
+    assert response.status_code == 201
+    token = response.data["token"]
+    assert response.data["seats"] == [{"row": 1, "seat": 4}]
+
+    response = api_client.post(
+        reverse("performance-release", args=[performance.pk]),
+        {"token": token},
+        format="json",
+    )
+    assert response.status_code == 204
+    assert not SeatHold.objects.exists()
+
+    token = api_client.post(
+        hold_url, {"seats": [{"row": 1, "seat": 4}]}, format="json"
+    ).data["token"]
+    response = api_client.post(
+        reverse("performance-confirm", args=[performance.pk]),
+        {"token": token},
+        format="json",
+    )
+    assert response.status_code == 201
+    assert response.data["tickets"][0]["seat"] == 4
+
+    response = api_client.post(
+        reverse("performance-confirm", args=[performance.pk]),
+        {"token": token},
+        format="json",
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_hold_requires_authentication(api_client, performance):
+    response = api_client.post(
+        reverse("performance-hold", args=[performance.pk]),
+        {"seats": [{"row": 1, "seat": 1}]},
+        format="json",
+    )
+    assert response.status_code == 401
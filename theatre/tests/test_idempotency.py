@@ -0,0 +1,125 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from theatre.models import IdempotencyKey, Play, TheatreHall, Performance, Reservation
+from theatre.services.idempotency import (
+    claim_idempotency_key,
+    remember_response,
+    request_fingerprint,
+)
+
+User = get_user_model()
+
+
+@pytest.fixture
+def client_and_performance(api_client, django_user_model):
+    user = django_user_model.objects.create_user(email="i@example.com", password="1")
+    play = Play.objects.create(title="Retry")
+    hall = TheatreHall.objects.create(name="Retry hall", rows=2, seats_in_row=2)
+    performance = Performance.objects.create(
+        play=play, theatre_hall=hall, show_time=timezone.now()
+    )
+    api_client.force_authenticate(user)
+    return api_client, performance
+
+
+def _book(client, performance, key, seat=1):
+    return client.post(
+        reverse("reservations-list"),
+        {"performance_id": performance.pk, "seats": [{"row": 1, "seat": seat}]},
+        format="json",
+        HTTP_IDEMPOTENCY_KEY=key,
+    )
+
+
+@pytest.mark.django_db
+def test_retry_replays_original_response(client_and_performance):
+    client, performance = client_and_performance
+    first = _book(client, performance, "k-1")
+    assert first.status_code == 201
+
+    with CaptureQueriesContext(connection) as ctx:
+        retry = _book(client, performance, "k-1")
+    assert retry.status_code == 201
+    assert retry.data == first.data
+    assert retry["Idempotent-Replayed"] == "true"
+    assert not any("theatre_ticket" in q["sql"] for q in ctx.captured_queries)
+    assert Reservation.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_key_reused_with_different_payload(client_and_performance):
+    client, performance = client_and_performance
+    _book(client, performance, "k-2", seat=1)
+    response = _book(client, performance, "k-2", seat=2)
+    assert response.status_code == 422
+
+
+@pytest.mark.django_db
+def test_expired_key_can_be_reused(client_and_performance):
+    client, performance = client_and_performance
+    _book(client, performance, "k-3", seat=1)
+    IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+    response = _book(client, performance, "k-3", seat=2)
+    assert response.status_code == 201
+    assert Reservation.objects.count() == 2
+
+    IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+    call_command("purge_idempotency_keys")
+    assert not IdempotencyKey.objects.exists()
+
+
+@pytest.mark.django_db
+def test_failed_booking_is_not_remembered(client_and_performance):
+    client, performance = client_and_performance
+    _book(client, performance, "k-4", seat=1)
+    assert _book(client, performance, "k-5", seat=1).status_code == 409
+    assert not IdempotencyKey.objects.filter(key="k-5").exists()
+
+
+def _claim(performance, key):
+    # What a first request holds while its booking is still running
+    user = User.objects.get(email="i@example.com")
+    fingerprint = request_fingerprint(
+        {"performance_id": performance.pk, "seats": [{"row": 1, "seat": 1}]}
+    )
+    claim, stored = claim_idempotency_key(user=user, key=key, fingerprint=fingerprint)
+    assert stored is None
+    return claim
+
+
+@pytest.mark.django_db
+def test_retry_during_the_first_request_waits_for_it(client_and_performance, settings):
+    client, performance = client_and_performance
+    settings.IDEMPOTENCY_PENDING_WAIT = 0
+    claim = _claim(performance, "k-6")
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = _book(client, performance, "k-6")
+    assert response.status_code == 409
+    assert response["Retry-After"] == "1"
+    assert not any("theatre_ticket" in q["sql"] for q in ctx.captured_queries)
+
+    remember_response(claim, reservation_id=None, status_code=201, body={"id": 7})
+    response = _book(client, performance, "k-6")
+    assert response.status_code == 201
+    assert response.data == {"id": 7}
+
+
+@pytest.mark.django_db
+def test_abandoned_claim_is_taken_over(client_and_performance):
+    client, performance = client_and_performance
+    claim = _claim(performance, "k-7")
+    IdempotencyKey.objects.filter(pk=claim.pk).update(
+        created_at=timezone.now() - timedelta(minutes=5)
+    )
+    assert _book(client, performance, "k-7").status_code == 201
+    assert not IdempotencyKey.objects.get(key="k-7").pending
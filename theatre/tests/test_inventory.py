@@ -0,0 +1,182 @@
+import threading
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+
+from theatre.models import Performance, PerformanceSeat, Reservation, Ticket
+from theatre.services import allocation
+from theatre.services.allocation import _inventory_seat_map, allocate_best_seats
+from theatre.services.booking import BookingError, cancel_reservation
+from theatre.services.holds import create_hold
+
+
+@pytest.fixture
+def materialized(settings):
+    settings.THEATRE_SEAT_INVENTORY = "materialized"
+
+
+def taken_seats(performance):
+    return list(
+        PerformanceSeat.objects.filter(performance=performance, is_taken=True)
+        .order_by("row", "seat")
+        .values_list("row", "seat")
+    )
+
+
+@pytest.mark.django_db
+def test_inventory_follows_bookings(materialized, user, performance):
+    assert PerformanceSeat.objects.filter(performance=performance).count() == 10
+
+    reservation = allocate_best_seats(user=user, performance=performance, quantity=3)
+    assert taken_seats(performance) == [(1, 2), (1, 3), (1, 4)]
+
+    cancel_reservation(reservation)
+    assert taken_seats(performance) == []
+
+
+@pytest.mark.django_db
+def test_locked_allocation_skips_taken_and_held_seats(materialized, user, performance):
+    allocate_best_seats(user=user, performance=performance, quantity=2)
+    create_hold(user=user, performance=performance, seats=[{"row": 2, "seat": 1}])
+
+    seat_map = _inventory_seat_map(performance)
+    assert seat_map.taken_count() == 3
+    assert seat_map.is_taken(1, 2) and seat_map.is_taken(2, 1)
+
+    PerformanceSeat.objects.filter(performance=performance).delete()
+    assert _inventory_seat_map(performance) is None
+
+
+@pytest.mark.django_db
+def test_inventory_follows_direct_ticket_deletes(materialized, user, performance):
+    reservation = allocate_best_seats(user=user, performance=performance, quantity=2)
+    reservation.delete()
+    assert taken_seats(performance) == []
+    performance.refresh_from_db()
+    assert (performance.seats_taken, performance.seats_free) == (0, 10)
+
+
+@pytest.mark.django_db
+def test_reconcile_command_repairs_the_inventory(materialized, user, performance):
+    allocate_best_seats(user=user, performance=performance, quantity=2)
+    PerformanceSeat.objects.filter(performance=performance).update(is_taken=False)
+    PerformanceSeat.objects.filter(performance=performance, row=2, seat=5).update(
+        is_taken=True
+    )
+
+    call_command("reconcile_seat_counters")
+    assert taken_seats(performance) == [(1, 2), (1, 3)]
+
+
+@pytest.mark.django_db
+def test_inventory_is_resynced_after_hall_resize(materialized, user, performance):
+    Ticket.objects.create(
+        performance=performance,
+        reservation=user.reservations.create(),
+        row=2,
+        seat=5,
+    )
+    assert taken_seats(performance) == [(2, 5)]
+
+    hall = performance.theatre_hall
+    hall.rows, hall.seats_in_row = 3, 5
+    hall.save()
+    assert PerformanceSeat.objects.filter(performance=performance).count() == 15
+
+
+@pytest.mark.django_db
+def test_allocation_fills_the_hall_then_gives_up(user, performance):
+    for expected in ([2, 3, 4], [2, 3, 4]):
+        reservation = allocate_best_seats(
+            user=user, performance=performance, quantity=3
+        )
+        assert [t.seat for t in reservation.tickets.all()] == expected
+    with pytest.raises(BookingError):
+        allocate_best_seats(user=user, performance=performance, quantity=2)
+    performance.refresh_from_db()
+    assert performance.seats_free == 4
+
+
+@pytest.mark.django_db
+def test_allocate_endpoint(api_client, user, performance):
+    api_client.force_authenticate(user)
+    url = reverse("performance-allocate", args=[performance.pk])
+    response = api_client.post(url, {"quantity": 5}, format="json")
+    assert response.status_code == 201
+    assert len(response.data["tickets"]) == 5
+    assert api_client.post(url, {"quantity": 6}, format="json").status_code == 400
+
+
+@pytest.mark.django_db
+def test_inventory_follows_tickets_moved_between_performances(
+    materialized, user, performance
+):
+    other = Performance.objects.create(
+        play=performance.play,
+        theatre_hall=performance.theatre_hall,
+        show_time=performance.show_time + timedelta(days=1),
+    )
+    reservation = allocate_best_seats(user=user, performance=performance, quantity=1)
+    ticket = reservation.tickets.get()
+    ticket.performance = other
+    ticket.save()
+    assert taken_seats(performance) == []
+    assert taken_seats(other) == [(ticket.row, ticket.seat)]
+
+
+@pytest.mark.skipif(
+    not connection.features.has_select_for_update_skip_locked,
+    reason="needs SELECT ... FOR UPDATE SKIP LOCKED (TEST_DATABASE=postgres)",
+)
+@pytest.mark.django_db(transaction=True)
+def test_disjoint_allocations_do_not_block_each_other(
+    materialized, user, performance, monkeypatch
+):
+    claimed, release = threading.Event(), threading.Event()
+    book = allocation.book_claimed_seats
+
+    def pause_first(**kwargs):
+        # The first request sits on its claimed seats, uncommitted
+        if threading.current_thread().name == "first":
+            claimed.set()
+            release.wait(timeout=10)
+        return book(**kwargs)
+
+    monkeypatch.setattr(allocation, "book_claimed_seats", pause_first)
+    results = {}
+
+    def allocate():
+        name = threading.current_thread().name
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SET lock_timeout = '2s'")
+            results[name] = allocate_best_seats(
+                user=user, performance=performance, quantity=2
+            )
+        except Exception as exc:
+            results[name] = exc
+        finally:
+            connection.close()
+
+    first = threading.Thread(target=allocate, name="first")
+    second = threading.Thread(target=allocate, name="second")
+    first.start()
+    assert claimed.wait(timeout=10)
+    second.start()
+    second.join(timeout=10)
+    # Done while the first still holds its seats and has not committed
+    assert isinstance(results.get("second"), Reservation), results
+    release.set()
+    first.join(timeout=10)
+    assert isinstance(results.get("first"), Reservation), results
+
+    seats = [
+        set(reservation.tickets.values_list("row", "seat"))
+        for reservation in (results["first"], results["second"])
+    ]
+    assert len(seats[0]) == len(seats[1]) == 2 and not seats[0] & seats[1]
+    performance.refresh_from_db()
+    assert (performance.seats_taken, performance.seats_free) == (4, 6)
@@ -0,0 +1,121 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+
+from theatre.models import Play, TheatreHall
+from theatre.services.manifest import MANIFEST_COLUMNS
+
+URL = reverse("tickets-manifest")
+
+
+@pytest.fixture
+def performances(db, django_user_model, make_performance):
+    user = django_user_model.objects.create_user(email="c@example.com", password="1")
+    return [make_performance(i, user) for i in range(3)]
+
+
+@pytest.fixture
+def staff(api_client, django_user_model):
+    user = django_user_model.objects.create_user(
+        email="box@example.com", password="1", is_staff=True
+    )
+    api_client.force_authenticate(user)
+    return user
+
+
+def read(response):
+    assert response.status_code == 200
+    assert response.streaming
+    return b"".join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+def test_csv_manifest_of_one_performance(api_client, staff, performances):
+    performance = performances[1]
+    response = api_client.get(URL, {"performance": performance.pk})
+    assert response["Content-Type"] == "text/csv; charset=utf-8"
+    assert (
+        f'filename="manifest-performance-{performance.pk}.csv"'
+        in response["Content-Disposition"]
+    )
+    rows = list(csv.DictReader(io.StringIO(read(response))))
+    assert list(rows[0]) == list(MANIFEST_COLUMNS)
+    assert [(r["row"], r["seat"]) for r in rows] == [("1", "1"), ("2", "2")]
+    assert {r["performance_id"] for r in rows} == {str(performance.pk)}
+    assert rows[0]["email"] == "c@example.com"
+    assert rows[0]["play"] == performance.play.title
+    assert rows[0]["show_time"].endswith("Z")
+
+
+@pytest.mark.django_db
+def test_csv_cells_never_start_a_formula(api_client, staff, performances):
+    performance = performances[0]
+    Play.objects.filter(pk=performance.play_id).update(title='=HYPERLINK("x")')
+    TheatreHall.objects.filter(pk=performance.theatre_hall_id).update(name="@SUM(A1)")
+    get_user_model().objects.filter(email="c@example.com").update(
+        email="-2+3@example.com"
+    )
+
+    response = api_client.get(URL, {"performance": performance.pk})
+    row = next(csv.DictReader(io.StringIO(read(response))))
+    assert row["play"] == '\'=HYPERLINK("x")'
+    assert row["hall"] == "'@SUM(A1)"
+    assert row["email"] == "'-2+3@example.com"
+    assert row["show_time"][0].isdigit()
+
+    response = api_client.get(URL, {"performance": performance.pk, "output": "ndjson"})
+    assert json.loads(read(response).splitlines()[0])["play"] == '=HYPERLINK("x")'
+
+
+@pytest.mark.django_db
+def test_ndjson_manifest_of_a_date_range(
+    api_client, staff, performances, settings, django_assert_max_num_queries
+):
+    settings.MANIFEST_CHUNK_SIZE = 1
+    now = timezone.now()
+    params = {
+        "date_from": (now - timedelta(minutes=1)).isoformat(),
+        "date_to": (now + timedelta(hours=1, minutes=1)).isoformat(),
+        "output": "ndjson",
+    }
+    with django_assert_max_num_queries(2):
+        response = api_client.get(URL, params)
+        lines = read(response).splitlines()
+    assert response["Content-Type"] == "application/x-ndjson"
+    tickets = [json.loads(line) for line in lines]
+    assert [t["performance_id"] for t in tickets] == [
+        performances[0].pk,
+        performances[0].pk,
+        performances[1].pk,
+        performances[1].pk,
+    ]
+    assert set(tickets[0]) == set(MANIFEST_COLUMNS)
+
+
+@pytest.mark.django_db
+def test_manifest_is_staff_only(api_client, performances):
+    params = {"performance": performances[0].pk}
+    assert api_client.get(URL, params).status_code == 401
+    api_client.force_authenticate(performances[0].tickets.first().reservation.user)
+    assert api_client.get(URL, params).status_code == 403
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "params,status",
+    [
+        ({}, 400),
+        ({"date_from": "2030-01-01T00:00:00Z"}, 400),
+        ({"date_from": "2030-01-02T00:00Z", "date_to": "2030-01-01T00:00Z"}, 400),
+        ({"performance": 1, "output": "xml"}, 400),
+        ({"performance": 999999}, 404),
+    ],
+)
+def test_manifest_rejects_bad_parameters(api_client, staff, params, status):
+    assert api_client.get(URL, params).status_code == status
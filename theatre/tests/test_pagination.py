@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from theatre.models import TheatreHall, Performance, Reservation
+
+
+@pytest.fixture
+def performances(play, hall):
+    start = timezone.now()
+    return [
+        Performance.objects.create(
+            play=play, theatre_hall=hall, show_time=start + timedelta(hours=i)
+        )
+        for i in range(5)
+    ]
+
+
+def walk(api_client, url, params):
+    ids, queries = [], []
+    while url:
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(url, params)
+        params = None
+        queries.append(ctx.captured_queries)
+        ids += [item["id"] for item in response.data["results"]]
+        url = response.data["next"]
+    return ids, queries
+
+
+@pytest.mark.django_db
+def test_performances_page_by_cursor(api_client, performances):
+    ids, queries = walk(api_client, reverse("performance-list"), {"page_size": 2})
+    assert ids == [p.pk for p in performances]
+    assert len(queries) == 3
+    assert all(
+        "COUNT" not in q["sql"].upper() and "OFFSET" not in q["sql"].upper()
+        for page in queries
+        for q in page
+    )
+
+
+@pytest.mark.django_db
+def test_page_number_mode_is_kept(api_client, performances):
+    response = api_client.get(reverse("performance-list"), {"page": 2, "page_size": 2})
+    assert response.data["count"] == 5
+    assert [item["id"] for item in response.data["results"]] == [
+        performances[2].pk,
+        performances[3].pk,
+    ]
+
+
+@pytest.mark.django_db
+def test_reservations_page_newest_first(api_client, django_user_model):
+    user = django_user_model.objects.create_user(email="p@example.com", password="1")
+    reservations = [Reservation.objects.create(user=user) for _ in range(3)]
+    api_client.force_authenticate(user)
+    ids, _ = walk(api_client, reverse("reservations-list"), {"page_size": 2})
+    assert ids == [r.pk for r in reversed(reservations)]
+
+
+@pytest.mark.django_db
+def test_shows_starting_together_span_pages(api_client, performances):
+    start = performances[0].show_time + timedelta(minutes=30)
+    together = [
+        Performance.objects.create(
+            play=performances[0].play,
+            theatre_hall=TheatreHall.objects.create(
+                name=f"Stage {i}", rows=1, seats_in_row=1
+            ),
+            show_time=start,
+        )
+        for i in range(4)
+    ]
+    expected = [performances[0].pk] + [p.pk for p in together]
+    expected += [p.pk for p in performances[1:]]
+
+    ids, _ = walk(api_client, reverse("performance-list"), {"page_size": 2})
+    assert ids == expected
+
+    # And back again from the last page
+    url = reverse("performance-list")
+    response = api_client.get(url, {"page_size": 3})
+    while response.data["next"]:
+        response = api_client.get(response.data["next"])
+    ids = [item["id"] for item in response.data["results"]]
+    while response.data["previous"]:
+        response = api_client.get(response.data["previous"])
+        ids = [item["id"] for item in response.data["results"]] + ids
+    assert ids == expected
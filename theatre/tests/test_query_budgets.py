@@ -0,0 +1,79 @@
+"""Query counts of list endpoints must not grow with the number of rows."""
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from theatre.middleware import DuplicateQueryMiddleware
+
+SMALL, LARGE = 1, 50
+
+
+# Each endpoint's rows are built by the named conftest factory fixture
+ENDPOINTS = {
+    "actors": ("actor-list", {}, "make_play"),
+    "genres": ("genre-list", {}, "make_play"),
+    "plays": ("play-list", {}, "make_play"),
+    "plays-search": ("play-list", {"search": "play"}, "make_play"),
+    "halls": ("theatrehall-list", {}, "make_performance"),
+    "performances": ("performance-list", {}, "make_performance"),
+    "performances-filtered": (
+        "performance-list",
+        {"play": "play 1", "available": "true"},
+        "make_performance",
+    ),
+    "performances-seat-maps": (
+        "performance-list",
+        {"seat_map": "compact"},
+        "make_performance",
+    ),
+    "reservations": ("reservations-list", {}, "make_performance"),
+    "tickets": ("tickets-list", {}, "make_performance"),
+}
+
+# Filtered endpoints -> rows returned for the small and the large run (rows are
+# numbered from 1, so "play 1" is Play 1, then Play 1 and Play 10-19)
+FILTERED_COUNTS = {"performances-filtered": (1, 11)}
+
+
+def count_queries(api_client, url_name, params):
+    # Budgets are about the uncached path; catalog responses are cached
+    cache.clear()
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(reverse(url_name), {"page_size": LARGE, **params})
+    assert response.status_code == 200, response.data
+    return len(ctx.captured_queries), response.data
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+def test_list_query_count_is_flat(endpoint, api_client, django_user_model, request):
+    url_name, params, factory = ENDPOINTS[endpoint]
+    factory = request.getfixturevalue(factory)
+    user = django_user_model.objects.create_user(email="n@example.com", password="1")
+    api_client.force_authenticate(user)
+    factory(SMALL, user)
+    small, small_data = count_queries(api_client, url_name, params)
+    for i in range(SMALL + 1, LARGE + 1):
+        factory(i, user)
+    large, large_data = count_queries(api_client, url_name, params)
+    assert large == small, f"{endpoint}: {small} queries for 1 row, {large} for 50"
+    if endpoint in FILTERED_COUNTS:
+        counts = len(small_data["results"]), len(large_data["results"])
+        assert counts == FILTERED_COUNTS[endpoint]
+
+
+@pytest.mark.django_db
+def test_duplicate_query_middleware_flags_repeats(rf, settings, caplog, make_play):
+    settings.THEATRE_DETECT_DUPLICATE_QUERIES = True
+    plays = [make_play(i) for i in range(3)]
+
+    def n_plus_one(request):
+        return HttpResponse(str([list(play.actors.all()) for play in plays]))
+
+    response = DuplicateQueryMiddleware(n_plus_one)(rf.get("/plays/"))
+    assert response["X-Duplicate-Queries"] == "3"
+    assert "ran 3 times" in caplog.text
@@ -0,0 +1,184 @@
+"""Main queries of the list endpoints must be served by indexes.
+
+Every SELECT an endpoint runs is EXPLAINed; a sequential scan or a sort over
+one of the big tables fails the test. On PostgreSQL (TEST_DATABASE=postgres)
+seq scans and sorts are disabled for the session, so any that remain in a
+plan had no index to fall back on.
+"""
+
+import json
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from theatre.models import Performance, PerformanceSeat, Reservation, SeatHold, Ticket
+
+LARGE_TABLES = {
+    model._meta.db_table
+    for model in (Performance, Reservation, Ticket, SeatHold, PerformanceSeat)
+}
+
+ENDPOINTS = {
+    "performances": ("performance-list", {}),
+    "performances-by-date": ("performance-list", {"date": "2030-01-01"}),
+    "performances-by-play-prefix": ("performance-list", {"play_prefix": "play 3"}),
+    "performances-by-play": ("performance-list", {"play": "ay 3"}),
+    "performances-by-play-id": (
+        "performance-list",
+        {"play_id": lambda shows: shows[2].play_id},
+    ),
+    "performances-by-hall-prefix": ("performance-list", {"hall_prefix": "hall 3"}),
+    "performances-by-hall-id": (
+        "performance-list",
+        {"hall_id": lambda shows: shows[2].theatre_hall_id},
+    ),
+    "performances-available": ("performance-list", {"available": "true"}),
+    "performances-seat-maps": ("performance-list", {"seat_map": "compact"}),
+    "reservations": ("reservations-list", {}),
+    "tickets": ("tickets-list", {}),
+}
+
+# Filtered endpoints -> how many of the five shows they match, so a filter
+# that is never applied cannot pass with a trivially good plan
+EXPECTED_COUNTS = {
+    "performances-by-date": 2,
+    "performances-by-play-prefix": 1,
+    "performances-by-play": 1,
+    "performances-by-play-id": 1,
+    "performances-by-hall-prefix": 1,
+    "performances-by-hall-id": 1,
+    "performances-available": 4,
+}
+
+# Filters whose pages must come straight off their composite index, already in
+# cursor order; walking the show_time index and discarding rows would also pass
+# the checks above
+EXPECTED_INDEXES = {
+    "performances-by-play-id": "performance_play_time_idx",
+    "performances-by-hall-id": "performance_hall_time_idx",
+}
+
+# (endpoint, table) -> why a sort there is fine
+ALLOWED_SORTS = {
+    # Tickets are reached through the user's reservations, so ordering them by
+    # id sorts one user's tickets, never the table
+    ("tickets", "theatre_ticket"): "bounded by one user's tickets",
+}
+
+
+def capture_selects(api_client, url_name, params):
+    statements = []
+
+    def record(execute, sql, sql_params, many, context):
+        if sql.lstrip().upper().startswith("SELECT"):
+            statements.append((sql, sql_params))
+        return execute(sql, sql_params, many, context)
+
+    with connection.execute_wrapper(record):
+        response = api_client.get(reverse(url_name), {"page_size": 5, **params})
+    assert response.status_code == 200, response.data
+    return response, statements
+
+
+def main_table(sql):
+    match = re.search(r'FROM "(\w+)"', sql)
+    return match and match.group(1)
+
+
+def sqlite_problems(cursor, sql, params):
+    cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+    problems, indexes = [], set()
+    for row in cursor.fetchall():
+        detail = row[-1]
+        indexes.update(re.findall(r"USING (?:COVERING )?INDEX (\w+)", detail))
+        scan = re.match(r"SCAN (\w+)", detail)
+        if scan and scan.group(1) in LARGE_TABLES and " USING " not in detail:
+            problems.append(("seq scan", scan.group(1)))
+        if detail.startswith("USE TEMP B-TREE FOR") and main_table(sql) in LARGE_TABLES:
+            problems.append(("sort", main_table(sql)))
+    return problems, indexes
+
+
+def _relations(node):
+    if "Relation Name" in node:
+        yield node["Relation Name"]
+    for child in node.get("Plans", ()):
+        yield from _relations(child)
+
+
+def _postgres_nodes(node):
+    yield node
+    for child in node.get("Plans", ()):
+        yield from _postgres_nodes(child)
+
+
+def postgres_problems(cursor, sql, params):
+    cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    problems, indexes = [], set()
+    for node in _postgres_nodes(plan[0]["Plan"]):
+        if "Index Name" in node:
+            indexes.add(node["Index Name"])
+        if node["Node Type"] == "Seq Scan" and node["Relation Name"] in LARGE_TABLES:
+            problems.append(("seq scan", node["Relation Name"]))
+        if node["Node Type"] in ("Sort", "Incremental Sort"):
+            problems += [
+                ("sort", table)
+                for table in set(_relations(node))
+                if table in LARGE_TABLES
+            ]
+    return problems, indexes
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+def test_endpoint_queries_use_indexes(
+    endpoint, api_client, django_user_model, make_performance
+):
+    url_name, params = ENDPOINTS[endpoint]
+    user = django_user_model.objects.create_user(email="n@example.com", password="1")
+    api_client.force_authenticate(user)
+    shows = [make_performance(i, user) for i in range(5)]
+    Performance.objects.update(show_time=timezone.now() + timedelta(days=1))
+    Performance.objects.filter(pk__in=[shows[0].pk, shows[1].pk]).update(
+        show_time=timezone.make_aware(datetime(2030, 1, 1, 19))
+    )
+    Performance.objects.filter(pk=shows[4].pk).update(seats_free=0)
+    params = {
+        key: value(shows) if callable(value) else value for key, value in params.items()
+    }
+
+    response, statements = capture_selects(api_client, url_name, params)
+    assert statements
+    if endpoint in EXPECTED_COUNTS:
+        assert len(response.data["results"]) == EXPECTED_COUNTS[endpoint]
+
+    found, used = [], set()
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SET enable_seqscan = off")
+            cursor.execute("SET enable_sort = off")
+            explain = postgres_problems
+        else:
+            explain = sqlite_problems
+        try:
+            for sql, sql_params in statements:
+                problems, indexes = explain(cursor, sql, sql_params)
+                used |= indexes
+                for kind, table in problems:
+                    if kind == "sort" and (endpoint, table) in ALLOWED_SORTS:
+                        continue
+                    found.append(f"{kind} on {table}: {sql}")
+        finally:
+            if connection.vendor == "postgresql":
+                cursor.execute("RESET enable_seqscan")
+                cursor.execute("RESET enable_sort")
+    assert not found, "\n".join(found)
+    if endpoint in EXPECTED_INDEXES:
+        assert EXPECTED_INDEXES[endpoint] in used, sorted(used)
@@ -0,0 +1,84 @@
+import io
+import uuid
+from datetime import date, datetime, time, timezone as dt_timezone
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+from theatre import renderers
+from theatre.renderers import FastJSONParser, FastJSONRenderer
+
+PAYLOAD = {
+    "when": datetime(2026, 5, 1, 19, 30, 15, 123456, tzinfo=dt_timezone.utc),
+    "naive": datetime(2026, 5, 1, 19, 30),
+    "day": date(2026, 5, 1),
+    "at": time(19, 30, 0, 500000),
+    "price": Decimal("12.50"),
+    "id": uuid.UUID(int=7),
+    "label": gettext_lazy("Théâtre\u2028line"),
+    "seats": ({"row": 1, "seat": 2, "is_taken": True},),
+    "taken": {3},
+    1: ReturnDict({"nested": None}, serializer=None),
+    "big": 2**70,
+}
+# Apart from PAYLOAD, whose big integer already sends it down the stdlib path
+FLOATS = {"prices": [0.1, -2.5, 1e16, 1.5e-7], "ratio": -3e-5, "max": 1e22}
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def backend(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(renderers, "orjson", None)
+    elif renderers.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+def test_renders_what_drf_renders(backend):
+    assert renderers.backend() == backend
+    expected = JSONRenderer().render(PAYLOAD)
+    assert FastJSONRenderer().render(PAYLOAD) == expected
+    assert b'"2026-05-01T19:30:15.123456Z"' in expected
+    assert b"\\u2028" in expected
+    expected = JSONRenderer().render(FLOATS)
+    assert FastJSONRenderer().render(FLOATS) == expected
+    assert b"1e+16,1.5e-07" in expected
+
+
+def test_indent_and_empty_bodies(backend):
+    context = {"indent": 4}
+    assert FastJSONRenderer().render(PAYLOAD, renderer_context=context) == (
+        JSONRenderer().render(PAYLOAD, renderer_context=context)
+    )
+    assert FastJSONRenderer().render(None) == b""
+
+
+def test_parser_round_trip(backend):
+    body = '{"row": 1, "seats": [1.5, null], "name": "Théâtre"}'.encode()
+    parsed = FastJSONParser().parse(io.BytesIO(body))
+    assert parsed == JSONParser().parse(io.BytesIO(body))
+    latin = FastJSONParser().parse(
+        io.BytesIO('"é"'.encode("latin-1")), parser_context={"encoding": "latin-1"}
+    )
+    assert latin == "é"
+    for bad in (b"{", b'{"a": NaN}'):
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(io.BytesIO(bad))
+
+
+@pytest.mark.django_db
+def test_api_responses_use_the_fast_renderer(
+    api_client, django_user_model, make_performance
+):
+    user = django_user_model.objects.create_user(email="r@example.com", password="1")
+    performance = make_performance(0, user)
+    url = reverse("performance-detail", args=[performance.pk])
+    response = api_client.get(url)
+    assert isinstance(response.accepted_renderer, FastJSONRenderer)
+    assert response.content == JSONRenderer().render(response.data)
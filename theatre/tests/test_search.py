@@ -0,0 +1,63 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from theatre.models import Actor, Genre, Play, PlaySearchDocument
+from theatre.services.search import search_plays, search_terms
+
+
+@pytest.fixture
+def catalog(db):
+    hamlet = Play.objects.create(title="Hamlet")
+    lear = Play.objects.create(title="King Lear")
+    ghosts = Play.objects.create(title="Ghosts")
+    tragedy = Genre.objects.create(name="Tragedy")
+    actor = Actor.objects.create(first_name="Hamlin", last_name="Stone")
+    hamlet.genres.add(tragedy)
+    lear.genres.add(tragedy)
+    lear.actors.add(actor)
+    return hamlet, lear, ghosts
+
+
+def titles(queryset):
+    return [play.title for play in queryset]
+
+
+def test_search_terms_drop_operators():
+    assert search_terms('ham* OR "lear" -x:y') == ["ham", "or", "lear", "x", "y"]
+
+
+@pytest.mark.django_db
+def test_documents_follow_plays_and_members(catalog):
+    hamlet, lear, _ = catalog
+    assert PlaySearchDocument.objects.get(play=lear).body == "Hamlin Stone Tragedy"
+
+    Actor.objects.get().plays.clear()
+    Genre.objects.filter(name="Tragedy").update(name="Drama")
+    Genre.objects.get().save()
+    assert PlaySearchDocument.objects.get(play=lear).body == "Drama"
+
+    hamlet.delete()
+    assert not PlaySearchDocument.objects.filter(play_id=hamlet.pk).exists()
+
+
+@pytest.mark.django_db
+def test_search_ranks_title_matches_first(catalog):
+    assert titles(search_plays(Play.objects.all(), "haml")) == ["Hamlet", "King Lear"]
+    assert titles(search_plays(Play.objects.all(), "tragedy lear")) == ["King Lear"]
+    assert titles(search_plays(Play.objects.all(), "nothing")) == []
+
+
+@pytest.mark.django_db
+def test_play_search_endpoint_has_no_duplicates(api_client, catalog):
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(reverse("play-list"), {"search": "tragedy"})
+    assert response.status_code == 200
+    assert sorted(item["title"] for item in response.data["results"]) == [
+        "Hamlet",
+        "King Lear",
+    ]
+    assert not any(
+        "JOIN" in q["sql"] and "LIKE" in q["sql"] for q in ctx.captured_queries
+    )
@@ -0,0 +1,163 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from rest_framework.request import Request
+
+from theatre.models import Play, TheatreHall, Performance, Reservation, Ticket
+from theatre.serializers import PerformanceSerializer
+from theatre.services.booking import create_reservation
+from theatre.services.seats import (
+    SeatMap,
+    build_seat_map,
+    get_seat_map,
+    load_seat_map,
+    seat_map_cache_stats,
+)
+
+
+@pytest.fixture
+def booked_performance(db, django_user_model):
+    user = django_user_model.objects.create_user(email="s@example.com", password="1")
+    play = Play.objects.create(title="Seats")
+    hall = TheatreHall.objects.create(name="Bits", rows=3, seats_in_row=4)
+    perf = Performance.objects.create(
+        play=play, theatre_hall=hall, show_time=timezone.now()
+    )
+    res = Reservation.objects.create(user=user)
+    Ticket.objects.create(performance=perf, reservation=res, row=1, seat=2)
+    Ticket.objects.create(performance=perf, reservation=res, row=3, seat=4)
+    return perf
+
+
+def test_seat_map_bits_and_counts():
+    seat_map = SeatMap.from_taken(2, 5, [(1, 1), (2, 5), (9, 9)])
+    assert seat_map.is_taken(1, 1)
+    assert seat_map.is_taken(2, 5)
+    assert not seat_map.is_taken(1, 2)
+    assert seat_map.taken_count() == 2
+    assert seat_map.free_count() == 8
+
+    seat_map.mark_free(1, 1)
+    assert not seat_map.is_taken(1, 1)
+    assert seat_map.free_count() == 9
+
+
+def test_seat_map_rows_and_bytes_roundtrip():
+    seat_map = SeatMap.from_taken(2, 3, [(1, 3), (2, 1)])
+    assert list(seat_map.iter_rows()) == [[False, False, True], [True, False, False]]
+    assert seat_map.row_bitstrings() == ["001", "100"]
+
+    restored = SeatMap(2, 3, seat_map.to_bytes())
+    assert restored.row_bitstrings() == ["001", "100"]
+
+
+def test_seat_map_rejects_seat_outside_hall():
+    seat_map = SeatMap(2, 2)
+    with pytest.raises(IndexError):
+        seat_map.is_taken(3, 1)
+
+
+@pytest.mark.django_db
+def test_build_seat_map_keeps_grid_format(booked_performance):
+    grid = build_seat_map(booked_performance)
+    assert len(grid) == 3
+    assert len(grid[0]) == 4
+    assert grid[0][1] == {"row": 1, "seat": 2, "is_taken": True}
+    assert grid[0][0] == {"row": 1, "seat": 1, "is_taken": False}
+    assert grid[2][3]["is_taken"] is True
+
+
+@pytest.mark.django_db
+def test_compact_seat_map_via_serializer(booked_performance):
+    request = Request(APIRequestFactory().get("/", {"seat_map": "compact"}))
+    data = PerformanceSerializer(booked_performance, context={"request": request}).data
+    assert data["seat_map"] == {
+        "encoding": "bitstring",
+        "rows": 3,
+        "seats_in_row": 4,
+        "free": 10,
+        "data": ["0100", "0000", "0001"],
+    }
+    assert load_seat_map(booked_performance).free_count() == 10
+
+
+@pytest.mark.django_db
+def test_cached_seat_map_skips_database(booked_performance, django_assert_num_queries):
+    seat_map_cache_stats.reset()
+    get_seat_map(booked_performance)
+    with django_assert_num_queries(0):
+        seat_map = get_seat_map(booked_performance)
+    assert seat_map.free_count() == 10
+    assert seat_map_cache_stats.snapshot()["hits"] == 1
+    assert seat_map_cache_stats.snapshot()["misses"] == 1
+
+
+@pytest.mark.django_db
+def test_seat_map_polling_counts_as_hits(api_client, booked_performance):
+    url = reverse("performance-seat-map", args=[booked_performance.pk])
+    for _ in range(3):
+        assert api_client.get(url).status_code == 200
+
+    out = io.StringIO()
+    call_command("seat_map_cache_stats", "--reset", stdout=out)
+    assert json.loads(out.getvalue()) == {"hits": 2, "misses": 1, "hit_rate": 2 / 3}
+    assert seat_map_cache_stats.snapshot()["hits"] == 0
+
+
+@pytest.mark.django_db
+def test_seat_map_cache_invalidated_by_ticket_writes(
+    booked_performance, django_capture_on_commit_callbacks
+):
+    user = Reservation.objects.first().user
+    assert get_seat_map(booked_performance).free_count() == 10
+
+    with django_capture_on_commit_callbacks(execute=True):
+        create_reservation(
+            user=user, performance=booked_performance, seats=[{"row": 2, "seat": 2}]
+        )
+    assert get_seat_map(booked_performance).is_taken(2, 2)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Reservation.objects.all().delete()
+    assert get_seat_map(booked_performance).free_count() == 12
+
+
+def test_free_runs_follow_marks():
+    seat_map = SeatMap.from_taken(2, 6, [(1, 3), (2, 1)])
+    assert seat_map.free_runs() == [[(1, 2), (4, 3)], [(2, 5)]]
+
+    seat_map.mark_taken(2, 4)
+    seat_map.mark_free(1, 3)
+    seat_map.mark_taken(1, 6)
+    assert seat_map.free_runs() == [[(1, 5)], [(2, 2), (5, 2)]]
+    rebuilt = SeatMap(2, 6, seat_map.to_bytes())
+    assert rebuilt.free_runs() == seat_map.free_runs()
+
+
+def test_blocks_prefer_front_rows_and_the_centre():
+    seat_map = SeatMap.from_taken(3, 5, [(1, 3)])
+    assert list(seat_map.blocks(2))[:3] == [(1, [1, 2]), (1, [4, 5]), (2, [2, 3])]
+    assert seat_map.best_block(3) == (2, [2, 3, 4])
+    assert seat_map.best_block(3, row_from=3) == (3, [2, 3, 4])
+    assert seat_map.best_block(6) is None
+
+
+@pytest.mark.django_db
+def test_bookings_carry_the_cached_map_forward(
+    booked_performance, django_capture_on_commit_callbacks, django_assert_num_queries
+):
+    user = Reservation.objects.first().user
+    get_seat_map(booked_performance)
+    with django_capture_on_commit_callbacks(execute=True):
+        create_reservation(
+            user=user, performance=booked_performance, seats=[{"row": 2, "seat": 3}]
+        )
+    with django_assert_num_queries(0):
+        seat_map = get_seat_map(booked_performance)
+    assert seat_map.is_taken(2, 3)
+    assert seat_map.free_runs()[1] == [(1, 2), (4, 1)]
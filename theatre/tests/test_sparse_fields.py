@@ -0,0 +1,98 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from theatre.models import Performance
+from theatre.serializers import FULL, parse_field_selection, selects
+
+
+def test_parse_field_selection():
+    assert parse_field_selection("id, play.title,play.actors.id") == {
+        "id": None,
+        "play": {"title": None, "actors": {"id": None}},
+    }
+    assert parse_field_selection("id,play", "play,theatre_hall") == {
+        "id": None,
+        "play": FULL,
+        "theatre_hall": FULL,
+    }
+    selection = parse_field_selection("play.title", "play.genres")
+    assert selection == {"play": {"title": None, "genres": FULL}}
+    assert selects(selection, "play", "genres", "name")
+    assert not selects(selection, "play", "actors")
+    assert selects(None, "play", "actors", expanded=True)
+    assert not selects({"play": None}, "play", expanded=True)
+
+
+@pytest.fixture
+def user(api_client, django_user_model, make_performance):
+    user = django_user_model.objects.create_user(email="n@example.com", password="1")
+    api_client.force_authenticate(user)
+    for i in range(3):
+        make_performance(i, user)
+    return user
+
+
+def get(api_client, url_name, params):
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(reverse(url_name), params)
+    assert response.status_code == 200, response.data
+    return response.data["results"], [q["sql"] for q in ctx.captured_queries]
+
+
+@pytest.mark.django_db
+def test_performance_fields_skip_unrequested_relations(api_client, user):
+    data, queries = get(
+        api_client, "performance-list", {"fields": "id,show_time,play.title"}
+    )
+    assert set(data[0]) == {"id", "show_time", "play"}
+    assert data[0]["play"] == {"title": "Play 0"}
+    assert len(queries) == 1
+    assert "theatre_theatrehall" not in queries[0]
+
+
+@pytest.mark.django_db
+def test_unexpanded_relations_render_as_ids(api_client, user):
+    data, queries = get(api_client, "performance-list", {"fields": "id,play"})
+    assert {item["play"] for item in data} == set(
+        Performance.objects.values_list("play_id", flat=True)
+    )
+    assert len(queries) == 1
+    assert "theatre_play" not in queries[0]
+
+    data, _ = get(
+        api_client, "performance-list", {"fields": "id,play", "expand": "play"}
+    )
+    assert set(data[0]["play"]) == {"id", "title", "description", "actors", "genres"}
+
+
+@pytest.mark.django_db
+def test_nested_many_relations_follow_fields(api_client, user):
+    data, queries = get(api_client, "play-list", {"fields": "title,actors.last_name"})
+    assert data[0] == {
+        "title": "Play 0",
+        "actors": [{"last_name": "1"}, {"last_name": "2"}],
+    }
+    assert not any("theatre_genre" in sql for sql in queries)
+
+
+@pytest.mark.django_db
+def test_reservation_fields_skip_ticket_prefetch(api_client, user):
+    data, queries = get(api_client, "reservations-list", {"fields": "id"})
+    assert all(set(item) == {"id"} for item in data)
+    assert not any("theatre_ticket" in sql for sql in queries)
+
+
+@pytest.mark.django_db
+def test_seat_map_needs_to_be_selected(api_client, user):
+    data, _ = get(
+        api_client, "performance-list", {"fields": "id", "seat_map": "compact"}
+    )
+    assert set(data[0]) == {"id"}
+    data, _ = get(
+        api_client,
+        "performance-list",
+        {"fields": "id,seat_map", "seat_map": "compact"},
+    )
+    assert data[0]["seat_map"]["data"] == ["10", "01"]
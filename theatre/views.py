@@ -1,6 +1,15 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from rest_framework import mixins, viewsets
-from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
 
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import (
@@ -10,9 +19,52 @@ from drf_spectacular.utils import (
     extend_schema_view,
 )
 
-from .filters import PerformanceFilter
+from .dimensions import PLAY_MEMBERS, dimension_cache, load_play_members
+from .fast_lists import compile_row_mapper
+from .filters import PerformanceFilter, PlaySearchFilter
+from .pagination import PerformancePagination, ReservationPagination, TicketPagination
 from .models import Actor, Genre, Play, TheatreHall, Performance, Reservation, Ticket
 from .permissions import IsAdminOrReadOnly
+from .exceptions import booking_errors
+from .services.admission import (
+    admitted,
+    join_queue,
+    on_sale_among,
+    queue_position,
+    read_tokens,
+)
+from .services.allocation import allocate_best_seats
+from .services.booking import cancel_reservation
+from .services.catalog import (
+    cache_response,
+    catalog_generations,
+    get_cached_response,
+    last_modified,
+    response_cache_key,
+)
+from .services.holds import confirm_hold, create_hold, release_hold
+from .services.idempotency import (
+    await_response,
+    claim_idempotency_key,
+    remember_response,
+    request_fingerprint,
+)
+from .services.manifest import (
+    MANIFEST_CONTENT_TYPES,
+    MANIFEST_CSV,
+    MANIFEST_WRITERS,
+    manifest_tickets,
+)
+from .services.seats import (
+    SEAT_MAP_COMPACT,
+    SEAT_MAP_FORMATS,
+    SEAT_MAP_FULL,
+    SEAT_MAP_NONE,
+    get_seat_map,
+    load_seat_maps,
+    peek_seat_map,
+    seat_map_etag,
+)
 from .serializers import (
     ActorSerializer,
     GenreSerializer,
@@ -22,29 +74,226 @@ from .serializers import (
     PerformanceSerializer,
     ReservationCreateSerializer,
     ReservationSerializer,
+    SeatAllocationSerializer,
+    SeatHoldCreateSerializer,
+    SeatHoldSerializer,
+    SeatHoldTokenSerializer,
+    TicketManifestParamsSerializer,
     TicketSerializer,
     UserSerializer,
+    field_selection,
+    selects,
 )
 
 User = get_user_model()
 
+QUEUE_TOKEN_HEADER = OpenApiParameter(
+    name="X-Queue-Token",
+    type=OpenApiTypes.STR,
+    location=OpenApiParameter.HEADER,
+    description="Waiting room token(s), comma-separated; required for on-sale shows.",
+)
+
+
+def admission(request, performance_ids, consume=True):
+    # Tokens are bound to the user who queued; a booking uses its number up
+    tokens = read_tokens(request.headers.get("X-Queue-Token", ""), request.user.pk)
+    return admitted(performance_ids, tokens, consume)
+
+
+FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        name="fields",
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        description=(
+            "Comma-separated fields to return, dotted for nested ones "
+            "(play.title). Relations named here come back as ids."
+        ),
+    ),
+    OpenApiParameter(
+        name="expand",
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        description="Relations to embed in full when fields is given.",
+    ),
+]
+
+
+# Comments rather than docstrings on view mixins: drf-spectacular would
+# publish an inherited class docstring as every operation's description
+
+
+class CatalogCacheMixin:
+    # Serve list and retrieve from a cache keyed by URL and catalog
+    # generations. Any save or delete of a model in catalog_models starts a
+    # new generation (see theatre.signals), so stale entries are never read
+    # again and simply expire.
+
+    catalog_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(super().retrieve, request, *args, **kwargs)
+
+    def _cached(self, handler, request, *args, **kwargs):
+        generations = catalog_generations(self.catalog_models)
+        key = response_cache_key(
+            request.build_absolute_uri(), request.accepted_media_type, generations
+        )
+        modified = last_modified(max(generations.values()))
+        headers = {
+            "ETag": f'"{key.rsplit(":", 1)[1]}"',
+            "Last-Modified": http_date(modified),
+            "Cache-Control": "no-cache",
+        }
+        if self._not_modified(request, headers["ETag"], modified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        data = get_cached_response(key)
+        if data is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            data = response.data
+            cache_response(key, data)
+        return Response(data, headers=headers)
+
+    @staticmethod
+    def _not_modified(request, etag, last_modified):
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag in parse_etags(if_none_match) or if_none_match.strip() == "*"
+        since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+        return since is not None and last_modified <= since
+
+
+class DimensionsMixin:
+    # Serialize nested actors, genres and halls from the dimension tables.
+    # dimension_paths maps output paths to the tables they render from and
+    # play_path is where plays sit, so only the tables and play members
+    # (read from the through tables) that a response shows are loaded.
+
+    dimension_paths = {("actors",): "actor", ("genres",): "genre"}
+    play_path = ()
+    play_id_attr = "pk"
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in ("list", "retrieve") and args:
+            rows = args[0] if kwargs.get("many") else [args[0]]
+            context = kwargs.get("context") or self.get_serializer_context()
+            kwargs["context"] = {**context, **self.dimension_context(rows)}
+        return super().get_serializer(*args, **kwargs)
+
+    def dimension_context(self, rows):
+        selection = field_selection(self.request)
+        tables = dimension_cache.tables(
+            {
+                dimension
+                for path, dimension in self.dimension_paths.items()
+                # Bare member ids still follow the model ordering in the table
+                if selects(selection, *path)
+            }
+        )
+        relations = [
+            relation
+            for relation in PLAY_MEMBERS
+            if selects(selection, *self.play_path, relation)
+        ]
+        context = {"dimensions": tables, "dimension_members": dict.fromkeys(relations)}
+        self.add_play_members(context, rows)
+        return context
+
+    def add_play_members(self, context, rows):
+        relations = list(context["dimension_members"])
+        if relations:
+            play_ids = [
+                (
+                    row[self.play_id_attr]
+                    if isinstance(row, dict)
+                    else getattr(row, self.play_id_attr)
+                )
+                for row in rows
+            ]
+            context["dimension_members"] = load_play_members(
+                context["dimensions"], play_ids, relations
+            )
+
+
+class FastListMixin:
+    # With THEATRE_FAST_LISTS, list() selects values() rows and maps them
+    # through a RowMapper compiled from the serializer, skipping model
+    # instances and per-row field dispatch. Serializers with a field that
+    # needs instances (seat maps) take the regular path.
+
+    fast_list_columns = ()
+
+    def list(self, request, *args, **kwargs):
+        response = self.fast_list(request)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        return response
+
+    def fast_list(self, request):
+        if not getattr(settings, "THEATRE_FAST_LISTS", False):
+            return None
+        serializer = self.get_serializer([], many=True)
+        mapper = compile_row_mapper(serializer.child)
+        if mapper is None:
+            return None
+        # The cursor is read from the rows, whatever fields= leaves out; the
+        # mapper only renders its own columns
+        ordering = getattr(self.paginator, "ordering", None) or ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        columns = dict.fromkeys(
+            [*mapper.columns, *self.fast_list_columns]
+            + [field.lstrip("-") for field in ordering]
+        )
+        queryset = self.filter_queryset(self.get_queryset()).values(*columns)
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+        self.prepare_fast_rows(serializer.context, rows)
+        data = [mapper(row) for row in rows]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def prepare_fast_rows(self, context, rows):
+        pass
+
+
+SEAT_MAP_PARAMETER = OpenApiParameter(
+    name="seat_map",
+    type=OpenApiTypes.STR,
+    location=OpenApiParameter.QUERY,
+    enum=SEAT_MAP_FORMATS,
+    description="Seat map format: per-seat objects or per-row bitstrings.",
+)
+
 
 @extend_schema_view(
     list=extend_schema(
         summary="List actors",
         tags=["Actors"],
+        parameters=FIELDS_PARAMETERS,
         responses={200: ActorSerializer(many=True)},
     ),
-    retrieve=extend_schema(summary="Retrieve actor", tags=["Actors"]),
+    retrieve=extend_schema(
+        summary="Retrieve actor", tags=["Actors"], parameters=FIELDS_PARAMETERS
+    ),
     create=extend_schema(summary="Create actor", tags=["Actors"]),
     update=extend_schema(summary="Update actor", tags=["Actors"]),
     partial_update=extend_schema(summary="Partially update actor", tags=["Actors"]),
     destroy=extend_schema(summary="Delete actor", tags=["Actors"]),
 )
-class ActorViewSet(viewsets.ModelViewSet):
+class ActorViewSet(CatalogCacheMixin, viewsets.ModelViewSet):
     queryset = Actor.objects.all()
     serializer_class = ActorSerializer
     permission_classes = (IsAdminOrReadOnly,)
+    catalog_models = ("actor",)
     search_fields = ("first_name", "last_name")
 
 
@@ -52,26 +301,35 @@ class ActorViewSet(viewsets.ModelViewSet):
     list=extend_schema(
         summary="List genres",
         tags=["Genres"],
+        parameters=FIELDS_PARAMETERS,
         responses={200: GenreSerializer(many=True)},
     ),
-    retrieve=extend_schema(summary="Retrieve genre", tags=["Genres"]),
+    retrieve=extend_schema(
+        summary="Retrieve genre", tags=["Genres"], parameters=FIELDS_PARAMETERS
+    ),
     create=extend_schema(summary="Create genre", tags=["Genres"]),
     update=extend_schema(summary="Update genre", tags=["Genres"]),
     partial_update=extend_schema(summary="Partially update genre", tags=["Genres"]),
     destroy=extend_schema(summary="Delete genre", tags=["Genres"]),
 )
-class GenreViewSet(viewsets.ModelViewSet):
+class GenreViewSet(CatalogCacheMixin, viewsets.ModelViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = (IsAdminOrReadOnly,)
+    catalog_models = ("genre",)
     search_fields = ("name",)
 
 
 @extend_schema_view(
     list=extend_schema(
-        summary="List plays", tags=["Plays"], responses={200: PlaySerializer(many=True)}
+        summary="List plays",
+        tags=["Plays"],
+        parameters=FIELDS_PARAMETERS,
+        responses={200: PlaySerializer(many=True)},
+    ),
+    retrieve=extend_schema(
+        summary="Retrieve play", tags=["Plays"], parameters=FIELDS_PARAMETERS
     ),
-    retrieve=extend_schema(summary="Retrieve play", tags=["Plays"]),
     create=extend_schema(
         summary="Create play",
         tags=["Plays"],
@@ -92,25 +350,30 @@ class GenreViewSet(viewsets.ModelViewSet):
     ),
     destroy=extend_schema(summary="Delete play", tags=["Plays"]),
 )
-class PlayViewSet(viewsets.ModelViewSet):
-    queryset = Play.objects.prefetch_related("actors", "genres")
+class PlayViewSet(CatalogCacheMixin, DimensionsMixin, viewsets.ModelViewSet):
+    # Actors and genres come from the dimension tables, not prefetches
+    queryset = Play.objects.all()
     permission_classes = (IsAdminOrReadOnly,)
+    catalog_models = ("play", "actor", "genre")
 
     def get_serializer_class(self):
         if self.action in ("create", "update", "partial_update"):
             return PlayWriteSerializer
         return PlaySerializer
 
-    search_fields = ("title", "actors__first_name", "actors__last_name", "genres__name")
+    filter_backends = (PlaySearchFilter, OrderingFilter)
 
 
 @extend_schema_view(
     list=extend_schema(
         summary="List halls",
         tags=["Theatre halls"],
+        parameters=FIELDS_PARAMETERS,
         responses={200: TheatreHallSerializer(many=True)},
     ),
-    retrieve=extend_schema(summary="Retrieve hall", tags=["Theatre halls"]),
+    retrieve=extend_schema(
+        summary="Retrieve hall", tags=["Theatre halls"], parameters=FIELDS_PARAMETERS
+    ),
     create=extend_schema(summary="Create hall", tags=["Theatre halls"]),
     update=extend_schema(summary="Update hall", tags=["Theatre halls"]),
     partial_update=extend_schema(
@@ -118,10 +381,11 @@ class PlayViewSet(viewsets.ModelViewSet):
     ),
     destroy=extend_schema(summary="Delete hall", tags=["Theatre halls"]),
 )
-class TheatreHallViewSet(viewsets.ModelViewSet):
+class TheatreHallViewSet(CatalogCacheMixin, viewsets.ModelViewSet):
     queryset = TheatreHall.objects.all()
     serializer_class = TheatreHallSerializer
     permission_classes = (IsAdminOrReadOnly,)
+    catalog_models = ("theatrehall",)
     search_fields = ("name",)
 
 
@@ -136,37 +400,303 @@ class TheatreHallViewSet(viewsets.ModelViewSet):
                 location=OpenApiParameter.QUERY,
                 description="Filter by calendar date (YYYY-MM-DD).",
             ),
+            SEAT_MAP_PARAMETER,
+            *FIELDS_PARAMETERS,
         ],
         responses={200: PerformanceSerializer(many=True)},
     ),
-    retrieve=extend_schema(summary="Retrieve performance", tags=["Performances"]),
+    retrieve=extend_schema(
+        summary="Retrieve performance",
+        tags=["Performances"],
+        parameters=[SEAT_MAP_PARAMETER, *FIELDS_PARAMETERS],
+    ),
     create=extend_schema(summary="Create performance", tags=["Performances"]),
     update=extend_schema(summary="Update performance", tags=["Performances"]),
     partial_update=extend_schema(
         summary="Partially update performance", tags=["Performances"]
     ),
     destroy=extend_schema(summary="Delete performance", tags=["Performances"]),
+    seat_map=extend_schema(
+        summary="Performance seat map",
+        description="Supports conditional GET: send the ETag back in If-None-Match.",
+        tags=["Performances"],
+        parameters=[
+            OpenApiParameter(
+                name="seat_map",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                enum=(SEAT_MAP_FULL, SEAT_MAP_COMPACT),
+            ),
+        ],
+        responses={200: OpenApiTypes.OBJECT, 304: None},
+    ),
+    hold=extend_schema(
+        summary="Hold seats",
+        description="Seats stay unavailable to others until the hold expires.",
+        tags=["Performances"],
+        request=SeatHoldCreateSerializer,
+        responses={201: SeatHoldSerializer},
+        parameters=[QUEUE_TOKEN_HEADER],
+    ),
+    release=extend_schema(
+        summary="Release held seats",
+        tags=["Performances"],
+        request=SeatHoldTokenSerializer,
+        responses={204: None},
+    ),
+    confirm=extend_schema(
+        summary="Confirm a hold as a reservation",
+        tags=["Performances"],
+        request=SeatHoldTokenSerializer,
+        responses={201: ReservationSerializer},
+        parameters=[QUEUE_TOKEN_HEADER],
+    ),
+    allocate=extend_schema(
+        summary="Book the best available adjacent seats",
+        description="Front rows first, then the run closest to the row centre.",
+        tags=["Performances"],
+        request=SeatAllocationSerializer,
+        responses={201: ReservationSerializer},
+        parameters=[QUEUE_TOKEN_HEADER],
+    ),
+    best_available=extend_schema(
+        summary="Find the best block of adjacent free seats",
+        description="Nothing is booked; POST to allocate to book in one step.",
+        tags=["Performances"],
+        parameters=[
+            OpenApiParameter(
+                name=name, type=OpenApiTypes.INT, location=OpenApiParameter.QUERY
+            )
+            for name in ("quantity", "row_from", "row_to")
+        ],
+        responses={200: OpenApiTypes.OBJECT, 404: None},
+    ),
+    queue=extend_schema(
+        summary="Join or poll the waiting room",
+        description=(
+            "POST issues a queue token for an on-sale performance; "
+            "GET with ?token= reports the position. Admitted tokens go "
+            "in the X-Queue-Token header of booking requests."
+        ),
+        tags=["Performances"],
+        request=None,
+        parameters=[
+            OpenApiParameter(
+                name="token", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY
+            ),
+        ],
+        responses={200: OpenApiTypes.OBJECT, 201: OpenApiTypes.OBJECT},
+    ),
 )
-class PerformanceViewSet(viewsets.ModelViewSet):
-    queryset = Performance.objects.select_related("play", "theatre_hall")
+class PerformanceViewSet(FastListMixin, DimensionsMixin, viewsets.ModelViewSet):
+    queryset = Performance.objects.all()
     serializer_class = PerformanceSerializer
     permission_classes = (IsAdminOrReadOnly,)
     filterset_class = PerformanceFilter
+    pagination_class = PerformancePagination
     ordering = ("show_time",)
+    dimension_paths = {
+        ("theatre_hall",): "theatrehall",
+        ("play", "actors"): "actor",
+        ("play", "genres"): "genre",
+    }
+    play_path = ("play",)
+    play_id_attr = "play_id"
+    fast_list_columns = ("play_id",)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ("list", "retrieve"):
+            return queryset.select_related("play", "theatre_hall")
+        # Halls, actors and genres come from the dimension tables; only join
+        # what ?fields= asks for, and the hall when seat maps need its size
+        selection = field_selection(self.request)
+        related = []
+        if selects(selection, "play", expanded=True):
+            related.append("play")
+        if selects(selection, "seat_map"):
+            related.append("theatre_hall")
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == "list":
+            context["seat_map_default"] = SEAT_MAP_NONE
+        return context
+
+    def list(self, request, *args, **kwargs):
+        response = self.fast_list(request)
+        if response is not None:
+            return response
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        performances = page if page is not None else list(queryset)
+
+        context = self.get_serializer_context()
+        seat_map = request.query_params.get("seat_map", SEAT_MAP_NONE)
+        if seat_map != SEAT_MAP_NONE and selects(field_selection(request), "seat_map"):
+            context["seat_maps"] = load_seat_maps(performances)
+        serializer = self.get_serializer(performances, many=True, context=context)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def get_serializer_class(self):
+        if self.action == "hold":
+            return SeatHoldCreateSerializer
+        if self.action in ("release", "confirm"):
+            return SeatHoldTokenSerializer
+        if self.action == "allocate":
+            return SeatAllocationSerializer
+        return super().get_serializer_class()
+
+    def prepare_fast_rows(self, context, rows):
+        self.add_play_members(context, rows)
+
+    @staticmethod
+    def _on_sale(performance):
+        return [performance.pk] if performance.on_sale else []
+
+    @action(detail=True, methods=["get", "post"], permission_classes=(IsAuthenticated,))
+    def queue(self, request, pk=None):
+        if request.method == "POST":
+            performance = self.get_object()
+            return Response(
+                join_queue(performance.pk, request.user.pk),
+                status=status.HTTP_201_CREATED,
+            )
+        # Polling never touches the performance row: the token is signed
+        tokens = read_tokens(request.query_params.get("token", ""), request.user.pk)
+        number = tokens.get(int(pk)) if pk.isdigit() else None
+        if number is None:
+            raise ValidationError({"token": "Invalid or expired queue token."})
+        return Response(queue_position(int(pk), number))
+
+    @action(detail=True, methods=["post"], permission_classes=(IsAuthenticated,))
+    def hold(self, request, pk=None):
+        performance = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # A hold is confirmed with the same token
+        on_sale = self._on_sale(performance)
+        with booking_errors(), admission(request, on_sale, consume=False):
+            holds = create_hold(
+                user=request.user,
+                performance=performance,
+                seats=serializer.validated_data["seats"],
+            )
+        return Response(SeatHoldSerializer(holds).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["post"], permission_classes=(IsAuthenticated,))
+    def release(self, request, pk=None):
+        performance = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        release_hold(
+            user=request.user,
+            performance=performance,
+            token=serializer.validated_data["token"],
+        )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=["post"], permission_classes=(IsAuthenticated,))
+    def confirm(self, request, pk=None):
+        performance = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with booking_errors(), admission(request, self._on_sale(performance)):
+            reservation = confirm_hold(
+                user=request.user,
+                performance=performance,
+                token=serializer.validated_data["token"],
+            )
+        return Response(
+            ReservationSerializer(reservation).data, status=status.HTTP_201_CREATED
+        )
+
+    @action(detail=True, methods=["post"], permission_classes=(IsAuthenticated,))
+    def allocate(self, request, pk=None):
+        performance = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with booking_errors(), admission(request, self._on_sale(performance)):
+            reservation = allocate_best_seats(
+                user=request.user, performance=performance, **serializer.validated_data
+            )
+        return Response(
+            ReservationSerializer(reservation).data, status=status.HTTP_201_CREATED
+        )
+
+    @action(detail=True, methods=["get"], url_path="best-available")
+    def best_available(self, request, pk=None):
+        params = SeatAllocationSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        seat_map = peek_seat_map(int(pk)) if pk.isdigit() else None
+        if seat_map is None:
+            seat_map = get_seat_map(self.get_object())
+
+        quantity = params.validated_data["quantity"]
+        block = seat_map.best_block(
+            quantity,
+            params.validated_data["row_from"],
+            params.validated_data.get("row_to"),
+        )
+        if block is None:
+            raise NotFound(f"No {quantity} adjacent seats are available.")
+        row, seats = block
+        return Response({"row": row, "seats": seats})
+
+    @action(detail=True, methods=["get"], url_path="seat-map")
+    def seat_map(self, request, pk=None):
+        seat_map_format = request.query_params.get("seat_map", SEAT_MAP_FULL)
+        if seat_map_format != SEAT_MAP_COMPACT:
+            seat_map_format = SEAT_MAP_FULL
+
+        seat_map = peek_seat_map(int(pk)) if pk.isdigit() else None
+        if seat_map is None:
+            seat_map = get_seat_map(self.get_object())
+
+        etag = seat_map_etag(seat_map, seat_map_format)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if_none_match = request.headers.get("If-None-Match", "")
+        if etag in parse_etags(if_none_match) or if_none_match.strip() == "*":
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        if seat_map_format == SEAT_MAP_COMPACT:
+            data = seat_map.to_compact()
+        else:
+            data = seat_map.to_grid()
+        return Response(data, headers=headers)
 
 
 @extend_schema_view(
     list=extend_schema(
         summary="List my reservations",
         tags=["Reservations"],
+        parameters=FIELDS_PARAMETERS,
         responses={200: ReservationSerializer(many=True)},
     ),
-    retrieve=extend_schema(summary="Retrieve my reservation", tags=["Reservations"]),
+    retrieve=extend_schema(
+        summary="Retrieve my reservation",
+        tags=["Reservations"],
+        parameters=FIELDS_PARAMETERS,
+    ),
     create=extend_schema(
         summary="Create reservation",
         tags=["Reservations"],
         request=ReservationCreateSerializer,
         responses={201: ReservationSerializer},
+        parameters=[
+            OpenApiParameter(
+                name="Idempotency-Key",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.HEADER,
+                description="Retries with the same key replay the first response.",
+            ),
+            QUEUE_TOKEN_HEADER,
+        ],
         examples=[
             OpenApiExample(
                 "Simple payload",
@@ -191,45 +721,178 @@ class ReservationViewSet(
     viewsets.GenericViewSet,
 ):
     permission_classes = (IsAuthenticated,)
+    pagination_class = ReservationPagination
 
     def get_queryset(self):
-        return (
-            Reservation.objects.filter(user=self.request.user)
-            .prefetch_related(
-                "tickets__performance__play", "tickets__performance__theatre_hall"
+        queryset = Reservation.objects.filter(user=self.request.user).order_by("-id")
+        if selects(field_selection(self.request), "tickets"):
+            queryset = queryset.prefetch_related(
+                # Grouped by reservation first, so the prefetch walks
+                # ticket_reservation_seat_idx instead of sorting
+                Prefetch(
+                    "tickets",
+                    queryset=Ticket.objects.order_by(
+                        "reservation_id", "performance_id", "row", "seat"
+                    ),
+                )
             )
-            .order_by("-id")
-        )
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "create":
             return ReservationCreateSerializer
         return ReservationSerializer
 
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get("Idempotency-Key")
+        if not key:
+            return super().create(request, *args, **kwargs)
+        if len(key) > 255:
+            raise ValidationError({"Idempotency-Key": "At most 255 characters."})
+
+        fingerprint = request_fingerprint(request.data)
+        claim, stored = claim_idempotency_key(
+            user=request.user, key=key, fingerprint=fingerprint
+        )
+        if stored is not None:
+            return self._replay(stored, fingerprint)
+        try:
+            with transaction.atomic():
+                response = super().create(request, *args, **kwargs)
+                remember_response(
+                    claim,
+                    reservation_id=response.data["id"],
+                    status_code=response.status_code,
+                    body=response.data,
+                )
+        except BaseException:
+            # Failed bookings are not remembered; a retry books afresh
+            claim.delete()
+            raise
+        return response
+
+    def _replay(self, stored, fingerprint):
+        if stored.request_hash != fingerprint:
+            return Response(
+                {"detail": "Idempotency-Key was used with a different request."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        stored = await_response(stored)
+        if stored.pending:
+            return Response(
+                {"detail": "A request with this Idempotency-Key is in progress."},
+                status=status.HTTP_409_CONFLICT,
+                headers={"Retry-After": "1"},
+            )
+        return Response(
+            stored.response_body,
+            status=stored.status_code,
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        if "tickets" in data:
+            on_sale = on_sale_among(item["performance"] for item in data["tickets"])
+        else:
+            on_sale = [data["performance"].pk] if data["performance"].on_sale else []
+        with booking_errors(), admission(self.request, on_sale):
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        cancel_reservation(instance)
+
+
 @extend_schema_view(
     list=extend_schema(
         summary="List my tickets",
         tags=["Tickets"],
+        parameters=FIELDS_PARAMETERS,
         responses={200: TicketSerializer(many=True)},
     ),
-    retrieve=extend_schema(summary="Retrieve my ticket", tags=["Tickets"]),
+    retrieve=extend_schema(
+        summary="Retrieve my ticket", tags=["Tickets"], parameters=FIELDS_PARAMETERS
+    ),
+    manifest=extend_schema(
+        summary="Export the ticket manifest (staff only)",
+        description=(
+            "Every ticket of one performance, or of all performances between "
+            "date_from and date_to, streamed as CSV or newline-delimited JSON."
+        ),
+        tags=["Tickets"],
+        parameters=[
+            OpenApiParameter(
+                name="performance",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+            ),
+            OpenApiParameter(
+                name="date_from",
+                type=OpenApiTypes.DATETIME,
+                location=OpenApiParameter.QUERY,
+            ),
+            OpenApiParameter(
+                name="date_to",
+                type=OpenApiTypes.DATETIME,
+                location=OpenApiParameter.QUERY,
+            ),
+            OpenApiParameter(
+                name="output",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                enum=list(MANIFEST_WRITERS),
+                default=MANIFEST_CSV,
+            ),
+        ],
+        responses={
+            (200, content_type.split(";")[0]): OpenApiTypes.STR
+            for content_type in MANIFEST_CONTENT_TYPES.values()
+        },
+    ),
 )
 class TicketViewSet(
+    FastListMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     viewsets.GenericViewSet,
 ):
     permission_classes = (IsAuthenticated,)
+    pagination_class = TicketPagination
 
     def get_queryset(self):
-        return Ticket.objects.filter(
-            reservation__user=self.request.user
-        ).select_related(
-            "performance__play", "performance__theatre_hall", "reservation"
-        )
+        # Tickets serialize their relations as ids, so nothing to join
+        return Ticket.objects.filter(reservation__user=self.request.user)
 
     serializer_class = TicketSerializer
 
+    @action(detail=False, methods=["get"], permission_classes=(IsAdminUser,))
+    def manifest(self, request):
+        params = TicketManifestParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        performance_id = data.get("performance")
+        if performance_id is not None:
+            if not Performance.objects.filter(pk=performance_id).exists():
+                raise NotFound("No such performance.")
+            filename = f"manifest-performance-{performance_id}"
+        else:
+            filename = "manifest-{:%Y%m%d%H%M}-{:%Y%m%d%H%M}".format(
+                data["date_from"], data["date_to"]
+            )
+
+        tickets = manifest_tickets(
+            performance_id=performance_id,
+            date_from=data.get("date_from"),
+            date_to=data.get("date_to"),
+        )
+        output = data["output"]
+        response = StreamingHttpResponse(
+            MANIFEST_WRITERS[output](tickets),
+            content_type=MANIFEST_CONTENT_TYPES[output],
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}.{output}"'
+        return response
+
 
 @extend_schema_view(
     retrieve=extend_schema(
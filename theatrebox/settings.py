@@ -64,8 +64,18 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    # Inactive unless THEATRE_DETECT_DUPLICATE_QUERIES is set
+    "theatre.middleware.DuplicateQueryMiddleware",
 ]
 
+# Development aid: log SQL statements repeated this many times in one request
+THEATRE_DETECT_DUPLICATE_QUERIES = (
+    os.getenv("THEATRE_DETECT_DUPLICATE_QUERIES", "0") == "1"
+)
+THEATRE_DUPLICATE_QUERY_THRESHOLD = int(
+    os.getenv("THEATRE_DUPLICATE_QUERY_THRESHOLD", 3)
+)
+
 ROOT_URLCONF = "theatrebox.urls"
 
 TEMPLATES = [
@@ -102,6 +112,64 @@ DATABASES = {
 }
 
 
+# Cache
+# Seat maps are versioned in the cache, so every worker must share one backend
+# (e.g. django.core.cache.backends.redis.RedisCache) outside of development.
+
+# Gunicorn workers serving the app (entrypoint.sh exports its default);
+# more than one needs a shared cache, see theatre.checks
+GUNICORN_WORKERS = int(os.getenv("GUNICORN_WORKERS") or 1)
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("DJANGO_CACHE_LOCATION", ""),
+    }
+}
+
+SEAT_MAP_CACHE_TIMEOUT = int(os.getenv("SEAT_MAP_CACHE_TIMEOUT", 60 * 60 * 24))
+
+# Actor, genre, play and hall responses; entries of an old catalog
+# generation are never read again, so this only bounds their memory
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", 60 * 60))
+
+# Seconds a worker keeps its actor, genre and hall tables even when the
+# generation is unchanged, which bounds how long QuerySet.update() writes
+# (no signals, no new generation) stay unseen
+DIMENSION_TABLE_MAX_AGE = int(os.getenv("DIMENSION_TABLE_MAX_AGE", 5 * 60))
+
+# Seconds a seat hold keeps seats out of sale before the sweeper reclaims them
+SEAT_HOLD_TTL = int(os.getenv("SEAT_HOLD_TTL", 10 * 60))
+
+# "materialized" keeps one PerformanceSeat row per seat so best-available
+# allocation can use SELECT ... FOR UPDATE SKIP LOCKED; "implicit" derives
+# free seats from the absence of tickets
+THEATRE_SEAT_INVENTORY = os.getenv("THEATRE_SEAT_INVENTORY", "implicit")
+
+# Performance and ticket lists built from values() rows instead of model
+# instances; same output, measured with manage.py bench_serializers
+THEATRE_FAST_LISTS = os.getenv("THEATRE_FAST_LISTS", "0") == "1"
+
+# Rows per server-side cursor fetch when streaming ticket manifests
+MANIFEST_CHUNK_SIZE = int(os.getenv("MANIFEST_CHUNK_SIZE", 2000))
+
+# Waiting room for on-sale performances: concurrent bookings per show, how
+# long one booking may keep its slot, queue token lifetime and poll interval
+BOOKING_SLOTS_PER_PERFORMANCE = int(os.getenv("BOOKING_SLOTS_PER_PERFORMANCE", 4))
+BOOKING_SLOT_LEASE_SECONDS = int(os.getenv("BOOKING_SLOT_LEASE_SECONDS", 30))
+BOOKING_QUEUE_TOKEN_TTL = int(os.getenv("BOOKING_QUEUE_TOKEN_TTL", 30 * 60))
+BOOKING_QUEUE_POLL_SECONDS = int(os.getenv("BOOKING_QUEUE_POLL_SECONDS", 2))
+
+# Seconds a reservation Idempotency-Key is replayed before it can be reused
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", 24 * 60 * 60))
+# A retry that finds the first request still booking waits this many seconds
+# for its response; a claim still unanswered after the timeout is abandoned
+IDEMPOTENCY_PENDING_WAIT = float(os.getenv("IDEMPOTENCY_PENDING_WAIT", 2))
+IDEMPOTENCY_PENDING_TIMEOUT = int(os.getenv("IDEMPOTENCY_PENDING_TIMEOUT", 60))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 AUTH_USER_MODEL = "users.User"
@@ -159,6 +227,16 @@ REST_FRAMEWORK = {
         "rest_framework.filters.SearchFilter",
         "rest_framework.filters.OrderingFilter",
     ),
+    # orjson-backed when installed, DRF's stdlib JSON otherwise
+    "DEFAULT_RENDERER_CLASSES": (
+        "theatre.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "theatre.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
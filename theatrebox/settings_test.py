@@ -5,17 +5,21 @@ import os
 TEST_DB_DIR = BASE_DIR / ".pytest_db"
 os.makedirs(TEST_DB_DIR, exist_ok=True)
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": TEST_DB_DIR / "test.sqlite3",
+# TEST_DATABASE=postgres runs the suite against the docker-compose database
+# (published on localhost:5433), which the query-plan tests need to check
+# the PostgreSQL planner
+if os.getenv("TEST_DATABASE") != "postgres":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": TEST_DB_DIR / "test.sqlite3",
+        }
     }
-}
 
+# Production's filter backends, pagination and renderers, so API tests take
+# the same query paths; only the default permission is relaxed
 REST_FRAMEWORK = {
-    "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    ),
+    **REST_FRAMEWORK,
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.AllowAny",),
 }
 